@@ -59,6 +59,10 @@ export interface BacktestMetrics {
   max_il_pct: number;
   max_drawdown_pct: number;
   capital_efficiency: number;
+  // Only set when the backtest simulated fees (simulate_fees)
+  fees_earned?: number | null;
+  fee_apr_pct?: number | null;
+  net_vs_hodl_pct?: number | null;
 }
 
 export interface InsightData {
@@ -84,6 +88,27 @@ export interface CandidateResult {
   score: number;
   insight: string;
   insight_data?: InsightData | null;
+  forecast?: ForecastMetrics | null;
+  position?: ExactPosition | null;
+}
+
+// Contract-exact deposit (exact_math); u128 / u64 values as decimal strings
+export interface ExactPosition {
+  sqrt_price_lower_x64: string;
+  sqrt_price_upper_x64: string;
+  liquidity: string;
+  amount_a: string;
+  amount_b: string;
+}
+
+export interface ForecastMetrics {
+  horizon_hours: number;
+  n_paths: number;
+  survival_pct: number;
+  mean_time_to_exit_hours: number;
+  il_median_pct: number;
+  il_p95_pct: number;
+  max_il_p95_pct: number;
 }
 
 export interface ChartMarker {
@@ -103,6 +128,34 @@ export interface ChartSeries {
   markers: ChartMarker[];
 }
 
+export interface WalkForwardStrategy {
+  strategy: string;
+  windows: number;
+  mean_width_pct: number;
+  mean_in_range_pct: number;
+  held_pct: number;
+  mean_vs_hodl_pct: number;
+  worst_vs_hodl_pct: number;
+  mean_max_il_pct: number;
+  worst_max_il_pct: number;
+  top1_pct: number;
+}
+
+export interface WalkForwardResult {
+  train_bars: number;
+  test_bars: number;
+  step_bars: number;
+  windows: number;
+  strategies: WalkForwardStrategy[];
+}
+
+// Picks of one weight set (rank_profiles / weight_sets)
+export interface ProfileRanking {
+  top3: CandidateResult[];
+  extreme_2pct: CandidateResult;
+  extreme_5pct: CandidateResult;
+}
+
 export interface RecommendResponse {
   top3: CandidateResult[];
   extreme_2pct: CandidateResult;
@@ -110,6 +163,8 @@ export interface RecommendResponse {
   series: Record<string, ChartSeries>;
   current_price: number;
   pool_fee_rate: number;
+  walk_forward?: WalkForwardResult | null;
+  rankings?: Record<string, ProfileRanking> | null;
   kline_source?: "birdeye" | "binance";
   base_symbol?: string;
   quote_symbol?: string;
@@ -120,3 +175,39 @@ export interface RecommendResponse {
   coin_symbol_a?: string;
   coin_symbol_b?: string;
 }
+
+// NDJSON records of POST /api/v1/recommend?stream=true, in order:
+// one summary, one candidate per key, then one series per key.
+export type RecommendStreamRecord =
+  | {
+      type: "summary";
+      current_price: number;
+      pool_fee_rate: number;
+      keys: string[];
+      walk_forward?: WalkForwardResult | null;
+      rankings?: Record<string, ProfileRanking> | null;
+    }
+  | { type: "candidate"; key: string; candidate: CandidateResult }
+  | { type: "series"; key: string; series: ChartSeries };
+
+export interface RebalanceTrigger {
+  kind: "exit" | "buffer" | "interval";
+  buffer_pct?: number;
+  interval_bars?: number | null;
+}
+
+export interface RebalanceConfigResult {
+  width_pct: number;
+  trigger: RebalanceTrigger;
+  rebalances: number;
+  total_cost_usd: number;
+  final_value_usd: number;
+  net_pnl_usd: number;
+  lp_vs_hodl_pct: number;
+}
+
+// POST /api/v1/rebalance/sweep; best_series.il_pct holds LP vs HODL %.
+export interface RebalanceSweepResponse {
+  results: RebalanceConfigResult[];
+  best_series: ChartSeries;
+}
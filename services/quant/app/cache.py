@@ -0,0 +1,117 @@
+"""In-process result caches for the quant engine.
+
+Requests for the same pool are frequently repeated verbatim (tab switches,
+reloads), so both the final response and the per-range back-test metrics are
+cached under content-addressed keys derived from the kline data.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import numpy as np
+
+
+def kline_digest(*columns: np.ndarray) -> str:
+    """Return a short content hash of the given kline columns."""
+    h = hashlib.blake2b(digest_size=16)
+    for col in columns:
+        arr = np.ascontiguousarray(col, dtype=np.float64)
+        h.update(len(arr).to_bytes(8, "little"))
+        h.update(arr.data)
+    return h.hexdigest()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after *ttl_seconds*.
+
+    ``max_entries <= 0`` disables the cache (every lookup is a miss and
+    nothing is stored).  With ``max_bytes > 0`` the cache also evicts until
+    the sizes passed to :meth:`set` sum to at most *max_bytes*; a single
+    value larger than that is not stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        max_bytes: int = 0,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        # key -> (expires_at, value, nbytes)
+        self._data: OrderedDict[Hashable, tuple[float, Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value for *key*, or ``None`` on a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, nbytes = entry
+            if self._clock() >= expires_at:
+                del self._data[key]
+                self._bytes -= nbytes
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, nbytes: int = 0) -> None:
+        """Insert or refresh *key* (about *nbytes* large), evicting least recently used entries."""
+        if self.max_entries <= 0 or (self.max_bytes > 0 and nbytes > self.max_bytes):
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._data[key] = (self._clock() + self.ttl_seconds, value, nbytes)
+            self._bytes += nbytes
+            while len(self._data) > self.max_entries or (
+                self.max_bytes > 0 and self._bytes > self.max_bytes
+            ):
+                self._bytes -= self._data.popitem(last=False)[1][2]
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        """Return size, limits and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
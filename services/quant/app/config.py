@@ -6,6 +6,45 @@ class Settings(BaseSettings):
     port: int = 8000
     cors_origins: list[str] = ["http://localhost:3000"]
 
+    # In-process result caches (0 entries disables a cache).  Cached
+    # responses are also bounded by the size of their chart series.
+    cache_max_entries: int = 128
+    cache_max_bytes: int = 256 * 2**20
+    cache_ttl_seconds: float = 300.0
+    metrics_cache_max_entries: int = 4096
+
+    # Incremental back-test sessions (/api/v1/sessions)
+    session_max_entries: int = 256
+    session_ttl_seconds: float = 1800.0
+
+    # Multi-pool /api/v1/recommend/batch (0 workers uses os.cpu_count())
+    batch_workers: int = 0
+    batch_max_pools: int = 500
+
+    # Threads per batched candidate back-test (0 uses os.cpu_count())
+    backtest_workers: int = 0
+
+    # Threads per Monte Carlo forward simulation (0 uses os.cpu_count())
+    simulation_workers: int = 0
+
+    # Upper bound on rebalance windows of one walk-forward evaluation
+    walk_forward_max_windows: int = 5_000
+
+    # Upper bound on (width, trigger) configurations of one rebalance sweep
+    rebalance_max_configs: int = 10_000
+
+    # Memory-mapped kline series of /api/v1/klines and /recommend/stored
+    kline_store_dir: str = "klines"
+
+    # Per-stage Server-Timing header and /metrics histograms
+    instrumentation: bool = False
+
+    # Sample stacks of instrumented requests; slower ones are written as
+    # folded stacks to profile_dir (0 ms disables the profiler)
+    profile_slow_ms: float = 0.0
+    profile_interval_ms: float = 5.0
+    profile_dir: str = "profiles"
+
     model_config = {"env_prefix": "QUANT_"}
 
 
@@ -7,10 +7,14 @@ and computes performance metrics + chart series data.
 from __future__ import annotations
 
 import math
-from typing import Any
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Iterator
 
 import numpy as np
 
+from app.engine.downsample import minmax_index
+from app.engine.price_index import SortedPrices
 from app.schemas import BacktestMetrics
 
 
@@ -65,6 +69,439 @@ def _lp_value(L: float, price: float, pa: float, pb: float) -> float:
         return x * price + y
 
 
+def _lp_values(L: float, prices: np.ndarray, pa: float, pb: float) -> np.ndarray:
+    """Vectorised :func:`_lp_value` over an array of *prices*.
+
+    The square root is only taken for the in-range bars (masked sqrt), and
+    every branch evaluates the exact same float expression as the scalar
+    helper so results are bit-identical.
+    """
+    sqrt_pa = math.sqrt(pa)
+    sqrt_pb = math.sqrt(pb)
+
+    below = prices <= pa
+    above = prices >= pb
+    inside = ~(below | above)
+
+    values = np.empty_like(prices)
+    values[below] = (L * (1.0 / sqrt_pa - 1.0 / sqrt_pb)) * prices[below]
+    values[above] = L * (sqrt_pb - sqrt_pa)
+
+    p_in = prices[inside]
+    sqrt_p = np.sqrt(p_in)
+    x = L * (1.0 / sqrt_p - 1.0 / sqrt_pb)
+    y = L * (sqrt_p - sqrt_pa)
+    values[inside] = x * p_in + y
+    return values
+
+
+def _build_markers(
+    timestamps: np.ndarray,
+    max_drawdown_idx: int | None,
+    max_il_idx: int | None,
+) -> list[dict[str, Any]]:
+    """Return chart markers for the max-drawdown and max-IL bars."""
+    markers: list[dict[str, Any]] = []
+    if max_drawdown_idx is not None:
+        markers.append(
+            {
+                "time": int(timestamps[max_drawdown_idx]),
+                "position": "aboveBar",
+                "color": "#ef4444",
+                "shape": "arrowDown",
+                "text": "Max drawdown",
+            }
+        )
+    if max_il_idx is not None:
+        markers.append(
+            {
+                "time": int(timestamps[max_il_idx]),
+                "position": "aboveBar",
+                "color": "#f59e0b",
+                "shape": "circle",
+                "text": "Max IL",
+            }
+        )
+    return markers
+
+
+# ---------------------------------------------------------------------------
+# Batched kernel
+# ---------------------------------------------------------------------------
+
+# Upper bound on the number of cells in one K x N block.  Larger batches are
+# evaluated in row chunks so peak memory stays bounded on long windows.
+_MAX_BLOCK_CELLS = 4_000_000
+
+# Smaller batches are not worth handing to worker threads.
+_MIN_PARALLEL_CELLS = 500_000
+
+_MS_PER_YEAR = 365.0 * 24 * 3_600_000.0
+
+
+def _normalize_ranges(ranges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return (pa, pb) column vectors with the same clamping as the scalar path."""
+    bounds = np.asarray(ranges, dtype=np.float64).reshape(-1, 2)
+    pa = np.maximum(bounds[:, 0], 1e-18)
+    pb = np.maximum(bounds[:, 1], pa + 1e-18)
+    return pa, pb
+
+
+def _lp_block(
+    L: np.ndarray,
+    prices: np.ndarray,
+    sqrt_p: np.ndarray,
+    pa: np.ndarray,
+    pb: np.ndarray,
+) -> np.ndarray:
+    """K x N LP values of liquidities *L* in ranges [pa, pb] at *prices*."""
+    k = len(pa)
+    n = len(prices)
+    sqrt_pa = np.sqrt(pa)
+    sqrt_pb = np.sqrt(pb)
+
+    # LP value: the in-range expression is evaluated everywhere from the
+    # shared sqrt(P) and then masked by the below / above branches.
+    col = np.newaxis
+    x_in = L[:, col] * (1.0 / sqrt_p - (1.0 / sqrt_pb)[:, col])
+    y_in = L[:, col] * (sqrt_p - sqrt_pa[:, col])
+    lp_values = x_in * prices + y_in
+    below = prices <= pa[:, col]
+    above = prices >= pb[:, col]
+    x_below = L * (1.0 / sqrt_pa - 1.0 / sqrt_pb)
+    y_above = L * (sqrt_pb - sqrt_pa)
+    np.copyto(lp_values, x_below[:, col] * prices, where=below)
+    np.copyto(lp_values, np.broadcast_to(y_above[:, col], (k, n)), where=above)
+    return lp_values
+
+
+def _il_block(lp_values: np.ndarray, hodl_values: np.ndarray) -> np.ndarray:
+    """IL = (LP - HODL) / HODL in percent (negative when LP under-performs)."""
+    il_pct = np.zeros(lp_values.shape, dtype=np.float64)
+    np.divide(lp_values - hodl_values, hodl_values, out=il_pct, where=hodl_values > 0)
+    il_pct *= 100.0
+    return il_pct
+
+
+def _value_block(
+    prices: np.ndarray,
+    sqrt_p: np.ndarray,
+    hodl_values: np.ndarray,
+    pa: np.ndarray,
+    pb: np.ndarray,
+    p0: float,
+    capital: float,
+) -> dict[str, Any]:
+    """Compute the K x N LP value / IL matrices and their extrema.
+
+    *sqrt_p* and *hodl_values* depend only on the price path and are shared
+    by every row.  Each row reproduces the scalar loop bit for bit.
+    """
+    rows = np.arange(len(pa))
+
+    # Clamp p0 into each range for the liquidity calculation
+    p0_clamped = np.maximum(np.minimum(p0, pb), pa)
+    L = np.array(
+        [
+            _compute_liquidity(capital, float(c), float(lo), float(hi))
+            for c, lo, hi in zip(p0_clamped, pa, pb)
+        ]
+    )
+    lp_values = _lp_block(L, prices, sqrt_p, pa, pb)
+    il_pct = _il_block(lp_values, hodl_values)
+
+    # Max IL (most negative value); argmin picks the first occurrence,
+    # matching the strict ``<`` update of the scalar loop.
+    max_il_idx = np.argmin(il_pct, axis=1)
+    max_il = np.minimum(il_pct[rows, max_il_idx], 0.0)
+    max_il_idx[max_il == 0.0] = -1
+
+    # Drawdown from the running LP peak (which starts at the capital)
+    peak_lp = np.maximum(np.maximum.accumulate(lp_values, axis=1), capital)
+    drawdown = np.zeros(lp_values.shape, dtype=np.float64)
+    np.divide(peak_lp - lp_values, peak_lp, out=drawdown, where=peak_lp > 0)
+    drawdown *= 100.0
+    max_drawdown_idx = np.argmax(drawdown, axis=1)
+    max_drawdown = np.maximum(drawdown[rows, max_drawdown_idx], 0.0)
+    max_drawdown_idx[max_drawdown == 0.0] = -1
+
+    return {
+        "L": L,
+        "lp_values": lp_values,
+        "il_pct": il_pct,
+        "max_il": max_il,
+        "max_il_idx": max_il_idx,
+        "max_drawdown": max_drawdown,
+        "max_drawdown_idx": max_drawdown_idx,
+    }
+
+
+def _backtest_block(
+    path: dict[str, Any],
+    pa: np.ndarray,
+    pb: np.ndarray,
+    p0: float,
+    capital: float,
+) -> dict[str, Any]:
+    """Evaluate K ranges against one price path as a K x N matrix.
+
+    *path* holds the range-independent per-bar terms from :func:`_price_terms`.
+    """
+    prices = path["prices"]
+    times = path["times"]
+    k = len(pa)
+    n = len(prices)
+    col = np.newaxis
+    values = _value_block(
+        prices, path["sqrt_p"], path["hodl_values"], pa, pb, p0, capital
+    )
+
+    # In-range tracking: entries / exits are the rising / falling edges of
+    # the in-range mask.  The first bar counts as an entry if it is in range.
+    # In intrabar mode a bar is only in range if its whole [low, high] is,
+    # so a wick through pa / pb counts as an exit.
+    if path["intrabar"]:
+        in_range = (path["lows"] >= pa[:, col]) & (path["highs"] <= pb[:, col])
+    else:
+        in_range = (prices >= pa[:, col]) & (prices <= pb[:, col])
+    prev_in_range = np.zeros((k, n), dtype=bool)
+    prev_in_range[:, 1:] = in_range[:, :-1]
+    entries = in_range & ~prev_in_range
+    exits = ~in_range & prev_in_range
+    if path.get("sorted_prices") is not None:
+        in_range_count = path["sorted_prices"].count_in_range(pa, pb)
+    else:
+        in_range_count = np.count_nonzero(in_range, axis=1)
+    touch_count = np.count_nonzero(exits, axis=1)
+
+    # Every exit closes the most recent entry; a position still in range on
+    # the last bar is closed at the final timestamp.
+    mean_exit_ms = np.zeros(k, dtype=np.float64)
+    for r in range(k):
+        entry_idx = np.flatnonzero(entries[r])
+        exit_idx = np.flatnonzero(exits[r])
+        durations = times[exit_idx] - times[entry_idx[: len(exit_idx)]]
+        if in_range[r, -1]:
+            durations = np.append(durations, times[-1] - times[entry_idx[-1]])
+        if len(durations):
+            mean_exit_ms[r] = np.mean(durations)
+
+    max_il = values["max_il"]
+    if path["intrabar"]:
+        max_il = _intrabar_max_il(path, values["L"], pa, pb)
+
+    fees: np.ndarray | None = None
+    if path["fee_volume"] is not None:
+        fees = _accrue_fees(path, values["L"], pa, pb, in_range)
+
+    return {
+        "pa": pa,
+        "pb": pb,
+        "fees": fees,
+        "max_il": max_il,
+        "max_drawdown": values["max_drawdown"],
+        "in_range_count": in_range_count,
+        "touch_count": touch_count,
+        "mean_exit_ms": mean_exit_ms,
+        "final_lp": values["lp_values"][:, -1],
+        "final_hodl": float(path["hodl_values"][-1]),
+        "duration_ms": float(times[-1] - times[0]),
+        "capital": capital,
+        "n": n,
+    }
+
+
+def _intrabar_max_il(
+    path: dict[str, Any],
+    L: np.ndarray,
+    pa: np.ndarray,
+    pb: np.ndarray,
+) -> np.ndarray:
+    """Worst IL reached anywhere inside the bars, per range (<= 0).
+
+    IL is quasi-concave in price (concave LP value over a linear HODL
+    value), so its minimum over a bar's [low, high] is at one of the two
+    ends and evaluating the lows and highs bounds every intrabar excursion.
+    """
+    il_lows = _il_block(
+        _lp_block(L, path["lows"], path["sqrt_lows"], pa, pb), path["hodl_lows"]
+    )
+    il_highs = _il_block(
+        _lp_block(L, path["highs"], path["sqrt_highs"], pa, pb), path["hodl_highs"]
+    )
+    np.minimum(il_lows, il_highs, out=il_lows)
+    return np.minimum(il_lows.min(axis=1), 0.0)
+
+
+def _accrue_fees(
+    path: dict[str, Any],
+    L: np.ndarray,
+    pa: np.ndarray,
+    pb: np.ndarray,
+    in_range: np.ndarray,
+) -> np.ndarray:
+    """Estimate the swap fees earned by each of the K positions.
+
+    Per bar the pool collects ``fee_rate * volume * close`` (volume in base
+    units, rescaled to pool volume).  The position earns the part of it
+    that trades inside [pa, pb] -- the overlap of the bar's [low, high] path
+    with the range, assuming volume is spread evenly along that path -- times
+    its share of the active liquidity ``L / (L + L_pool)``.  ``L_pool`` is
+    the full-range liquidity equivalent of the pool TVL, ``tvl / (2 sqrt P)``.
+    Bars without a high/low spread fall back to the close-based in-range flag.
+    """
+    col = np.newaxis
+    highs = path["highs"]
+    lows = path["lows"]
+
+    if highs is None:
+        overlap = in_range.astype(np.float64)
+    else:
+        spread = highs - lows
+        inside = np.minimum(highs, pb[:, col]) - np.maximum(lows, pa[:, col])
+        np.maximum(inside, 0.0, out=inside)
+        overlap = np.where(spread > 0, 0.0, in_range.astype(np.float64))
+        np.divide(inside, spread, out=overlap, where=spread > 0)
+
+    share = L[:, col] / (L[:, col] + path["pool_liquidity"])
+    return np.einsum("kn,kn,n->k", overlap, share, path["fee_volume"])
+
+
+def _make_metrics(
+    n: int,
+    pa: float,
+    pb: float,
+    in_range_count: int,
+    touch_count: int,
+    mean_exit_ms: float,
+    max_il: float,
+    max_drawdown: float,
+    final_lp: float,
+    final_hodl: float,
+    fees: float | None = None,
+    capital: float = 0.0,
+    duration_ms: float = 0.0,
+) -> BacktestMetrics:
+    """Assemble :class:`BacktestMetrics` from the raw back-test aggregates.
+
+    The fee metrics are only filled in when *fees* were simulated.
+    """
+    in_range_pct = (in_range_count / n) * 100.0 if n > 0 else 0.0
+    mean_time_to_exit_hours = mean_exit_ms / 3_600_000.0
+
+    # LP vs HODL pct (final values)
+    lp_vs_hodl_pct = (
+        ((final_lp - final_hodl) / final_hodl * 100.0) if final_hodl > 0 else 0.0
+    )
+
+    # Capital efficiency: ratio of the narrow-range liquidity to the
+    # equivalent full-range liquidity.  Approximated as sqrt(pb/pa).
+    capital_efficiency = math.sqrt(pb / pa) if pa > 0 else 1.0
+
+    fee_metrics: dict[str, float] = {}
+    if fees is not None:
+        years = duration_ms / _MS_PER_YEAR
+        fee_apr_pct = fees / capital / years * 100.0 if capital > 0 and years > 0 else 0.0
+        net_vs_hodl_pct = (
+            ((final_lp + fees - final_hodl) / final_hodl * 100.0) if final_hodl > 0 else 0.0
+        )
+        fee_metrics = {
+            "fees_earned": round(fees, 2),
+            "fee_apr_pct": round(fee_apr_pct, 2),
+            "net_vs_hodl_pct": round(net_vs_hodl_pct, 2),
+        }
+
+    return BacktestMetrics(
+        in_range_pct=round(in_range_pct, 2),
+        touch_count=touch_count,
+        mean_time_to_exit_hours=round(mean_time_to_exit_hours, 2),
+        lp_vs_hodl_pct=round(lp_vs_hodl_pct, 2),
+        max_il_pct=round(abs(max_il), 2),  # report as positive number
+        max_drawdown_pct=round(max_drawdown, 2),
+        capital_efficiency=round(capital_efficiency, 2),
+        **fee_metrics,
+    )
+
+
+def _block_metrics(block: dict[str, Any], r: int) -> BacktestMetrics:
+    """Assemble :class:`BacktestMetrics` for row *r* of a kernel block."""
+    return _make_metrics(
+        n=block["n"],
+        pa=float(block["pa"][r]),
+        pb=float(block["pb"][r]),
+        in_range_count=int(block["in_range_count"][r]),
+        touch_count=int(block["touch_count"][r]),
+        mean_exit_ms=float(block["mean_exit_ms"][r]),
+        max_il=float(block["max_il"][r]),
+        max_drawdown=float(block["max_drawdown"][r]),
+        final_lp=float(block["final_lp"][r]),
+        final_hodl=block["final_hodl"],
+        fees=None if block["fees"] is None else float(block["fees"][r]),
+        capital=block["capital"],
+        duration_ms=block["duration_ms"],
+    )
+
+
+def _price_terms(
+    closes: np.ndarray,
+    timestamps: np.ndarray,
+    p0: float,
+    capital: float,
+    *,
+    highs: np.ndarray | None = None,
+    lows: np.ndarray | None = None,
+    volumes: np.ndarray | None = None,
+    fee_rate: float = 0.0,
+    pool_tvl: float | None = None,
+    volume_scale: float = 1.0,
+    intrabar: bool = False,
+) -> dict[str, Any]:
+    """Return the per-bar terms shared by every range.
+
+    Always: prices, times, sqrt(P) and the HODL series.  *highs* / *lows*
+    are widened to contain the close.  With *intrabar*, sqrt(P) and HODL
+    values are also computed at the highs and lows for
+    :func:`_intrabar_max_il`.  When *volumes* are given, also the fee pool
+    per bar and the pool's liquidity proxy used by :func:`_accrue_fees`.
+    """
+    prices = np.asarray(closes, dtype=np.float64)
+    sqrt_p = np.sqrt(prices)
+
+    # HODL baseline: 50/50 split at entry price p0
+    hodl_token_x = (capital / 2.0) / p0  # amount of token X
+    hodl_token_y = capital / 2.0  # amount of token Y (stablecoin side)
+    hodl_values = hodl_token_x * prices + hodl_token_y
+
+    path: dict[str, Any] = {
+        "prices": prices,
+        "times": np.asarray(timestamps, dtype=np.float64),
+        "sqrt_p": sqrt_p,
+        "hodl_values": hodl_values,
+        "highs": None,
+        "lows": None,
+        "intrabar": intrabar,
+        "fee_volume": None,
+        "pool_liquidity": None,
+    }
+    if highs is not None and lows is not None:
+        path["highs"] = np.maximum(np.asarray(highs, dtype=np.float64), prices)
+        path["lows"] = np.minimum(np.asarray(lows, dtype=np.float64), prices)
+    if intrabar:
+        if path["highs"] is None:
+            raise ValueError("intrabar mode needs highs and lows")
+        for side in ("highs", "lows"):
+            path[f"sqrt_{side}"] = np.sqrt(path[side])
+            path[f"hodl_{side}"] = hodl_token_x * path[side] + hodl_token_y
+    if volumes is not None:
+        if pool_tvl is None or pool_tvl <= 0:
+            raise ValueError("pool_tvl must be positive to simulate fees")
+        path["fee_volume"] = (
+            fee_rate * volume_scale * np.asarray(volumes, dtype=np.float64) * prices
+        )
+        path["pool_liquidity"] = pool_tvl / (2.0 * sqrt_p)
+    return path
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -77,6 +514,7 @@ def run_backtest(
     p0: float,
     capital: float,
     fee_rate: float,
+    **bar_inputs: Any,
 ) -> dict[str, Any]:
     """Run an LP-vs-HODL back-test over the given price series.
 
@@ -87,16 +525,508 @@ def run_backtest(
     pa, pb : lower / upper price bounds of the CL range
     p0 : price at position entry (first close or current_price)
     capital : initial capital in USD
-    fee_rate : pool fee rate (e.g. 0.0025 for 25 bps) -- used for
-        capital-efficiency metric but **not** for fee-accrual simulation
-        (we keep the back-test conservative / fee-free so that the metrics
-         reflect pure position performance).
+    fee_rate : pool fee rate (e.g. 0.0025 for 25 bps).  Only used for
+        fee accrual, which is off unless *volumes* are given; by default the
+        back-test stays conservative / fee-free so that the metrics reflect
+        pure position performance.
+    **bar_inputs : ``highs``, ``lows``, ``volumes``, ``pool_tvl``,
+        ``volume_scale`` and ``intrabar``, forwarded to
+        :func:`run_backtest_batch` (fee accrual and the OHLC-aware mode).
 
     Returns
     -------
     dict with keys ``"metrics"`` (:class:`BacktestMetrics`) and
     ``"series"`` (lists of lp_values, hodl_values, il_pct, prices,
     timestamps).
+
+    Notes
+    -----
+    Convenience wrapper around :func:`run_backtest_batch` and
+    :func:`build_series` for a single range.  The results are bit-identical
+    to the scalar reference loop in :func:`_run_backtest_loop`.
+    """
+    ranges = [[pa, pb]]
+    metrics = run_backtest_batch(
+        closes, timestamps, ranges, p0, capital, fee_rate, **bar_inputs
+    )[0]
+    series = build_series(closes, timestamps, ranges, p0, capital)[0]
+    return {"metrics": metrics, "series": series}
+
+
+def run_backtest_batch(
+    closes: np.ndarray,
+    timestamps: np.ndarray,
+    ranges: np.ndarray,
+    p0: float,
+    capital: float,
+    fee_rate: float,
+    *,
+    highs: np.ndarray | None = None,
+    lows: np.ndarray | None = None,
+    volumes: np.ndarray | None = None,
+    pool_tvl: float | None = None,
+    volume_scale: float = 1.0,
+    intrabar: bool = False,
+    sorted_prices: SortedPrices | None = None,
+    workers: int = 1,
+    executor: Executor | None = None,
+) -> list[BacktestMetrics]:
+    """Back-test many ranges over the same price series in one pass.
+
+    Parameters
+    ----------
+    closes, timestamps, p0, capital, fee_rate : see :func:`run_backtest`
+    ranges : ``(K, 2)`` array-like of ``[pa, pb]`` price bounds
+    volumes : optional per-bar base-asset volume.  When given, swap fees are
+        simulated (see :func:`_accrue_fees`) and the ``fees_earned``,
+        ``fee_apr_pct`` and ``net_vs_hodl_pct`` metrics are filled in.
+    highs, lows : optional per-bar high / low, used to pro-rate each bar's
+        volume by how much of its range overlaps ``[pa, pb]``.
+    pool_tvl : pool TVL in the same units as *capital*; required with
+        *volumes*.
+    volume_scale : factor applied to *volumes*, e.g. to rescale an exchange
+        volume proxy to the pool's own volume.
+    intrabar : use *highs* / *lows* (required) rather than closes for the
+        in-range status, so wicks through a bound count as exits in
+        ``touch_count`` / ``mean_time_to_exit_hours``, and report the worst
+        IL reached inside any bar as ``max_il_pct``.
+    sorted_prices : optional :class:`SortedPrices` of *closes*; in close
+        mode the in-range bar counts are then read off it by ``searchsorted``.
+    workers : threads evaluating row chunks concurrently (for batches of at
+        least ``_MIN_PARALLEL_CELLS``).  Blocks only read the shared per-bar
+        terms and the kernel is NumPy work that releases the GIL, so this
+        is also safe on free-threaded builds; results do not depend on it.
+    executor : thread pool of (at least) *workers* threads to run the chunks
+        on, shared between calls; without it a pool is started per call.
+
+    Returns
+    -------
+    list of :class:`BacktestMetrics`, one per row of *ranges*, identical to
+    what :func:`run_backtest` reports for that range.
+
+    The price-derived terms (sqrt(P), the HODL series) are computed once and
+    all K ranges are evaluated as a K x N matrix, in row chunks bounded by
+    ``_MAX_BLOCK_CELLS``.
+    """
+    if len(closes) == 0:
+        raise ValueError("closes array is empty")
+
+    path = _price_terms(
+        closes,
+        timestamps,
+        p0,
+        capital,
+        highs=highs,
+        lows=lows,
+        volumes=volumes,
+        fee_rate=fee_rate,
+        pool_tvl=pool_tvl,
+        volume_scale=volume_scale,
+        intrabar=intrabar,
+    )
+    if sorted_prices is not None and not intrabar:
+        path["sorted_prices"] = sorted_prices
+    pa_all, pb_all = _normalize_ranges(ranges)
+
+    n_ranges = len(pa_all)
+    chunk = max(1, _MAX_BLOCK_CELLS // len(closes))
+    if workers > 1 and n_ranges * len(closes) >= _MIN_PARALLEL_CELLS:
+        # At least one chunk per worker; the concurrent blocks share the
+        # cell budget so peak memory stays that of the serial loop.
+        chunk = max(1, min(chunk // workers, -(-n_ranges // workers)))
+    starts = range(0, n_ranges, chunk)
+
+    def run(start: int) -> list[BacktestMetrics]:
+        block = _backtest_block(
+            path,
+            pa_all[start : start + chunk],
+            pb_all[start : start + chunk],
+            p0,
+            capital,
+        )
+        return [_block_metrics(block, r) for r in range(len(block["pa"]))]
+
+    if workers > 1 and len(starts) > 1:
+        if executor is not None:
+            blocks = list(executor.map(run, starts))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                blocks = list(pool.map(run, starts))
+    else:
+        blocks = [run(start) for start in starts]
+    return [metrics for block in blocks for metrics in block]
+
+
+def build_series(
+    closes: np.ndarray,
+    timestamps: np.ndarray,
+    ranges: np.ndarray,
+    p0: float,
+    capital: float,
+    max_points: int | None = None,
+    *,
+    as_arrays: bool = False,
+) -> list[dict[str, Any]]:
+    """Materialise chart series for the given ``(K, 2)`` *ranges*.
+
+    This is the expensive part of a back-test (per-bar Python lists), so
+    callers should only request it for the ranges they actually return.
+
+    Returns one dict per range with ``timestamps``, ``lp_values``,
+    ``hodl_values``, ``il_pct``, ``prices`` and ``markers``.  The
+    range-independent lists (timestamps, prices, hodl_values) are built once
+    and the *same* list objects are shared by every dict.
+
+    With *max_points*, longer series are downsampled to about that many
+    bars by min/max bucketing of the prices (see
+    :func:`app.engine.downsample.minmax_index`).  The bars are picked once
+    for all ranges and always include every range's marker bars; the arrays
+    are cut before any list is built.
+
+    With *as_arrays*, the per-bar values are NumPy arrays (int64 timestamps,
+    float64 values, shared the same way) instead of lists, for
+    :func:`app.serialization.dumps` to encode without a list round trip.
+    """
+    if len(closes) == 0:
+        raise ValueError("closes array is empty")
+    return list(
+        iter_series(closes, timestamps, ranges, p0, capital, max_points, as_arrays=as_arrays)
+    )
+
+
+def iter_series(
+    closes: np.ndarray,
+    timestamps: np.ndarray,
+    ranges: np.ndarray,
+    p0: float,
+    capital: float,
+    max_points: int | None = None,
+    *,
+    as_arrays: bool = False,
+) -> Iterator[dict[str, Any]]:
+    """Lazy :func:`build_series`: yield the series dicts one range at a time.
+
+    The value matrices are computed up front, but each range's per-bar lists
+    are only built when it is reached, so a consumer that serialises and
+    drops every dict holds at most one range's lists at a time.
+    """
+    if len(closes) == 0:
+        raise ValueError("closes array is empty")
+
+    path = _price_terms(closes, timestamps, p0, capital)
+    hodl_values = path["hodl_values"]
+    pa, pb = _normalize_ranges(ranges)
+    values = _value_block(
+        path["prices"], path["sqrt_p"], hodl_values, pa, pb, p0, capital
+    )
+
+    lp_values = values["lp_values"]
+    il_pct = values["il_pct"]
+    index = None
+    if max_points is not None:
+        markers = np.concatenate([values["max_drawdown_idx"], values["max_il_idx"]])
+        index = minmax_index(closes, max_points, keep=markers[markers >= 0])
+    if index is not None:
+        timestamps, closes, hodl_values = timestamps[index], closes[index], hodl_values[index]
+        lp_values, il_pct = lp_values[:, index], il_pct[:, index]
+
+    as_values = (lambda a: a) if as_arrays else np.ndarray.tolist
+    timestamps_list = as_values(timestamps.astype(np.int64))
+    prices_list = as_values(np.asarray(closes, dtype=np.float64))
+    hodl_list = as_values(np.round(hodl_values, 4))
+
+    for r in range(len(pa)):
+        max_drawdown_idx = int(values["max_drawdown_idx"][r])
+        max_il_idx = int(values["max_il_idx"][r])
+        if index is not None:
+            # Marker bars are always kept; map them to their sampled position.
+            max_drawdown_idx, max_il_idx = (
+                int(np.searchsorted(index, i)) if i >= 0 else -1
+                for i in (max_drawdown_idx, max_il_idx)
+            )
+        yield {
+            "timestamps": timestamps_list,
+            "lp_values": as_values(np.round(lp_values[r], 4)),
+            "hodl_values": hodl_list,
+            "il_pct": as_values(np.round(il_pct[r], 4)),
+            "prices": prices_list,
+            "markers": _build_markers(
+                timestamps,
+                max_drawdown_idx if max_drawdown_idx >= 0 else None,
+                max_il_idx if max_il_idx >= 0 else None,
+            ),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Incremental back-test state
+# ---------------------------------------------------------------------------
+
+class BacktestState:
+    """Resumable back-test of a single range.
+
+    Holds the running aggregates of :func:`run_backtest` (LP peak, max IL /
+    drawdown and their bar indices, in-range count, touch count, the open
+    entry time and the closed exit durations) so that new bars can be folded
+    in with :meth:`advance` at O(new bars) cost.  Feeding a series in any
+    number of chunks yields metrics identical to a single full back-test
+    without fees: only closes are folded in, so no fees accrue.
+    """
+
+    def __init__(
+        self,
+        pa: float,
+        pb: float,
+        p0: float,
+        capital: float,
+    ) -> None:
+        # Same clamping / liquidity set-up as the batch kernel
+        self.pa = max(pa, 1e-18)
+        self.pb = max(pb, self.pa + 1e-18)
+        self.p0 = p0
+        self.capital = capital
+        self.L = _compute_liquidity(capital, max(min(p0, self.pb), self.pa), self.pa, self.pb)
+        self._hodl_token_x = (capital / 2.0) / p0
+        self._hodl_token_y = capital / 2.0
+
+        self.n = 0
+        self.peak_lp = capital
+        self.max_il = 0.0
+        self.max_il_idx: int | None = None
+        self.max_drawdown = 0.0
+        self.max_drawdown_idx: int | None = None
+        self.in_range_count = 0
+        self.touch_count = 0
+        self.in_range = False  # status of the last processed bar
+        self.entry_time: float | None = None
+        self.exit_durations_ms: list[float] = []
+        self.last_lp = 0.0
+        self.last_hodl = 0.0
+        self.last_timestamp = 0.0
+
+    def advance(self, new_closes: np.ndarray, new_timestamps: np.ndarray) -> None:
+        """Fold the bars *new_closes* / *new_timestamps* into the state.
+
+        Bars must be appended in chronological order.
+        """
+        prices = np.asarray(new_closes, dtype=np.float64)
+        times = np.asarray(new_timestamps, dtype=np.float64)
+        m = len(prices)
+        if m == 0:
+            return
+
+        lp_values = _lp_values(self.L, prices, self.pa, self.pb)
+        hodl_values = self._hodl_token_x * prices + self._hodl_token_y
+        il_pct = np.zeros(m, dtype=np.float64)
+        np.divide(lp_values - hodl_values, hodl_values, out=il_pct, where=hodl_values > 0)
+        il_pct *= 100.0
+
+        peak_lp = np.maximum(np.maximum.accumulate(lp_values), self.peak_lp)
+        drawdown = np.zeros(m, dtype=np.float64)
+        np.divide(peak_lp - lp_values, peak_lp, out=drawdown, where=peak_lp > 0)
+        drawdown *= 100.0
+
+        # Range edges, carrying the previous chunk's last in-range status
+        in_range = (prices >= self.pa) & (prices <= self.pb)
+        prev_in_range = np.empty(m, dtype=bool)
+        prev_in_range[0] = self.in_range
+        prev_in_range[1:] = in_range[:-1]
+        entry_idx = np.flatnonzero(in_range & ~prev_in_range)
+        exit_idx = np.flatnonzero(~in_range & prev_in_range)
+
+        # Stints open at the carried-over entry time, then at each new entry
+        starts = times[entry_idx]
+        if self.in_range:
+            starts = np.concatenate(([self.entry_time], starts))
+        durations = times[exit_idx] - starts[: len(exit_idx)]
+
+        self._absorb(il_pct, drawdown, in_range, exit_idx, durations)
+
+        self.n += m
+        self.peak_lp = float(peak_lp[-1])
+        self.in_range = bool(in_range[-1])
+        self.entry_time = float(starts[-1]) if self.in_range else None
+        self.last_lp = float(lp_values[-1])
+        self.last_hodl = float(hodl_values[-1])
+        self.last_timestamp = float(times[-1])
+
+    def _absorb(
+        self,
+        il_pct: np.ndarray,
+        drawdown: np.ndarray,
+        in_range: np.ndarray,
+        exit_idx: np.ndarray,
+        durations: np.ndarray,
+    ) -> None:
+        """Merge one chunk's per-bar values into the running aggregates."""
+        i = int(np.argmin(il_pct))
+        if il_pct[i] < self.max_il:
+            self.max_il = float(il_pct[i])
+            self.max_il_idx = self.n + i
+        i = int(np.argmax(drawdown))
+        if drawdown[i] > self.max_drawdown:
+            self.max_drawdown = float(drawdown[i])
+            self.max_drawdown_idx = self.n + i
+        self.in_range_count += int(np.count_nonzero(in_range))
+        self.touch_count += len(exit_idx)
+        self.exit_durations_ms.extend(durations.tolist())
+
+    def _open_stint(self) -> list[float]:
+        if self.in_range and self.entry_time is not None:
+            return [self.last_timestamp - self.entry_time]
+        return []
+
+    def metrics(self) -> BacktestMetrics:
+        """Return the metrics of everything folded in so far."""
+        if self.n == 0:
+            raise ValueError("no bars have been processed")
+        durations = self.exit_durations_ms + self._open_stint()
+        return _make_metrics(
+            n=self.n,
+            pa=self.pa,
+            pb=self.pb,
+            in_range_count=self.in_range_count,
+            touch_count=self.touch_count,
+            mean_exit_ms=float(np.mean(durations)) if durations else 0.0,
+            max_il=self.max_il,
+            max_drawdown=self.max_drawdown,
+            final_lp=self.last_lp,
+            final_hodl=self.last_hodl,
+        )
+
+
+def _window_candidates(values: np.ndarray, lowest: bool) -> np.ndarray:
+    """Indices of *values* that can still become a sliding-window extremum.
+
+    An element survives if no later element beats it (ties keep the earlier
+    one), i.e. the chunk's part of a monotonic deque.
+    """
+    later = np.empty_like(values)
+    if lowest:
+        later[-1] = np.inf
+        later[:-1] = np.minimum.accumulate(values[:0:-1])[::-1]
+        return np.flatnonzero(values <= later)
+    later[-1] = -np.inf
+    later[:-1] = np.maximum.accumulate(values[:0:-1])[::-1]
+    return np.flatnonzero(values >= later)
+
+
+class SlidingBacktestState(BacktestState):
+    """:class:`BacktestState` whose metrics cover only the last *window* bars.
+
+    The position itself is unchanged (opened once at *p0*, LP peak tracked
+    since entry); old bars are evicted from the window aggregates:
+
+    * in-range %, touches and exit durations count only bars / exits inside
+      the window.  A stint is measured from its real entry even when that
+      entry has already been evicted.
+    * max IL / drawdown are sliding extrema kept in monotonic deques.
+
+    Each :meth:`advance` costs amortised O(new bars).
+    """
+
+    def __init__(
+        self,
+        pa: float,
+        pb: float,
+        p0: float,
+        capital: float,
+        *,
+        window: int,
+    ) -> None:
+        if window <= 0:
+            raise ValueError("window must be positive")
+        super().__init__(pa, pb, p0, capital)
+        self.window = window
+        self._ring = np.zeros(window, dtype=bool)  # in-range flag per slot
+        self._exits: deque[tuple[int, float]] = deque()  # (bar index, duration)
+        self._il_min: deque[tuple[int, float]] = deque()
+        self._dd_max: deque[tuple[int, float]] = deque()
+
+    def _absorb(
+        self,
+        il_pct: np.ndarray,
+        drawdown: np.ndarray,
+        in_range: np.ndarray,
+        exit_idx: np.ndarray,
+        durations: np.ndarray,
+    ) -> None:
+        m = len(in_range)
+        end = self.n + m
+        window_start = max(0, end - self.window)
+
+        # In-range ring: only the last `window` bars of the chunk are kept;
+        # each written slot evicts the bar exactly `window` positions older.
+        keep = min(m, self.window)
+        bars = np.arange(end - keep, end)
+        slots = bars % self.window
+        if keep == self.window:
+            self.in_range_count = 0
+        else:
+            self.in_range_count -= int(np.count_nonzero(self._ring[slots[bars >= self.window]]))
+        self._ring[slots] = in_range[m - keep :]
+        self.in_range_count += int(np.count_nonzero(in_range[m - keep :]))
+
+        self._exits.extend(zip((self.n + exit_idx).tolist(), durations.tolist()))
+        while self._exits and self._exits[0][0] < window_start:
+            self._exits.popleft()
+        self.touch_count = len(self._exits)
+
+        for values, extrema, lowest in (
+            (il_pct, self._il_min, True),
+            (drawdown, self._dd_max, False),
+        ):
+            survivors = _window_candidates(values, lowest)
+            first = values[survivors[0]]
+            while extrema and (extrema[-1][1] > first if lowest else extrema[-1][1] < first):
+                extrema.pop()
+            extrema.extend(zip((self.n + survivors).tolist(), values[survivors].tolist()))
+            while extrema[0][0] < window_start:
+                extrema.popleft()
+
+        idx, value = self._il_min[0]
+        self.max_il, self.max_il_idx = (value, idx) if value < 0.0 else (0.0, None)
+        idx, value = self._dd_max[0]
+        self.max_drawdown, self.max_drawdown_idx = (value, idx) if value > 0.0 else (0.0, None)
+
+    def metrics(self) -> BacktestMetrics:
+        """Return the metrics of the bars currently inside the window."""
+        if self.n == 0:
+            raise ValueError("no bars have been processed")
+        durations = [d for _, d in self._exits] + self._open_stint()
+        return _make_metrics(
+            n=min(self.n, self.window),
+            pa=self.pa,
+            pb=self.pb,
+            in_range_count=self.in_range_count,
+            touch_count=self.touch_count,
+            mean_exit_ms=float(np.mean(durations)) if durations else 0.0,
+            max_il=self.max_il,
+            max_drawdown=self.max_drawdown,
+            final_lp=self.last_lp,
+            final_hodl=self.last_hodl,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Scalar reference implementation
+# ---------------------------------------------------------------------------
+
+def _run_backtest_loop(
+    closes: np.ndarray,
+    timestamps: np.ndarray,
+    pa: float,
+    pb: float,
+    p0: float,
+    capital: float,
+    fee_rate: float,
+) -> dict[str, Any]:
+    """Per-bar reference implementation of :func:`run_backtest`.
+
+    Walks the series one close at a time with the scalar :func:`_lp_value`.
+    Kept as the ground truth for the vectorised kernel's parity tests.
+
+    See :func:`run_backtest` for parameters and return value.
     """
     n = len(closes)
     if n == 0:
@@ -210,27 +1140,7 @@ def run_backtest(
         capital_efficiency=round(capital_efficiency, 2),
     )
 
-    markers: list[dict[str, Any]] = []
-    if max_drawdown_idx is not None:
-        markers.append(
-            {
-                "time": int(timestamps[max_drawdown_idx]),
-                "position": "aboveBar",
-                "color": "#ef4444",
-                "shape": "arrowDown",
-                "text": "Max drawdown",
-            }
-        )
-    if max_il_idx is not None:
-        markers.append(
-            {
-                "time": int(timestamps[max_il_idx]),
-                "position": "aboveBar",
-                "color": "#f59e0b",
-                "shape": "circle",
-                "text": "Max IL",
-            }
-        )
+    markers = _build_markers(timestamps, max_drawdown_idx, max_il_idx)
 
     series = {
         "timestamps": timestamps.astype(int).tolist(),
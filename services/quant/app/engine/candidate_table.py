@@ -0,0 +1,102 @@
+"""Struct-of-arrays table of one request's candidate ranges.
+
+Every per-range field is a NumPy column (prices, ticks, width) and the
+back-test metrics become one :func:`~app.engine.scoring.metric_matrix`, so
+scoring for any number of weight sets is one matrix product and picking
+the best ranges is an argsort.  Only the few picked rows are materialised
+as candidate dicts (:meth:`CandidateTable.row`) for the response.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from app.engine.scoring import metric_matrix
+from app.schemas import BacktestMetrics
+
+
+def _requested_width_pct(label: str) -> float | None:
+    """Width an ``extreme_<w>pct`` candidate was generated with."""
+    if label.startswith("extreme_") and label.endswith("pct"):
+        try:
+            return float(label.replace("extreme_", "").replace("pct", ""))
+        except ValueError:
+            return None
+    return None
+
+
+class CandidateTable:
+    """Candidate ranges as columns; row *i* is one ``[pa, pb]`` range.
+
+    *positions* (exact math) holds one contract deposit dict per row.
+    :meth:`set_metrics` attaches the back-test results.
+    """
+
+    __slots__ = (
+        "strategy",
+        "pa",
+        "pb",
+        "tick_lower",
+        "tick_upper",
+        "width_pct",
+        "positions",
+        "metrics",
+        "values",
+    )
+
+    def __init__(
+        self,
+        strategy: list[str],
+        pa: np.ndarray,
+        pb: np.ndarray,
+        tick_lower: np.ndarray,
+        tick_upper: np.ndarray,
+        current_price: float,
+        positions: list[dict] | None = None,
+    ) -> None:
+        self.strategy = list(strategy)
+        self.pa = np.asarray(pa, dtype=np.float64)
+        self.pb = np.asarray(pb, dtype=np.float64)
+        self.tick_lower = np.asarray(tick_lower, dtype=np.int64)
+        self.tick_upper = np.asarray(tick_upper, dtype=np.int64)
+        self.width_pct = np.round((self.pb - self.pa) / current_price * 100.0, 4)
+        self.positions = positions
+        self.metrics: list[BacktestMetrics] | None = None
+        self.values: np.ndarray | None = None  # metric_matrix(metrics)
+
+    def __len__(self) -> int:
+        return len(self.strategy)
+
+    @property
+    def ranges(self) -> np.ndarray:
+        """``(n, 2)`` array of ``[pa, pb]`` rows."""
+        return np.column_stack([self.pa, self.pb])
+
+    @property
+    def extreme(self) -> np.ndarray:
+        """Boolean mask of the fixed-width ``extreme_*`` rows."""
+        return np.array([label.startswith("extreme_") for label in self.strategy], dtype=bool)
+
+    def set_metrics(self, metrics: list[BacktestMetrics]) -> None:
+        if len(metrics) != len(self):
+            raise ValueError("need one BacktestMetrics per candidate")
+        self.metrics = list(metrics)
+        self.values = metric_matrix(self.metrics)
+
+    def row(self, i: int) -> dict:
+        """Candidate dict of row *i* (the fields of ``CandidateResult`` known so far)."""
+        label = self.strategy[i]
+        cand = {
+            "strategy": label,
+            "pa": float(self.pa[i]),
+            "pb": float(self.pb[i]),
+            "tick_lower": int(self.tick_lower[i]),
+            "tick_upper": int(self.tick_upper[i]),
+            "width_pct": float(self.width_pct[i]),
+            "requested_width_pct": _requested_width_pct(label),
+        }
+        if self.metrics is not None:
+            cand["metrics"] = self.metrics[i]
+        if self.positions is not None:
+            cand["position"] = self.positions[i]
+        return cand
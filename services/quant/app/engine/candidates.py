@@ -1,24 +1,42 @@
 """Range candidate generation strategies for CLMM positions."""
 
+from typing import Sequence
+
 import numpy as np
 
+from app.engine.price_index import SortedPrices
+from app.engine.rolling import rolling_max, rolling_min
+
+# Default (low, high) percentile pairs of the quantile strategy
+QUANTILE_PAIRS = ((5, 95), (10, 90), (25, 75))
+
 
-def generate_quantile_ranges(closes: np.ndarray) -> list[tuple[float, float, str]]:
+def generate_quantile_ranges(
+    closes: np.ndarray,
+    pairs: Sequence[tuple[float, float]] = QUANTILE_PAIRS,
+    *,
+    index: SortedPrices | None = None,
+) -> list[tuple[float, float, str]]:
     """Generate candidate ranges based on historical price percentiles.
 
-    Creates three ranges using (P5,P95), (P10,P90), and (P25,P75) quantile
-    pairs of the close price series.
+    Creates one range per (low, high) percentile pair of the close price
+    series, by default (P5,P95), (P10,P90) and (P25,P75).  All percentiles
+    come from one ``np.percentile`` call, or are read off *index* (a
+    :class:`SortedPrices` of *closes*) without any partitioning.
     """
-    if len(closes) == 0:
+    if len(closes) == 0 or not pairs:
         return []
+    q = np.ravel(pairs)
+    if index is not None:
+        values = index.percentiles(q).tolist()
+    else:
+        values = np.percentile(closes, q).tolist()
     ranges: list[tuple[float, float, str]] = []
-    for lo_q, hi_q in [(5, 95), (10, 90), (25, 75)]:
-        pa = float(np.percentile(closes, lo_q))
-        pb = float(np.percentile(closes, hi_q))
+    for (lo_q, hi_q), pa, pb in zip(pairs, values[::2], values[1::2]):
         if pa >= pb:
             # Degenerate case -- skip
             continue
-        ranges.append((pa, pb, f"quantile_P{lo_q}_P{hi_q}"))
+        ranges.append((pa, pb, f"quantile_P{lo_q:g}_P{hi_q:g}"))
     return ranges
 
 
@@ -50,7 +68,8 @@ def generate_volband_ranges(
 def generate_swing_ranges(closes: np.ndarray) -> list[tuple[float, float, str]]:
     """Generate ranges based on local min/max swing points.
 
-    Scans the close price series for local extrema using a rolling window,
+    Scans the close price series for local extrema using a centred rolling
+    window of ``len(closes) // 20`` bars on each side (at least 5),
     then constructs a *recent* range (median of last few swings) and a *full*
     range (absolute min/max of all detected swings).
     """
@@ -60,15 +79,12 @@ def generate_swing_ranges(closes: np.ndarray) -> list[tuple[float, float, str]]:
     window = max(5, len(closes) // 20)
     ranges: list[tuple[float, float, str]] = []
 
-    # Detect local minima and maxima
-    local_mins: list[float] = []
-    local_maxs: list[float] = []
-    for i in range(window, len(closes) - window):
-        segment = closes[i - window : i + window + 1]
-        if closes[i] == float(np.min(segment)):
-            local_mins.append(float(closes[i]))
-        if closes[i] == float(np.max(segment)):
-            local_maxs.append(float(closes[i]))
+    # Detect local minima and maxima: closes[i] is a swing point when it
+    # equals the extremum of the centred window closes[i-window : i+window+1].
+    # The rolling extrema cost O(n) regardless of the window size.
+    centre = closes[window : len(closes) - window]
+    local_mins: list[float] = centre[centre == rolling_min(closes, 2 * window + 1)].tolist()
+    local_maxs: list[float] = centre[centre == rolling_max(closes, 2 * window + 1)].tolist()
 
     # Recent swings -- tight range
     if local_mins and local_maxs:
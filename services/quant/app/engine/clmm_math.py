@@ -0,0 +1,331 @@
+"""Contract-exact Cetus CLMM math on Q64.64 fixed-point integers.
+
+Mirrors ``cetus_clmm::tick_math`` and ``cetus_clmm::clmm_math``: sqrt
+prices are u128 Q64.64 values (``sqrt(price) * 2**64``), liquidity is a
+u128 and token amounts are u64 in the tokens' smallest units.  Results
+are Python ints and match the contract's rounding exactly, unlike the
+float helpers in :mod:`app.engine.tick_math` whose ``1.0001 ** tick``
+drifts at extreme ticks and for tiny prices.
+
+Q64.64 values do not fit in uint64, so batched functions work on NumPy
+object arrays of Python ints: the arithmetic helpers (``get_delta_a`` ...)
+accept ints or object arrays alike, and :func:`get_sqrt_prices_at_ticks`
+runs the contract's bit-table algorithm over a whole tick array at once,
+with a memoized per-spacing table (:func:`sqrt_price_table`) on top.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from app.engine.tick_math import MAX_TICK, MIN_TICK, align_tick_down, align_tick_up
+
+Q64 = 1 << 64
+MIN_SQRT_PRICE_X64 = 4295048016
+MAX_SQRT_PRICE_X64 = 79226673515401279992447579055
+
+# get_sqrt_price_at_tick: bit i of |tick| multiplies the ratio by
+# 1.0001 ** (-2**i / 2) as Q64.64 (negative ticks) or 1.0001 ** (2**i / 2)
+# as Q96.96 (positive ticks), exactly as the contract's constants.
+_NEGATIVE_RATIOS = (
+    18445821805675392311,
+    18444899583751176498,
+    18443055278223354162,
+    18439367220385604838,
+    18431993317065449817,
+    18417254355718160513,
+    18387811781193591352,
+    18329067761203520168,
+    18212142134806087854,
+    17980523815641551639,
+    17526086738831147013,
+    16651378430235024244,
+    15030750278693429944,
+    12247334978882834399,
+    8131365268884726200,
+    3584323654723342297,
+    696457651847595233,
+    26294789957452057,
+    37481735321082,
+)
+_POSITIVE_RATIOS = (
+    79232123823359799118286999567,
+    79236085330515764027303304731,
+    79244008939048815603706035061,
+    79259858533276714757314932305,
+    79291567232598584799939703904,
+    79355022692464371645785046466,
+    79482085999252804386437311141,
+    79736823300114093921829183326,
+    80248749790819932309965073892,
+    81282483887344747381513967011,
+    83390072131320151908154831281,
+    87770609709833776024991924138,
+    97234110755111693312479820773,
+    119332217159966728226237229890,
+    179736315981702064433883588727,
+    407748233172238350107850275304,
+    2098478828474011932436660412517,
+    55581415166113811149459800483533,
+    38992368544603139932233054999993551,
+)
+_Q96 = 1 << 96
+
+_LOG_SQRT_BASE = math.log(1.0001) / 2
+
+
+def _check_ticks(ticks: np.ndarray) -> None:
+    if np.any((ticks < MIN_TICK) | (ticks > MAX_TICK)):
+        raise ValueError(f"tick out of bounds [{MIN_TICK}, {MAX_TICK}]")
+
+
+def get_sqrt_price_at_tick(tick: int) -> int:
+    """Q64.64 sqrt price of *tick* (``tick_math::get_sqrt_price_at_tick``)."""
+    if not MIN_TICK <= tick <= MAX_TICK:
+        raise ValueError(f"tick out of bounds [{MIN_TICK}, {MAX_TICK}]")
+    abs_tick = abs(tick)
+    if tick < 0:
+        ratio = _NEGATIVE_RATIOS[0] if abs_tick & 1 else Q64
+        for bit, factor in enumerate(_NEGATIVE_RATIOS[1:], start=1):
+            if abs_tick >> bit & 1:
+                ratio = ratio * factor >> 64
+        return ratio
+    ratio = _POSITIVE_RATIOS[0] if abs_tick & 1 else _Q96
+    for bit, factor in enumerate(_POSITIVE_RATIOS[1:], start=1):
+        if abs_tick >> bit & 1:
+            ratio = ratio * factor >> 96
+    return ratio >> 32
+
+
+def get_sqrt_prices_at_ticks(ticks: np.ndarray) -> np.ndarray:
+    """Vectorised :func:`get_sqrt_price_at_tick` (object array of ints)."""
+    ticks = np.asarray(ticks, dtype=np.int64)
+    _check_ticks(ticks)
+    abs_tick = np.abs(ticks)
+    out = np.empty(ticks.shape, dtype=object)
+    for negative, ratios, one, shift in (
+        (True, _NEGATIVE_RATIOS, Q64, 64),
+        (False, _POSITIVE_RATIOS, _Q96, 96),
+    ):
+        rows = (ticks < 0) if negative else (ticks >= 0)
+        if not rows.any():
+            continue
+        bits = abs_tick[rows]
+        ratio = np.full(bits.shape, one, dtype=object)
+        ratio[(bits & 1).astype(bool)] = ratios[0]
+        for bit, factor in enumerate(ratios[1:], start=1):
+            hit = (bits >> bit & 1).astype(bool)
+            if hit.any():
+                ratio[hit] = ratio[hit] * factor >> shift
+        out[rows] = ratio if negative else ratio >> 32
+    return out
+
+
+@lru_cache(maxsize=32)
+def sqrt_price_table(spacing: int) -> tuple[int, np.ndarray]:
+    """``(first_tick, sqrt_prices)`` for every multiple of *spacing* in bounds.
+
+    ``sqrt_prices[i] == get_sqrt_price_at_tick(first_tick + i * spacing)``;
+    the (memoized, read-only) object array backs :func:`sqrt_prices_at_aligned`.
+    """
+    if spacing <= 0:
+        raise ValueError("spacing must be positive")
+    first = -(MIN_TICK // -spacing) * spacing  # first multiple >= MIN_TICK
+    sqrt_prices = get_sqrt_prices_at_ticks(np.arange(first, MAX_TICK + 1, spacing))
+    sqrt_prices.flags.writeable = False
+    return first, sqrt_prices
+
+
+def sqrt_prices_at_aligned(ticks: np.ndarray, spacing: int) -> np.ndarray:
+    """Q64.64 sqrt prices of ticks that are multiples of *spacing*, by table lookup."""
+    ticks = np.asarray(ticks, dtype=np.int64)
+    _check_ticks(ticks)
+    if np.any(ticks % spacing):
+        raise ValueError("ticks must be multiples of spacing")
+    first, sqrt_prices = sqrt_price_table(spacing)
+    return sqrt_prices[(ticks - first) // spacing]
+
+
+def get_tick_at_sqrt_price(sqrt_price: int) -> int:
+    """Largest tick whose sqrt price is <= *sqrt_price* (``get_tick_at_sqrt_price``)."""
+    if not MIN_SQRT_PRICE_X64 <= sqrt_price <= MAX_SQRT_PRICE_X64:
+        raise ValueError("sqrt_price out of bounds")
+    # The float estimate is within a tick or two; settle it exactly.
+    estimate = math.floor(
+        (math.log(sqrt_price) - 64 * math.log(2)) / _LOG_SQRT_BASE
+    )
+    tick = min(max(estimate, MIN_TICK), MAX_TICK)
+    while tick > MIN_TICK and get_sqrt_price_at_tick(tick) > sqrt_price:
+        tick -= 1
+    while tick < MAX_TICK and get_sqrt_price_at_tick(tick + 1) <= sqrt_price:
+        tick += 1
+    return tick
+
+
+def price_to_sqrt_price(price: float) -> int:
+    """``floor(sqrt(price) * 2**64)`` computed exactly from the float *price*."""
+    if not price > 0:
+        raise ValueError("price must be positive")
+    numerator, denominator = price.as_integer_ratio()
+    # floor(sqrt(floor(x))) == floor(sqrt(x)) for x >= 0
+    return math.isqrt((numerator << 128) // denominator)
+
+
+def sqrt_price_to_price(sqrt_price: int) -> float:
+    """Price of a Q64.64 sqrt price, correctly rounded to float."""
+    return sqrt_price * sqrt_price / (1 << 128)
+
+
+def align_range_exact(pa: float, pb: float, spacing: int) -> tuple[int, int]:
+    """Contract-exact :func:`~app.engine.tick_math.align_range`.
+
+    Prices are in the pool's raw units (token B per token A in smallest
+    units).  Bounds beyond the tick range are clamped to the outermost
+    aligned ticks.
+    """
+    lowest = align_tick_up(MIN_TICK, spacing)
+    highest = align_tick_down(MAX_TICK, spacing)
+
+    def tick_of(price: float) -> int:
+        sqrt_price = min(max(price_to_sqrt_price(price), MIN_SQRT_PRICE_X64), MAX_SQRT_PRICE_X64)
+        return get_tick_at_sqrt_price(sqrt_price)
+
+    tick_lower = max(align_tick_down(tick_of(pa), spacing), lowest)
+    tick_upper = min(align_tick_up(tick_of(pb), spacing), highest)
+    if tick_lower >= tick_upper:
+        # Sqrt prices strictly increase with the tick, so only an empty
+        # range collapses; widen it by one spacing, upwards if possible.
+        if tick_lower + spacing <= highest:
+            tick_upper = tick_lower + spacing
+        else:
+            tick_lower, tick_upper = highest - spacing, highest
+    return tick_lower, tick_upper
+
+
+# ---------------------------------------------------------------------------
+# Liquidity / amounts (``clmm_math``)
+# ---------------------------------------------------------------------------
+# Each takes ints or object arrays of ints, with sqrt_price_lower <=
+# sqrt_price_upper, and rounds like the contract.
+
+
+def _sqrt_prices_of(tick_lower: int, tick_upper: int) -> tuple[int, int]:
+    return get_sqrt_price_at_tick(tick_lower), get_sqrt_price_at_tick(tick_upper)
+
+
+def _div_round(numerator, denominator, round_up: bool):
+    quotient = numerator // denominator
+    if round_up:
+        quotient = quotient + (numerator % denominator != 0)
+    return quotient
+
+
+def get_delta_a(sqrt_price_lower, sqrt_price_upper, liquidity, round_up: bool):
+    """Token A for *liquidity* between two sqrt prices (``clmm_math::get_delta_a``)."""
+    numerator = (liquidity * (sqrt_price_upper - sqrt_price_lower)) << 64
+    return _div_round(numerator, sqrt_price_lower * sqrt_price_upper, round_up)
+
+
+def get_delta_b(sqrt_price_lower, sqrt_price_upper, liquidity, round_up: bool):
+    """Token B for *liquidity* between two sqrt prices (``clmm_math::get_delta_b``)."""
+    return _div_round(liquidity * (sqrt_price_upper - sqrt_price_lower), Q64, round_up)
+
+
+def get_liquidity_from_a(sqrt_price_lower, sqrt_price_upper, amount_a, round_up: bool):
+    """Liquidity that *amount_a* of token A provides between two sqrt prices."""
+    numerator = sqrt_price_lower * sqrt_price_upper * amount_a
+    return _div_round(numerator, (sqrt_price_upper - sqrt_price_lower) << 64, round_up)
+
+
+def get_liquidity_from_b(sqrt_price_lower, sqrt_price_upper, amount_b, round_up: bool):
+    """Liquidity that *amount_b* of token B provides between two sqrt prices."""
+    return _div_round(amount_b << 64, sqrt_price_upper - sqrt_price_lower, round_up)
+
+
+def get_amount_by_liquidity(
+    tick_lower: int,
+    tick_upper: int,
+    current_tick: int,
+    current_sqrt_price: int,
+    liquidity: int,
+    round_up: bool,
+    sqrt_prices: tuple[int, int] | None = None,
+) -> tuple[int, int]:
+    """(amount_a, amount_b) backing *liquidity* at the current pool price.
+
+    *sqrt_prices* are the two ticks' sqrt prices if the caller already has
+    them (e.g. from :func:`sqrt_prices_at_aligned`).
+    """
+    sqrt_lower, sqrt_upper = sqrt_prices or _sqrt_prices_of(tick_lower, tick_upper)
+    if current_tick < tick_lower:
+        return get_delta_a(sqrt_lower, sqrt_upper, liquidity, round_up), 0
+    if current_tick < tick_upper:
+        return (
+            get_delta_a(current_sqrt_price, sqrt_upper, liquidity, round_up),
+            get_delta_b(sqrt_lower, current_sqrt_price, liquidity, round_up),
+        )
+    return 0, get_delta_b(sqrt_lower, sqrt_upper, liquidity, round_up)
+
+
+def get_liquidity_from_amount(
+    tick_lower: int,
+    tick_upper: int,
+    current_tick: int,
+    current_sqrt_price: int,
+    amount: int,
+    is_fixed_a: bool,
+) -> tuple[int, int, int]:
+    """(liquidity, amount_a, amount_b) for a fixed amount of one token.
+
+    ``clmm_math::get_liquidity_from_amount``: the other token's amount is
+    what the contract would take, rounded up.
+    """
+    sqrt_lower = get_sqrt_price_at_tick(tick_lower)
+    sqrt_upper = get_sqrt_price_at_tick(tick_upper)
+    if is_fixed_a:
+        if current_tick >= tick_upper:
+            raise ValueError("range is below the current price; token A cannot be deposited")
+        if current_tick < tick_lower:
+            return get_liquidity_from_a(sqrt_lower, sqrt_upper, amount, False), amount, 0
+        liquidity = get_liquidity_from_a(current_sqrt_price, sqrt_upper, amount, False)
+        return liquidity, amount, get_delta_b(sqrt_lower, current_sqrt_price, liquidity, True)
+    if current_tick < tick_lower:
+        raise ValueError("range is above the current price; token B cannot be deposited")
+    if current_tick >= tick_upper:
+        return get_liquidity_from_b(sqrt_lower, sqrt_upper, amount, False), 0, amount
+    liquidity = get_liquidity_from_b(sqrt_lower, current_sqrt_price, amount, False)
+    return liquidity, get_delta_a(current_sqrt_price, sqrt_upper, liquidity, True), amount
+
+
+def get_liquidity_from_value(
+    value_b: int,
+    tick_lower: int,
+    tick_upper: int,
+    current_tick: int,
+    current_sqrt_price: int,
+    sqrt_prices: tuple[int, int] | None = None,
+) -> int:
+    """Largest liquidity whose position is worth at most *value_b* in token B.
+
+    The value of ``L`` is ``amount_a * price + amount_b`` with unrounded
+    amounts, so the deposit the contract takes (amounts rounded up) can
+    exceed *value_b* by a unit of each token.  *sqrt_prices* is as for
+    :func:`get_amount_by_liquidity`.
+    """
+    sqrt_lower, sqrt_upper = sqrt_prices or _sqrt_prices_of(tick_lower, tick_upper)
+    sqrt_price = current_sqrt_price
+    if current_tick < tick_lower:
+        # All token A: value = L * (su - sl) * sp**2 / (sl * su * 2**64)
+        numerator = value_b * sqrt_lower * sqrt_upper << 64
+        return numerator // ((sqrt_upper - sqrt_lower) * sqrt_price * sqrt_price)
+    if current_tick < tick_upper:
+        # value = L * ((su - sp) * sp / su + sp - sl) / 2**64
+        numerator = value_b * sqrt_upper << 64
+        denominator = (
+            (sqrt_upper - sqrt_price) * sqrt_price + (sqrt_price - sqrt_lower) * sqrt_upper
+        )
+        return numerator // denominator
+    return (value_b << 64) // (sqrt_upper - sqrt_lower)
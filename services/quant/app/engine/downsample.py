@@ -0,0 +1,47 @@
+"""Shape-preserving downsampling of chart series to a point budget."""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+
+
+def minmax_index(
+    values: np.ndarray,
+    max_points: int,
+    keep: Iterable[int] = (),
+) -> np.ndarray | None:
+    """Indices of a min/max-bucketed subsample of *values*.
+
+    *values* is split into equal buckets and the positions of each bucket's
+    minimum and maximum are kept, together with the first and last point and
+    every index in *keep* (e.g. marker bars).  Returns the sorted indices,
+    at most *max_points* of them as long as *keep* leaves room for one
+    bucket, or ``None`` when *values* already fits the budget.
+
+    Selecting by the price series also keeps each bucket's extremes of the
+    series that are monotone in price (LP value, HODL value) and its worst
+    IL (IL is quasi-concave in price), so one index can be shared by all of
+    them.
+    """
+    n = len(values)
+    if n <= max_points:
+        return None
+
+    keep = np.unique(np.fromiter(keep, dtype=np.intp))
+    buckets = max(1, (max_points - 2 - len(keep)) // 2)
+    size = -(-n // buckets)  # ceil
+
+    # Pad to a (buckets, size) grid; padding never wins argmin / argmax.
+    padded = np.empty(buckets * size, dtype=np.float64)
+    padded[:n] = values
+    padded[n:] = np.inf
+    lows = np.argmin(padded.reshape(buckets, size), axis=1)
+    padded[n:] = -np.inf
+    highs = np.argmax(padded.reshape(buckets, size), axis=1)
+
+    offsets = size * np.arange(buckets)
+    index = np.concatenate([[0, n - 1], offsets + lows, offsets + highs, keep])
+    index = np.unique(index)
+    return index[index < n]
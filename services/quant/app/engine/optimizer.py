@@ -0,0 +1,120 @@
+"""Grid-search range optimizer over the tick-spacing lattice.
+
+Every (tick_lower, tick_upper) pair around the current price is scored on
+two proxies -- in-range time and width -- without back-testing it.  In-range
+time comes from a cumulative histogram of the sorted closes: the number of
+closes inside [pa, pb] is ``count(<= pb) - count(< pa)``, so the full
+lower x upper grid is one outer subtraction of two ``searchsorted`` results.
+
+Only a handful of points on the Pareto front of (in-range time up, width
+down) are returned; the caller back-tests and scores those like any other
+candidate.
+"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from app.engine.price_index import SortedPrices
+from app.engine.tick_math import align_tick_down, price_to_tick, tick_to_price_array
+
+# Upper bound on lattice steps per side; wider searches coarsen the step to a
+# multiple of the tick spacing so the grid stays below ~400 x 400 pairs.
+_MAX_LATTICE_STEPS = 400
+
+# In-range coverage levels picked off the Pareto front (narrowest range
+# reaching each level); the widest front point is always picked as well.
+COVERAGE_LEVELS = (50, 65, 80, 90, 95)
+
+
+def _lattice(
+    current_price: float, tick_spacing: int, max_distance_pct: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return (lower ticks, upper ticks) bracketing the current price."""
+    base = align_tick_down(price_to_tick(current_price), tick_spacing)
+    half_ticks = math.log(1.0 + max_distance_pct / 100.0) / math.log(1.0001)
+    steps = max(1, math.ceil(half_ticks / tick_spacing))
+    step = tick_spacing * math.ceil(steps / _MAX_LATTICE_STEPS)
+    steps = math.ceil(steps * tick_spacing / step)
+
+    offsets = step * np.arange(steps + 1)
+    return base - offsets, base + tick_spacing + offsets
+
+
+def range_coverage(
+    sorted_closes: np.ndarray, pa: np.ndarray, pb: np.ndarray
+) -> np.ndarray:
+    """Number of closes inside [pa[i], pb[j]] for every (i, j) pair.
+
+    *sorted_closes* must be sorted ascending.  Returns a ``(len(pa),
+    len(pb))`` int array (negative where pa > pb).
+    """
+    below = np.searchsorted(sorted_closes, pa, side="left")
+    up_to = np.searchsorted(sorted_closes, pb, side="right")
+    return up_to[np.newaxis, :] - below[:, np.newaxis]
+
+
+def pareto_front(coverage: np.ndarray, width: np.ndarray) -> np.ndarray:
+    """Flat indices of the (max coverage, min width) Pareto front.
+
+    Sorted by increasing width, each point strictly improves coverage on
+    the previous one.
+    """
+    coverage = coverage.ravel()
+    order = np.lexsort((-coverage, width.ravel()))
+    ordered = coverage[order]
+    best_before = np.maximum.accumulate(ordered)
+    improves = np.empty(len(ordered), dtype=bool)
+    improves[0] = True
+    improves[1:] = ordered[1:] > best_before[:-1]
+    return order[improves]
+
+
+def optimize_tick_ranges(
+    closes: np.ndarray,
+    current_price: float,
+    tick_spacing: int,
+    max_distance_pct: float = 30.0,
+    *,
+    index: SortedPrices | None = None,
+) -> list[tuple[int, int, str]]:
+    """Search the tick lattice for ranges containing *current_price*.
+
+    Considers every lattice pair with ``tick_lower <= current tick <
+    tick_upper`` whose bounds lie within ``max_distance_pct`` of the current
+    price, and returns ``(tick_lower, tick_upper, label)`` for the narrowest
+    pair on the Pareto front reaching each of :data:`COVERAGE_LEVELS`, plus
+    the pair with the highest coverage (``optimizer_max``).  Returns ``[]`` if no
+    close falls inside the lattice.  Pass the request's :class:`SortedPrices`
+    of *closes* as *index* to reuse its sort.
+    """
+    if len(closes) == 0 or current_price <= 0 or tick_spacing <= 0:
+        return []
+
+    lower_ticks, upper_ticks = _lattice(current_price, tick_spacing, max_distance_pct)
+    pa = tick_to_price_array(lower_ticks, tick_spacing)
+    pb = tick_to_price_array(upper_ticks, tick_spacing)
+
+    sorted_closes = index.values if index is not None else np.sort(closes)
+    coverage = range_coverage(sorted_closes, pa, pb)
+    width = upper_ticks[np.newaxis, :] - lower_ticks[:, np.newaxis]
+    front = pareto_front(coverage, width)
+    front_pct = coverage.ravel()[front] / len(closes) * 100.0
+    if front_pct[-1] == 0:
+        return []
+
+    labelled: dict[int, str] = {}
+    for level in COVERAGE_LEVELS:
+        reached = np.flatnonzero(front_pct >= level)
+        if len(reached) == 0:
+            break
+        labelled.setdefault(int(front[reached[0]]), f"optimizer_cov{level}")
+    labelled.setdefault(int(front[-1]), "optimizer_max")
+
+    picks: list[tuple[int, int, str]] = []
+    for flat, label in labelled.items():
+        i, j = divmod(flat, len(upper_ticks))
+        picks.append((int(lower_ticks[i]), int(upper_ticks[j]), label))
+    return picks
@@ -0,0 +1,256 @@
+"""Rebalancing LP simulator: re-centre the range when a trigger fires.
+
+A position starts centred on ``closes[0]`` with a given width.  Whenever
+its trigger fires it is closed at the current close, a rebalance cost is
+deducted, and a new position of the same width is opened around that
+close (snapped outwards to ``tick_spacing``).  Triggers:
+
+* exit -- the close leaves ``[pa, pb]``;
+* buffer -- the close comes within ``buffer_pct`` of the range width of
+  either bound (``buffer_pct=0`` is the exit trigger);
+* interval -- ``interval_bars`` bars have passed since the last rebalance.
+
+The simulator is event-driven: it never steps bar by bar.  Sparse tables of
+the closes' min / max over power-of-two spans answer "first bar after *i*
+outside [lo, hi]" in O(log n) by binary lifting, and all configurations
+advance together, one rebalance per round, as NumPy vectors.  The CL math
+repeats :func:`~app.engine.backtest._compute_liquidity` and
+:func:`~app.engine.backtest._lp_value` element-wise with the same float
+expressions, so every configuration matches a scalar bar-by-bar loop.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from app.engine.backtest import _lp_values
+from app.engine.tick_math import align_ranges, tick_to_price_array
+
+
+def _sparse_tables(closes: np.ndarray) -> tuple[list[np.ndarray], list[np.ndarray]]:
+    """``mins[k][i] = min(closes[i : i + 2**k])`` (and ``maxs``) for all k."""
+    mins, maxs = [closes], [closes]
+    span = 1
+    while 2 * span <= len(closes):
+        mins.append(np.minimum(mins[-1][:-span], mins[-1][span:]))
+        maxs.append(np.maximum(maxs[-1][:-span], maxs[-1][span:]))
+        span *= 2
+    return mins, maxs
+
+
+def _next_events(
+    mins: list[np.ndarray],
+    maxs: list[np.ndarray],
+    start: np.ndarray,
+    lo: np.ndarray,
+    hi: np.ndarray,
+    limit: np.ndarray,
+) -> np.ndarray:
+    """First bar in ``[start, limit)`` with a close outside ``[lo, hi]``.
+
+    Returns *limit* where there is none.  Binary lifting: the largest spans
+    that stay inside the band are skipped, from the widest level down.
+    """
+    pos = start.copy()
+    # Levels wider than the longest search window can never be taken.
+    widest = int(np.max(limit - start, initial=0)).bit_length() - 1
+    for k in range(min(widest, len(mins) - 1), -1, -1):
+        span = 1 << k
+        fits = pos + span <= limit
+        idx = np.where(fits, pos, 0)
+        inside = (mins[k][idx] >= lo) & (maxs[k][idx] <= hi)
+        pos += span * (fits & inside)
+    return pos
+
+
+def _liquidity(capital: np.ndarray, p0: np.ndarray, pa: np.ndarray, pb: np.ndarray) -> np.ndarray:
+    """Element-wise :func:`~app.engine.backtest._compute_liquidity`."""
+    sqrt_p0 = np.sqrt(p0)
+    denominator = (sqrt_p0 - np.sqrt(pa)) + p0 * (1.0 / sqrt_p0 - 1.0 / np.sqrt(pb))
+    return capital / np.where(denominator <= 0, 1e-18, denominator)
+
+
+def _value(L: np.ndarray, price: np.ndarray, pa: np.ndarray, pb: np.ndarray) -> np.ndarray:
+    """Element-wise :func:`~app.engine.backtest._lp_value`."""
+    sqrt_pa = np.sqrt(pa)
+    sqrt_pb = np.sqrt(pb)
+    sqrt_p = np.sqrt(price)
+    inside = (L * (1.0 / sqrt_p - 1.0 / sqrt_pb)) * price + L * (sqrt_p - sqrt_pa)
+    below = (L * (1.0 / sqrt_pa - 1.0 / sqrt_pb)) * price
+    above = L * (sqrt_pb - sqrt_pa)
+    return np.where(price <= pa, below, np.where(price >= pb, above, inside))
+
+
+def _centred(
+    prices: np.ndarray, width_pct: np.ndarray, tick_spacing: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Ranges of *width_pct* centred on *prices*, snapped outwards to ticks."""
+    half = width_pct / 100 / 2
+    tick_lower, tick_upper = align_ranges(prices * (1 - half), prices * (1 + half), tick_spacing)
+    return (
+        tick_to_price_array(tick_lower, tick_spacing),
+        tick_to_price_array(tick_upper, tick_spacing),
+    )
+
+
+def _trigger_band(
+    pa: np.ndarray, pb: np.ndarray, buffer_pct: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Prices outside ``[lo, hi]`` fire the exit / buffer trigger."""
+    margin = (pb - pa) * (buffer_pct / 100)
+    off = np.isnan(buffer_pct)
+    return np.where(off, -np.inf, pa + margin), np.where(off, np.inf, pb - margin)
+
+
+def simulate_rebalancing(
+    closes: np.ndarray,
+    width_pct: np.ndarray,
+    buffer_pct: np.ndarray | float = 0.0,
+    interval_bars: np.ndarray | int = 0,
+    *,
+    capital: float,
+    tick_spacing: int,
+    cost_usd: float = 0.0,
+    cost_pct: float = 0.0,
+    record_events: bool = False,
+) -> dict[str, Any]:
+    """Simulate one rebalancing configuration per element of *width_pct*.
+
+    Parameters
+    ----------
+    closes : close prices; the first position opens at ``closes[0]``
+    width_pct : range width as a percentage of the entry price
+    buffer_pct : exit / buffer trigger: rebalance once the close is within
+        this percentage of the range width of a bound (0 = on exit, NaN =
+        no price trigger, for interval-only configurations)
+    interval_bars : also rebalance this many bars after the previous
+        rebalance (0 = never)
+    capital : initial capital in USD
+    tick_spacing : new ranges are snapped outwards to this tick spacing
+    cost_usd, cost_pct : cost of one rebalance, fixed plus a percentage of
+        the position value (gas, swap fees, slippage)
+    record_events : also return each configuration's segments as
+        ``(bar, L, pa, pb)`` tuples (for :func:`rebalance_curve`); a
+        close-out is a final segment with ``L = 0``
+
+    Returns
+    -------
+    dict of per-configuration arrays: ``rebalances``, ``total_cost``,
+    ``final_value``, ``net_pnl``, ``lp_vs_hodl_pct``, and ``segments`` when
+    *record_events* is set.  A position whose value no longer covers the
+    cost is closed and stays at zero.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    n = len(closes)
+    if n == 0:
+        raise ValueError("closes array is empty")
+    width_pct = np.asarray(width_pct, dtype=np.float64).ravel()
+    if np.any((width_pct <= 0) | (width_pct >= 200)):
+        raise ValueError("width_pct must be in (0, 200)")
+    c = len(width_pct)
+    buffer_pct = np.broadcast_to(np.asarray(buffer_pct, dtype=np.float64), (c,))
+    interval_bars = np.broadcast_to(np.asarray(interval_bars, dtype=np.intp), (c,))
+    mins, maxs = _sparse_tables(closes)
+
+    p0 = closes[0]
+    pa, pb = _centred(np.full(c, p0), width_pct, tick_spacing)
+    L = _liquidity(np.full(c, float(capital)), np.full(c, p0), pa, pb)
+    rebalances = np.zeros(c, dtype=np.intp)
+    total_cost = np.zeros(c)
+    final_value = np.zeros(c)
+    segments: list[list[tuple[int, float, float, float]]] = [
+        [(0, float(L[i]), float(pa[i]), float(pb[i]))] for i in range(c)
+    ] if record_events else []
+
+    active = np.arange(c)
+    last = np.zeros(c, dtype=np.intp)  # bar of the latest (re)open
+    while len(active):
+        lo, hi = _trigger_band(pa, pb, buffer_pct[active])
+        interval = interval_bars[active]
+        limit = np.where(interval > 0, np.minimum(last + interval, n), n)
+        event = _next_events(mins, maxs, last + 1, lo, hi, limit)
+
+        done = event >= n
+        final_value[active[done]] = _value(L[done], closes[-1], pa[done], pb[done])
+
+        keep = ~done
+        bar = event[keep]
+        price = closes[bar]
+        value = _value(L[keep], price, pa[keep], pb[keep])
+        cost = cost_usd + value * (cost_pct / 100)
+        alive = value > cost
+        total_cost[active[keep][~alive]] += np.minimum(cost[~alive], value[~alive])
+        if record_events:
+            for row, closed_at in zip(active[keep][~alive].tolist(), bar[~alive].tolist()):
+                segments[row].append((closed_at, 0.0, 1.0, 2.0))
+
+        rows = active[keep][alive]
+        bar, price, value, cost = bar[alive], price[alive], value[alive], cost[alive]
+        rebalances[rows] += 1
+        total_cost[rows] += cost
+        pa, pb = _centred(price, width_pct[rows], tick_spacing)
+        L = _liquidity(value - cost, price, pa, pb)
+        if record_events:
+            for i, row in enumerate(rows.tolist()):
+                segments[row].append((int(bar[i]), float(L[i]), float(pa[i]), float(pb[i])))
+        active, last = rows, bar
+
+    final_hodl = (capital / 2.0) / p0 * closes[-1] + capital / 2.0
+    result: dict[str, Any] = {
+        "rebalances": rebalances,
+        "total_cost": total_cost,
+        "final_value": final_value,
+        "net_pnl": final_value - capital,
+        "lp_vs_hodl_pct": (final_value - final_hodl) / final_hodl * 100.0,
+    }
+    if record_events:
+        result["segments"] = segments
+    return result
+
+
+def rebalance_curve(
+    closes: np.ndarray,
+    width_pct: float,
+    buffer_pct: float = 0.0,
+    interval_bars: int = 0,
+    *,
+    capital: float,
+    tick_spacing: int,
+    cost_usd: float = 0.0,
+    cost_pct: float = 0.0,
+) -> dict[str, Any]:
+    """Per-bar LP value, HODL value and LP-vs-HODL % of one configuration.
+
+    The value at a rebalance bar is the new position's, i.e. after the
+    cost.  Also returns the rebalance bar indices as ``events`` (ending
+    with the close-out bar if costs exhausted the position).
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    sim = simulate_rebalancing(
+        closes,
+        [width_pct],
+        buffer_pct,
+        interval_bars,
+        capital=capital,
+        tick_spacing=tick_spacing,
+        cost_usd=cost_usd,
+        cost_pct=cost_pct,
+        record_events=True,
+    )
+    segments = sim["segments"][0]
+    lp_values = np.empty(len(closes))
+    bounds = [bar for bar, *_ in segments[1:]] + [len(closes)]
+    for (start, L, pa, pb), stop in zip(segments, bounds):
+        lp_values[start:stop] = _lp_values(L, closes[start:stop], pa, pb)
+
+    hodl_values = (capital / 2.0) / closes[0] * closes + capital / 2.0
+    return {
+        "lp_values": lp_values,
+        "hodl_values": hodl_values,
+        "lp_vs_hodl_pct": (lp_values - hodl_values) / hodl_values * 100.0,
+        "events": [bar for bar, *_ in segments[1:]],
+        "rebalances": int(sim["rebalances"][0]),
+        "final_value": float(sim["final_value"][0]),
+    }
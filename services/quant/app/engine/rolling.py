@@ -0,0 +1,42 @@
+"""Sliding-window extrema over NumPy arrays in O(n).
+
+Uses the van Herk / Gil-Werman scheme: the series is cut into blocks of the
+window size, prefix and suffix extrema are accumulated inside each block,
+and every window is the combination of one suffix and one prefix value.
+The cost is three array passes regardless of the window size.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def _rolling_extreme(values: np.ndarray, size: int, op: np.ufunc) -> np.ndarray:
+    values = np.asarray(values)
+    n = len(values)
+    if size <= 0:
+        raise ValueError("size must be positive")
+    if size > n:
+        return values[:0].copy()
+    if size == 1:
+        return values.copy()
+
+    # Pad to whole blocks; windows never read the padding (see module doc).
+    pad = (-n) % size
+    padded = np.concatenate([values, np.repeat(values[-1:], pad)]) if pad else values
+    blocks = padded.reshape(-1, size)
+    prefix = op.accumulate(blocks, axis=1).ravel()
+    suffix = op.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    m = n - size + 1
+    return op(suffix[:m], prefix[size - 1 : size - 1 + m])
+
+
+def rolling_min(values: np.ndarray, size: int) -> np.ndarray:
+    """Return ``out[j] = min(values[j : j + size])`` for every full window."""
+    return _rolling_extreme(values, size, np.minimum)
+
+
+def rolling_max(values: np.ndarray, size: int) -> np.ndarray:
+    """Return ``out[j] = max(values[j : j + size])`` for every full window."""
+    return _rolling_extreme(values, size, np.maximum)
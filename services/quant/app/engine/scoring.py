@@ -1,7 +1,17 @@
-"""Profile-weighted scoring and insight generation for LP range candidates."""
+"""Profile-weighted scoring and insight generation for LP range candidates.
+
+Scores are computed for any number of weight sets at once: the metric
+columns of all candidates are min-max normalized (and flipped where lower
+is better) into one matrix, and one matrix product with the stacked
+weight vectors gives every candidate's score under every weight set.
+"""
 
 from __future__ import annotations
 
+from typing import Mapping
+
+import numpy as np
+
 from app.schemas import BacktestMetrics
 
 
@@ -35,21 +45,102 @@ PROFILES: dict[str, dict[str, tuple[float, bool]]] = {
 }
 
 
+# Score matrix columns; every weight set weights a subset of them.
+SCORED_METRICS = (
+    "in_range_pct",
+    "lp_vs_hodl_pct",
+    "max_il_pct",
+    "max_drawdown_pct",
+    "touch_count",
+    "capital_efficiency",
+)
+
+# Direction of every scored metric (True: lower is better), as the
+# profiles above use it; user-supplied weight sets share it.
+INVERTED: dict[str, bool] = {
+    name: inverted for weights in PROFILES.values() for name, (_, inverted) in weights.items()
+}
+
+
 def _extract_metric(metrics: BacktestMetrics, name: str) -> float:
-    """Safely extract a metric value by name."""
+    """Safely extract a metric value by name.
+
+    ``lp_vs_hodl_pct`` resolves to ``net_vs_hodl_pct`` when fees were
+    simulated, so profiles rank on the fee-inclusive return.
+    """
+    if name == "lp_vs_hodl_pct" and metrics.net_vs_hodl_pct is not None:
+        return float(metrics.net_vs_hodl_pct)
     return float(getattr(metrics, name))
 
 
-def _normalize(values: list[float]) -> list[float]:
-    """Min-max normalize a list of values to [0, 100]."""
-    if not values:
-        return []
-    lo = min(values)
-    hi = max(values)
-    span = hi - lo
-    if span == 0:
-        return [50.0] * len(values)
-    return [(v - lo) / span * 100.0 for v in values]
+def metric_matrix(metrics: list[BacktestMetrics]) -> np.ndarray:
+    """``(n, len(SCORED_METRICS))`` matrix of the metrics scoring ranks on.
+
+    ``lp_vs_hodl_pct`` resolves as in :func:`_extract_metric`.
+    """
+    rows = [
+        (
+            m.in_range_pct,
+            m.lp_vs_hodl_pct if m.net_vs_hodl_pct is None else m.net_vs_hodl_pct,
+            m.max_il_pct,
+            m.max_drawdown_pct,
+            m.touch_count,
+            m.capital_efficiency,
+        )
+        for m in metrics
+    ]
+    return np.array(rows, dtype=np.float64).reshape(len(rows), len(SCORED_METRICS))
+
+
+def weight_matrix(weight_sets: Mapping[str, Mapping[str, tuple[float, bool]]]) -> np.ndarray:
+    """``(len(SCORED_METRICS), n_sets)`` weights, one column per weight set."""
+    weights = np.zeros((len(SCORED_METRICS), len(weight_sets)))
+    for j, weight_set in enumerate(weight_sets.values()):
+        for name, (w, _) in weight_set.items():
+            weights[SCORED_METRICS.index(name), j] = w
+    return weights
+
+
+def normalize_columns(values: np.ndarray, groups: np.ndarray | None = None) -> np.ndarray:
+    """Min-max normalize each column to [0, 100], separately within each group.
+
+    Columns that are constant within a group map to 50.  *groups* holds one
+    label per row; ``None`` normalizes all rows together.
+    """
+    normed = np.empty_like(values, dtype=np.float64)
+    labels = np.zeros(len(values), dtype=np.intp) if groups is None else np.asarray(groups)
+    for label in np.unique(labels):
+        rows = labels == label
+        block = values[rows]
+        lo = block.min(axis=0)
+        span = block.max(axis=0) - lo
+        flat = span == 0
+        normed[rows] = np.where(flat, 50.0, (block - lo) / np.where(flat, 1.0, span) * 100.0)
+    return normed
+
+
+def score_matrix(
+    values: np.ndarray,
+    weight_sets: Mapping[str, Mapping[str, tuple[float, bool]]],
+    groups: np.ndarray | None = None,
+) -> np.ndarray:
+    """``(n, n_sets)`` scores in [0, 100] (2 decimals) of every row under every weight set.
+
+    *values* is a :func:`metric_matrix`; rows are normalized against the
+    other rows of their group (see :func:`normalize_columns`).
+    """
+    normed = normalize_columns(values, groups)
+    inverted = np.array([INVERTED[name] for name in SCORED_METRICS])
+    normed[:, inverted] = 100.0 - normed[:, inverted]
+    return np.round(normed @ weight_matrix(weight_sets), 2)
+
+
+def annotate_candidate(cand: dict, score: float) -> dict:
+    """Set a candidate's ``score``, ``insight`` and ``insight_data`` (in place)."""
+    cand["score"] = score
+    cand["insight"] = _generate_insight(cand)
+    cand["insight_data"] = _generate_insight_data(cand)
+    return cand
 
 
 # ---------------------------------------------------------------------------
@@ -72,33 +163,10 @@ def score_candidates(
     if not candidates:
         return candidates
 
-    # Gather raw metric vectors for normalization
-    metric_names = list(weights.keys())
-    raw: dict[str, list[float]] = {m: [] for m in metric_names}
-    for cand in candidates:
-        metrics: BacktestMetrics = cand["metrics"]
-        for m in metric_names:
-            raw[m].append(_extract_metric(metrics, m))
-
-    # Normalize each metric
-    normed: dict[str, list[float]] = {}
-    for m in metric_names:
-        normed[m] = _normalize(raw[m])
-
-    # Compute composite score per candidate
-    for idx, cand in enumerate(candidates):
-        total = 0.0
-        for m, (w, inverted) in weights.items():
-            value = normed[m][idx]
-            if inverted:
-                value = 100.0 - value
-            total += w * value
-        cand["score"] = round(total, 2)
-
-    # Generate insights
-    for cand in candidates:
-        cand["insight"] = _generate_insight(cand)
-        cand["insight_data"] = _generate_insight_data(cand)
+    values = metric_matrix([cand["metrics"] for cand in candidates])
+    scores = score_matrix(values, {profile: weights})[:, 0]
+    for cand, score in zip(candidates, scores.tolist()):
+        annotate_candidate(cand, score)
 
     # Sort descending by score
     candidates.sort(key=lambda c: c["score"], reverse=True)
@@ -115,7 +183,7 @@ def _generate_insight(cand: dict) -> str:
     width_pct: float = cand.get("width_pct", 0.0)
     in_range = metrics.in_range_pct
     il = metrics.max_il_pct
-    lp_vs_hodl = metrics.lp_vs_hodl_pct
+    lp_vs_hodl = _extract_metric(metrics, "lp_vs_hodl_pct")
 
     parts: list[str] = []
 
@@ -161,13 +229,15 @@ def _generate_insight_data(cand: dict) -> dict:
     else:
         width_class = "wide"
 
+    lp_vs_hodl = _extract_metric(metrics, "lp_vs_hodl_pct")
+
     return {
         "width_class": width_class,
         "width_pct": round(width_pct, 1),
         "in_range_pct": round(metrics.in_range_pct, 0),
-        "lp_vs_hodl_pct": round(metrics.lp_vs_hodl_pct, 1),
-        "lp_outperforms": metrics.lp_vs_hodl_pct > 0,
-        "lp_underperforms_significant": metrics.lp_vs_hodl_pct < -5,
+        "lp_vs_hodl_pct": round(lp_vs_hodl, 1),
+        "lp_outperforms": lp_vs_hodl > 0,
+        "lp_underperforms_significant": lp_vs_hodl < -5,
         "max_il_pct": round(metrics.max_il_pct, 1),
         "il_warning": metrics.max_il_pct > 10,
     }
@@ -0,0 +1,260 @@
+"""Monte Carlo forward simulation of CL range positions.
+
+The back-test scores ranges on the single historical path.  This module
+instead simulates many forward price paths from the current price -- by
+block bootstrap of the historical log-returns or by a GBM calibrated on
+them -- and reports, per range, the probability of staying in range over
+the horizon, the expected time to exit and the IL distribution.
+
+Paths are drawn in fixed-size seed batches spawned from one
+``SeedSequence`` and generated ``_BLOCK_BARS`` bars at a time; each block is
+evaluated against all ranges (ranges x paths x bars cells, split over the
+ranges to stay within ``_MAX_BLOCK_CELLS``) and only the running min / max,
+out-of-range counts and last prices are carried to the next block, so
+memory does not grow with the horizon.  Seed batches can run on several
+threads (NumPy releases the GIL).  Results depend only on the seed, never
+on the cell budget or the number of workers.
+"""
+
+from __future__ import annotations
+
+import math
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Iterator
+
+import numpy as np
+
+from app.engine.backtest import (
+    _compute_liquidity,
+    _il_block,
+    _lp_block,
+    _normalize_ranges,
+)
+from app.schemas import ForecastMetrics
+
+# Upper bound on ranges x paths x bars cells evaluated at once (bool / float64).
+_MAX_BLOCK_CELLS = 4_000_000
+
+# Paths drawn from each spawned seed; the unit of work of a thread.
+_PATHS_PER_SEED = 64
+
+# Bars generated per block of a seed batch.  GBM draws are taken block by
+# block, so (unlike the cell budget) this is part of the seed -> paths map.
+_BLOCK_BARS = 2048
+
+METHODS = ("bootstrap", "gbm")
+
+
+def _log_returns(closes: np.ndarray) -> np.ndarray:
+    closes = np.asarray(closes, dtype=np.float64)
+    if len(closes) < 2:
+        raise ValueError("at least 2 closes are needed to calibrate the simulation")
+    return np.diff(np.log(closes))
+
+
+def _seed_batches(seed: int | None, n_paths: int) -> list[tuple[np.random.SeedSequence, int]]:
+    """Split *n_paths* into ``(seed, paths)`` batches of ``_PATHS_PER_SEED``."""
+    n_batches = -(-n_paths // _PATHS_PER_SEED)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    sizes = [_PATHS_PER_SEED] * (n_batches - 1) + [n_paths - _PATHS_PER_SEED * (n_batches - 1)]
+    return list(zip(seeds, sizes))
+
+
+def _path_blocks(
+    returns: np.ndarray,
+    p0: float,
+    seq: np.random.SeedSequence,
+    size: int,
+    horizon: int,
+    method: str,
+    block_size: int,
+) -> Iterator[np.ndarray]:
+    """Yield one seed batch's ``(size, horizon)`` price paths, ``_BLOCK_BARS`` bars at a time."""
+    rng = np.random.default_rng(seq)
+    if method == "bootstrap":
+        # Circular block bootstrap: consecutive runs of *block_size* historical
+        # returns keep their short-range autocorrelation and volatility clusters.
+        m = len(returns)
+        block = min(block_size, m)
+        starts = rng.integers(0, m, size=(size, -(-horizon // block)))
+    else:
+        mean, std = returns.mean(), returns.std()
+    log_price = np.zeros((size, 1))
+    for first in range(0, horizon, _BLOCK_BARS):
+        bars = np.arange(first, min(first + _BLOCK_BARS, horizon))
+        if method == "gbm":
+            steps = rng.normal(mean, std, size=(size, len(bars)))
+        else:
+            steps = returns[(starts[:, bars // block] + bars % block) % m]
+        # Summing from the carried log-price keeps the additions in the order
+        # of one cumsum over the whole path.
+        log_price = np.cumsum(np.hstack([log_price[:, -1:], steps]), axis=1)[:, 1:]
+        yield p0 * np.exp(log_price)
+
+
+def simulate_paths(
+    closes: np.ndarray,
+    p0: float,
+    n_paths: int,
+    horizon: int,
+    *,
+    method: str = "bootstrap",
+    block_size: int = 24,
+    seed: int | None = 0,
+) -> np.ndarray:
+    """Return the ``(n_paths, horizon)`` price paths :func:`simulate_ranges` uses.
+
+    Mostly useful for inspection and tests; :func:`simulate_ranges` never
+    holds all paths at once.
+    """
+    returns = _log_returns(closes)
+    return np.vstack(
+        [
+            np.hstack(list(_path_blocks(returns, p0, seq, size, horizon, method, block_size)))
+            for seq, size in _seed_batches(seed, n_paths)
+        ]
+    )
+
+
+def _evaluate_batch(
+    blocks: Iterator[np.ndarray],
+    horizon: int,
+    p0: float,
+    pa: np.ndarray,
+    pb: np.ndarray,
+    L: np.ndarray,
+    capital: float,
+) -> dict[str, np.ndarray]:
+    """Exit bar, final IL and worst IL of every (range, path) pair of one seed batch."""
+    n_out: np.ndarray | None = None
+    low = high = last = None
+    for paths in blocks:
+        run_min = np.minimum.accumulate(paths, axis=1)
+        run_max = np.maximum.accumulate(paths, axis=1)
+        if n_out is None:
+            n_out = np.zeros((len(pa), len(paths)), dtype=np.int64)
+        else:
+            np.minimum(run_min, low[:, np.newaxis], out=run_min)
+            np.maximum(run_max, high[:, np.newaxis], out=run_max)
+
+        # Once the running min / max leaves [pa, pb] it stays out, so the first
+        # exit bar is the number of bars before the mask turns True.
+        step = max(1, _MAX_BLOCK_CELLS // run_min.size)
+        for k in range(0, len(pa), step):
+            col = (slice(k, k + step), np.newaxis, np.newaxis)
+            out = (run_min < pa[col]) | (run_max > pb[col])
+            n_out[k : k + step] += np.count_nonzero(out, axis=2)
+        low, high, last = run_min[:, -1], run_max[:, -1], paths[:, -1]
+
+    exit_bars = horizon - n_out
+    exit_bars[(p0 < pa) | (p0 > pb)] = 0
+
+    # Final IL from the last price; the worst IL along a path is at its
+    # lowest or highest price since IL is quasi-concave in price.
+    hodl_x = (capital / 2.0) / p0
+    hodl_y = capital / 2.0
+
+    def il_at(prices: np.ndarray) -> np.ndarray:
+        lp = _lp_block(L, prices, np.sqrt(prices), pa, pb)
+        return _il_block(lp, hodl_x * prices + hodl_y)
+
+    il_final = il_at(last)
+    il_worst = np.minimum(np.minimum(il_at(low), il_at(high)), 0.0)
+    return {"exit_bars": exit_bars, "il_final": il_final, "il_worst": il_worst}
+
+
+def simulate_ranges(
+    closes: np.ndarray,
+    ranges: np.ndarray,
+    p0: float,
+    capital: float,
+    horizon: int,
+    n_paths: int = 2_000,
+    *,
+    bar_hours: float = 1.0,
+    method: str = "bootstrap",
+    block_size: int = 24,
+    seed: int | None = 0,
+    workers: int = 1,
+    executor: Executor | None = None,
+) -> list[ForecastMetrics]:
+    """Forward-simulate every range in *ranges* over *horizon* bars.
+
+    Parameters
+    ----------
+    closes : historical closes the log-returns are calibrated on
+    ranges : ``(K, 2)`` array-like of ``[pa, pb]`` price bounds
+    p0 : entry price of the simulated positions (usually the current price)
+    capital : initial capital in USD
+    horizon : number of bars to simulate
+    n_paths : number of simulated price paths
+    bar_hours : length of one bar in hours (for ``mean_time_to_exit_hours``)
+    method : ``"bootstrap"`` (circular block bootstrap of the historical
+        log-returns, blocks of *block_size* bars) or ``"gbm"`` (normal
+        log-returns with the historical mean and standard deviation)
+    seed : seed of the path generator; equal seeds give equal results
+    workers : threads evaluating seed batches of paths in parallel
+    executor : thread pool of (at least) *workers* threads to run them on,
+        shared between calls; without it a pool is started per call
+
+    Returns
+    -------
+    list of :class:`ForecastMetrics`, one per row of *ranges*.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    if horizon <= 0 or n_paths <= 0:
+        raise ValueError("horizon and n_paths must be positive")
+
+    returns = _log_returns(closes)
+    pa, pb = _normalize_ranges(ranges)
+    p0_clamped = np.maximum(np.minimum(p0, pb), pa)
+    L = np.array(
+        [
+            _compute_liquidity(capital, float(c), float(lo), float(hi))
+            for c, lo, hi in zip(p0_clamped, pa, pb)
+        ]
+    )
+
+    batches = _seed_batches(seed, n_paths)
+
+    def run(batch: tuple[np.random.SeedSequence, int]) -> dict[str, np.ndarray]:
+        seq, size = batch
+        blocks = _path_blocks(returns, p0, seq, size, horizon, method, block_size)
+        return _evaluate_batch(blocks, horizon, p0, pa, pb, L, capital)
+
+    if workers > 1 and len(batches) > 1:
+        if executor is not None:
+            results = list(executor.map(run, batches))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(run, batches))
+    else:
+        results = [run(batch) for batch in batches]
+
+    merged: dict[str, Any] = {
+        key: np.concatenate([r[key] for r in results], axis=1) for key in results[0]
+    }
+    exit_bars = merged["exit_bars"]
+    # IL percentiles are reported as positive losses, like max_il_pct.
+    il_final = np.percentile(merged["il_final"], [50, 5], axis=1)
+    il_worst = np.percentile(merged["il_worst"], 5, axis=1)
+    return [
+        ForecastMetrics(
+            horizon_hours=round(horizon * bar_hours, 2),
+            n_paths=n_paths,
+            survival_pct=round(float(np.mean(exit_bars[k] == horizon)) * 100.0, 2),
+            mean_time_to_exit_hours=round(float(np.mean(exit_bars[k])) * bar_hours, 2),
+            il_median_pct=round(max(-float(il_final[0, k]), 0.0), 2),
+            il_p95_pct=round(max(-float(il_final[1, k]), 0.0), 2),
+            max_il_p95_pct=round(max(-float(il_worst[k]), 0.0), 2),
+        )
+        for k in range(len(pa))
+    ]
+
+
+def horizon_bars(timestamps: np.ndarray, horizon_hours: float) -> tuple[int, float]:
+    """Return ``(bars, bar_hours)`` covering *horizon_hours* at the klines' interval."""
+    bar_ms = float(np.median(np.diff(np.asarray(timestamps, dtype=np.float64))))
+    bar_hours = bar_ms / 3_600_000.0 if bar_ms > 0 else 1.0
+    return max(1, math.ceil(horizon_hours / bar_hours)), bar_hours
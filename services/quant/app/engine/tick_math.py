@@ -1,4 +1,14 @@
 import math
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+# Cetus CLMM tick bounds
+MIN_TICK = -443636
+MAX_TICK = 443636
+
+_LOG_BASE = math.log(1.0001)
 
 
 def price_to_tick(price: float) -> int:
@@ -8,7 +18,7 @@ def price_to_tick(price: float) -> int:
     """
     if price <= 0:
         raise ValueError("price must be positive")
-    return math.floor(math.log(price) / math.log(1.0001))
+    return math.floor(math.log(price) / _LOG_BASE)
 
 
 def tick_to_price(tick: int) -> float:
@@ -40,3 +50,109 @@ def align_tick_up(tick: int, spacing: int) -> int:
     # For both positive and negative ticks we want the next multiple
     # of spacing that is >= tick.
     return ((tick // spacing) + 1) * spacing
+
+
+def align_range(pa: float, pb: float, spacing: int) -> tuple[int, int]:
+    """Align the price range [pa, pb] outwards to a (tick_lower, tick_upper) pair.
+
+    The upper tick is moved up by one spacing if alignment collapsed the
+    range, so that tick_lower < tick_upper always holds.
+    """
+    tick_lower = align_tick_down(price_to_tick(pa), spacing)
+    tick_upper = align_tick_up(price_to_tick(pb), spacing)
+    if tick_to_price(tick_lower) >= tick_to_price(tick_upper):
+        tick_upper += spacing
+    return tick_lower, tick_upper
+
+
+# ---------------------------------------------------------------------------
+# Array versions
+# ---------------------------------------------------------------------------
+# Each matches its scalar counterpart bit for bit.  NumPy's log / power are
+# not guaranteed to round like libm's, so the few log quotients close to a
+# tick boundary are recomputed with math.log, and tick -> price comes from
+# tables filled with the scalar ``1.0001 ** tick``.
+
+# Log quotients closer than this (relative) to an integer are recomputed.
+_BOUNDARY_TOL = 1e-9
+
+
+class TickTable(NamedTuple):
+    """Prices of every multiple of *spacing* in [MIN_TICK, MAX_TICK]."""
+
+    spacing: int
+    first_tick: int
+    prices: np.ndarray  # prices[i] == tick_to_price(first_tick + i * spacing)
+
+
+@lru_cache(maxsize=32)
+def tick_table(spacing: int) -> TickTable:
+    """Return the (memoized, read-only) price table for *spacing*."""
+    if spacing <= 0:
+        raise ValueError("spacing must be positive")
+    first = -(MIN_TICK // -spacing) * spacing  # first multiple >= MIN_TICK
+    prices = np.array([tick_to_price(t) for t in range(first, MAX_TICK + 1, spacing)])
+    prices.flags.writeable = False
+    return TickTable(spacing, first, prices)
+
+
+def price_to_tick_array(prices: np.ndarray) -> np.ndarray:
+    """Vectorised :func:`price_to_tick` (int64 array)."""
+    prices = np.asarray(prices, dtype=np.float64)
+    if not np.all(prices > 0):
+        raise ValueError("price must be positive")
+    quotient = np.log(prices) / _LOG_BASE
+    ticks = np.floor(quotient).astype(np.int64)
+    near = np.abs(quotient - np.rint(quotient)) <= _BOUNDARY_TOL * np.maximum(
+        1.0, np.abs(quotient)
+    )
+    if near.any():
+        for i in np.flatnonzero(near).tolist():
+            ticks.flat[i] = price_to_tick(float(prices.flat[i]))
+    return ticks
+
+
+def tick_to_price_array(ticks: np.ndarray, spacing: int) -> np.ndarray:
+    """Vectorised :func:`tick_to_price`.
+
+    Ticks that are multiples of *spacing* (the pool's tick spacing) and
+    within [MIN_TICK, MAX_TICK] are looked up in :func:`tick_table`; others
+    are computed one by one.
+    """
+    ticks = np.asarray(ticks, dtype=np.int64)
+    table = tick_table(spacing)
+    offset = ticks - table.first_tick
+    index = offset // spacing
+    hit = (offset % spacing == 0) & (index >= 0) & (index < len(table.prices))
+    if hit.all():
+        return table.prices[index]
+    prices = table.prices[np.where(hit, index, 0)]
+    for i in np.flatnonzero(~hit).tolist():
+        prices.flat[i] = tick_to_price(int(ticks.flat[i]))
+    return prices
+
+
+def align_ticks_down(ticks: np.ndarray, spacing: int) -> np.ndarray:
+    """Vectorised :func:`align_tick_down`."""
+    if spacing <= 0:
+        raise ValueError("spacing must be positive")
+    return (np.asarray(ticks, dtype=np.int64) // spacing) * spacing
+
+
+def align_ticks_up(ticks: np.ndarray, spacing: int) -> np.ndarray:
+    """Vectorised :func:`align_tick_up`."""
+    if spacing <= 0:
+        raise ValueError("spacing must be positive")
+    return -(-np.asarray(ticks, dtype=np.int64) // spacing) * spacing
+
+
+def align_ranges(
+    pa: np.ndarray, pb: np.ndarray, spacing: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorised :func:`align_range`: (tick_lower, tick_upper) int arrays."""
+    tick_lower = align_ticks_down(price_to_tick_array(pa), spacing)
+    tick_upper = align_ticks_up(price_to_tick_array(pb), spacing)
+    collapsed = tick_to_price_array(tick_lower, spacing) >= tick_to_price_array(
+        tick_upper, spacing
+    )
+    return tick_lower, tick_upper + spacing * collapsed
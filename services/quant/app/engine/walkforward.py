@@ -0,0 +1,297 @@
+"""Walk-forward evaluation of the range strategies.
+
+``/recommend`` picks ranges once from the whole history and back-tests them
+from ``closes[0]``.  Walk-forward mode instead re-picks them at every
+rebalance point from the trailing ``train_bars`` window, back-tests them on
+the following ``test_bars`` and aggregates the out-of-sample results per
+strategy label.
+
+The candidate generators are not re-run on every slice; their inputs are
+carried from one window to the next instead:
+
+* quantile -- a sorted copy of the trailing window is updated by deleting
+  the bars that left and merging in the bars that entered (no re-sort), and
+  percentiles are read off it by index;
+* volband -- the tail mean / std of every window come from one vectorised
+  pass over a strided view of the closes;
+* swing -- a swing point depends only on its centred neighbourhood, so they
+  are detected once for the whole series with the O(n) rolling extrema and
+  each window selects its own slice of them.
+
+Each produces exactly what the matching generator in
+:mod:`app.engine.candidates` returns for ``closes[end - train_bars : end]``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterator, Mapping, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.engine.backtest import run_backtest_batch
+from app.engine.candidates import (
+    QUANTILE_PAIRS,
+    generate_extreme_ranges,
+    generate_quantile_ranges,
+)
+from app.engine.optimizer import optimize_tick_ranges
+from app.engine.price_index import SortedPrices
+from app.engine.rolling import rolling_max, rolling_min
+from app.engine.scoring import metric_matrix, score_matrix
+from app.engine.tick_math import align_range, tick_to_price
+from app.schemas import WalkForwardResult, WalkForwardStrategy
+
+# Volband window and multipliers of the generator in candidates.py
+_VOLBAND_WINDOW = 24
+_VOLBAND_KS = (1.0, 1.5, 2.0)
+
+
+def window_ends(n: int, train_bars: int, test_bars: int, step_bars: int) -> np.ndarray:
+    """Rebalance points: window ``i`` trains on ``[end - train_bars, end)``
+    and tests on the ``test_bars`` bars from ``end`` on."""
+    return np.arange(train_bars, n - test_bars + 1, step_bars)
+
+
+def _sorted_windows(
+    closes: np.ndarray, train_bars: int, ends: np.ndarray
+) -> Iterator[np.ndarray]:
+    """Yield ``np.sort(closes[end - train_bars : end])`` for every end."""
+    window: np.ndarray | None = None
+    prev = 0
+    for end in ends.tolist():
+        step = end - prev
+        if window is None or step >= train_bars:
+            window = np.sort(closes[end - train_bars : end])
+        else:
+            # Delete one occurrence per leaving value: equal values take
+            # consecutive slots starting at their searchsorted position.
+            leaving = np.sort(closes[prev - train_bars : end - train_bars])
+            first = np.searchsorted(leaving, leaving, side="left")
+            slots = np.searchsorted(window, leaving, side="left")
+            window = np.delete(window, slots + np.arange(step) - first)
+            entering = np.sort(closes[prev:end])
+            window = np.insert(window, np.searchsorted(window, entering), entering)
+        prev = end
+        yield window
+
+
+def _volband_ranges(
+    closes: np.ndarray, train_bars: int, ends: np.ndarray
+) -> list[list[tuple[float, float, str]]]:
+    tail = min(_VOLBAND_WINDOW, train_bars)
+    tails = sliding_window_view(closes, tail)[ends - tail]
+    sma = tails.mean(axis=1)
+    std = tails.std(axis=1)
+    std = np.where(std == 0, sma * 0.001, std)
+    return [
+        [(max(m - k * s, 1e-8), m + k * s, f"volband_{k}x") for k in _VOLBAND_KS]
+        for m, s in zip(sma.tolist(), std.tolist())
+    ]
+
+
+def _swing_ranges(
+    closes: np.ndarray, train_bars: int, ends: np.ndarray
+) -> list[list[tuple[float, float, str]]]:
+    if train_bars < 10:
+        return [[] for _ in ends]
+
+    # Swing points of the whole series; the ones whose centred window fits
+    # inside [end - train_bars, end) are exactly the slice's swing points.
+    window = max(5, train_bars // 20)
+    centre = closes[window : len(closes) - window]
+    min_pos = np.flatnonzero(centre == rolling_min(closes, 2 * window + 1)) + window
+    max_pos = np.flatnonzero(centre == rolling_max(closes, 2 * window + 1)) + window
+    first, last = ends - train_bars + window, ends - window
+
+    def swing_values(pos: np.ndarray) -> list[np.ndarray]:
+        lo = np.searchsorted(pos, first, side="left")
+        hi = np.searchsorted(pos, last, side="left")
+        return [closes[pos[a:b]] for a, b in zip(lo.tolist(), hi.tolist())]
+
+    out: list[list[tuple[float, float, str]]] = []
+    for mins, maxs in zip(swing_values(min_pos), swing_values(max_pos)):
+        ranges: list[tuple[float, float, str]] = []
+        if len(mins) and len(maxs):
+            pa = float(np.median(mins[-3:])) if len(mins) >= 3 else float(mins.min())
+            pb = float(np.median(maxs[-3:])) if len(maxs) >= 3 else float(maxs.max())
+            if pa < pb:
+                ranges.append((pa, pb, "swing_recent"))
+            pa, pb = float(mins.min()), float(maxs.max())
+            if pa < pb:
+                ranges.append((pa, pb, "swing_full"))
+        out.append(ranges)
+    return out
+
+
+def iter_window_ranges(
+    closes: np.ndarray,
+    train_bars: int,
+    ends: np.ndarray,
+    strategies: list[str],
+    quantile_pairs: Sequence[tuple[float, float]] = QUANTILE_PAIRS,
+) -> Iterator[tuple[SortedPrices | None, list[tuple[float, float, str]]]]:
+    """Yield ``(sorted window, raw ranges)`` for every rebalance point.
+
+    The raw ranges are those of the quantile / volband / swing generators
+    in *strategies* order, for ``closes[end - train_bars : end]``.  The
+    sorted window is ``None`` unless quantile or optimizer is requested.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    per_strategy: dict[str, Any] = {}
+    if "volband" in strategies:
+        per_strategy["volband"] = iter(_volband_ranges(closes, train_bars, ends))
+    if "swing" in strategies:
+        per_strategy["swing"] = iter(_swing_ranges(closes, train_bars, ends))
+    need_sorted = "quantile" in strategies or "optimizer" in strategies
+    sorted_windows = _sorted_windows(closes, train_bars, ends) if need_sorted else None
+
+    for _ in range(len(ends)):
+        sorted_window = None
+        if sorted_windows is not None:
+            sorted_window = SortedPrices(next(sorted_windows), presorted=True)
+        ranges: list[tuple[float, float, str]] = []
+        for name in strategies:
+            if name == "quantile":
+                ranges.extend(
+                    generate_quantile_ranges(
+                        sorted_window.values, quantile_pairs, index=sorted_window
+                    )
+                )
+            elif name in per_strategy:
+                ranges.extend(next(per_strategy[name]))
+        yield sorted_window, ranges
+
+
+def _window_ticks(
+    sorted_window: SortedPrices | None,
+    ranges: list[tuple[float, float, str]],
+    current_price: float,
+    tick_spacing: int,
+    optimizer: bool,
+) -> list[tuple[int, int, str]]:
+    """Tick-aligned candidates of one window, as ``/recommend`` builds them."""
+    picks: list[tuple[int, int, str]] = []
+    for pa, pb, label in ranges + generate_extreme_ranges(current_price):
+        if pa <= 0 or pb <= 0 or pa >= pb:
+            continue
+        picks.append((*align_range(pa, pb, tick_spacing), label))
+    if optimizer:
+        picks.extend(
+            optimize_tick_ranges(
+                sorted_window.values, current_price, tick_spacing, index=sorted_window
+            )
+        )
+    return picks
+
+
+def walk_forward(
+    closes: np.ndarray,
+    timestamps: np.ndarray,
+    *,
+    strategies: list[str],
+    tick_spacing: int,
+    capital: float,
+    fee_rate: float,
+    weights: Mapping[str, tuple[float, bool]],
+    train_bars: int,
+    test_bars: int,
+    step_bars: int | None = None,
+    bar_columns: dict[str, np.ndarray] | None = None,
+    quantile_pairs: Sequence[tuple[float, float]] = QUANTILE_PAIRS,
+    **backtest_options: Any,
+) -> WalkForwardResult:
+    """Re-pick and back-test the strategies' ranges at every rebalance point.
+
+    Parameters
+    ----------
+    closes, timestamps : the full kline history, sorted by time
+    strategies, tick_spacing, capital, fee_rate : as in ``/recommend``
+    weights : the weight set each window's best strategy is picked by
+        (``{metric: (weight, inverted)}``, as in
+        :data:`~app.engine.scoring.PROFILES`)
+    train_bars : length of the trailing window the ranges are picked from
+    test_bars : bars each pick is back-tested on, entering at the last
+        training close
+    step_bars : bars between rebalance points (default *test_bars*, i.e.
+        back-to-back test windows)
+    bar_columns, backtest_options : per-bar highs / lows / volumes and the
+        remaining keywords of :func:`run_backtest_batch` (fees, intrabar);
+        the bar columns are sliced to each test window
+    quantile_pairs : percentile pairs of the quantile strategy
+
+    Returns
+    -------
+    :class:`WalkForwardResult` with one :class:`WalkForwardStrategy` per
+    candidate label, sorted by label.
+    """
+    step_bars = step_bars or test_bars
+    closes = np.asarray(closes, dtype=np.float64)
+    ends = window_ends(len(closes), train_bars, test_bars, step_bars)
+    if len(ends) == 0:
+        raise ValueError("train_bars + test_bars exceeds the number of klines")
+    bar_columns = bar_columns or {}
+
+    results: dict[str, list[Any]] = {}
+    wins: dict[str, int] = {}
+    windows = iter_window_ranges(closes, train_bars, ends, strategies, quantile_pairs)
+    for end, (sorted_window, ranges) in zip(ends.tolist(), windows):
+        current_price = float(closes[end - 1])
+        picks = _window_ticks(
+            sorted_window, ranges, current_price, tick_spacing, "optimizer" in strategies
+        )
+        test = slice(end - 1, end + test_bars)
+        metrics = run_backtest_batch(
+            closes[test],
+            timestamps[test],
+            np.array([[tick_to_price(lo), tick_to_price(hi)] for lo, hi, _ in picks]),
+            current_price,
+            capital,
+            fee_rate,
+            **{name: col[test] for name, col in bar_columns.items()},
+            **backtest_options,
+        )
+
+        scored = [
+            (label, m) for (_, _, label), m in zip(picks, metrics)
+            if not label.startswith("extreme_")
+        ]
+        if scored:
+            values = metric_matrix([m for _, m in scored])
+            scores = score_matrix(values, {"weights": weights})[:, 0]
+            best = scored[int(np.argmax(scores))][0]
+            wins[best] = wins.get(best, 0) + 1
+        for (lo, hi, label), m in zip(picks, metrics):
+            width_pct = (tick_to_price(hi) - tick_to_price(lo)) / current_price * 100.0
+            results.setdefault(label, []).append((m, width_pct))
+
+    return WalkForwardResult(
+        train_bars=train_bars,
+        test_bars=test_bars,
+        step_bars=step_bars,
+        windows=len(ends),
+        strategies=[
+            _aggregate(label, rows, wins.get(label, 0), len(ends))
+            for label, rows in sorted(results.items())
+        ],
+    )
+
+
+def _aggregate(label: str, rows: list[Any], wins: int, n_windows: int) -> WalkForwardStrategy:
+    in_range = np.array([m.in_range_pct for m, _ in rows])
+    vs_hodl = np.array(
+        [m.lp_vs_hodl_pct if m.net_vs_hodl_pct is None else m.net_vs_hodl_pct for m, _ in rows]
+    )
+    max_il = np.array([m.max_il_pct for m, _ in rows])
+    return WalkForwardStrategy(
+        strategy=label,
+        windows=len(rows),
+        mean_width_pct=round(float(np.mean([w for _, w in rows])), 2),
+        mean_in_range_pct=round(float(in_range.mean()), 2),
+        held_pct=round(float(np.mean(in_range == 100.0)) * 100.0, 2),
+        mean_vs_hodl_pct=round(float(vs_hodl.mean()), 2),
+        worst_vs_hodl_pct=round(float(vs_hodl.min()), 2),
+        mean_max_il_pct=round(float(max_il.mean()), 2),
+        worst_max_il_pct=round(float(max_il.max()), 2),
+        top1_pct=round(wins / n_windows * 100.0, 2),
+    )
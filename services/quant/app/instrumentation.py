@@ -0,0 +1,273 @@
+"""Per-request stage timings, Prometheus-style histograms and a slow-request profiler.
+
+With ``QUANT_INSTRUMENTATION`` on, :class:`InstrumentationMiddleware` opens a
+:class:`RequestTrace` for every request.  Pipeline code marks its stages with
+``with stage("backtest"): ...`` and reports sizes with ``count(bars=n)``;
+both look the trace up in a context variable and are no-ops (one
+``ContextVar.get``) when instrumentation is off.  The stage durations are
+sent back as a ``Server-Timing`` header and, together with the counts and
+the response size, aggregated into the histograms served at ``/metrics``.
+
+``QUANT_PROFILE_SLOW_MS`` additionally samples the request's Python stacks
+every ``QUANT_PROFILE_INTERVAL_MS`` on a background thread and, for requests
+slower than the threshold, writes them as a folded-stack file (one
+``frame;frame;... count`` line per stack, the input of ``flamegraph.pl`` and
+speedscope) to ``QUANT_PROFILE_DIR``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from app.config import settings
+
+_current: ContextVar[RequestTrace | None] = ContextVar("quant_request_trace", default=None)
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class RequestTrace:
+    """Stage durations (seconds, summed per name) and counts of one request."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self._threads: set[int] = set()  # threads inside a stage, for the profiler
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads.add(ident)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._threads.discard(ident)
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def active_threads(self) -> list[int]:
+        with self._lock:
+            return list(self._threads)
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value (durations in ms)."""
+        parts = [f"{name};dur={seconds * 1e3:.2f}" for name, seconds in self.stages.items()]
+        parts += [f'{name};desc="{value}"' for name, value in self.counts.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1e3:.2f}")
+        return ", ".join(parts)
+
+
+def stage(name: str) -> contextlib.AbstractContextManager[Any]:
+    """Time the enclosed block as stage *name* of the current request, if traced."""
+    trace = _current.get()
+    return _NULL_STAGE if trace is None else trace.stage(name)
+
+
+def count(**counts: int) -> None:
+    """Record sizes (bars, candidates, ...) of the current request, if traced."""
+    trace = _current.get()
+    if trace is not None:
+        trace.counts.update(counts)
+
+
+# ---------------------------------------------------------------------------
+# Histograms
+# ---------------------------------------------------------------------------
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, in the Prometheus text format."""
+
+    def __init__(
+        self, name: str, help: str, buckets: tuple[float, ...], labels: tuple[str, ...] = ()
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        # label values -> [count per bucket (+Inf last), sum]
+        self._series: dict[tuple[str, ...], list[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(k, list(v[0]), v[1]) for k, v in sorted(self._series.items())]
+        for label_values, counts, total in snapshot:
+            pairs = [f'{k}="{v}"' for k, v in zip(self.labels, label_values)]
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                bucket_labels = ",".join([*pairs, f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = "{" + ",".join(pairs) + "}" if pairs else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6g}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_SECONDS = Histogram(
+    "quant_request_seconds", "Request latency by route.", _SECONDS, ("route",)
+)
+STAGE_SECONDS = Histogram(
+    "quant_stage_seconds", "Pipeline stage latency by route and stage.", _SECONDS,
+    ("route", "stage"),
+)
+RESPONSE_BYTES = Histogram(
+    "quant_response_bytes", "Response body size by route.",
+    tuple(float(4**i * 1024) for i in range(9)), ("route",),
+)
+REQUEST_COUNTS = Histogram(
+    "quant_request_size", "Bars / candidates per request by route and kind.",
+    (10, 100, 1_000, 10_000, 100_000, 1_000_000), ("route", "kind"),
+)
+HISTOGRAMS = (REQUEST_SECONDS, STAGE_SECONDS, RESPONSE_BYTES, REQUEST_COUNTS)
+
+
+def render_metrics() -> str:
+    """All histograms in the Prometheus text exposition format."""
+    return "\n".join(line for h in HISTOGRAMS for line in h.render()) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Sampling profiler
+# ---------------------------------------------------------------------------
+
+
+class StackSampler:
+    """Samples the stacks of a trace's threads every *interval* seconds."""
+
+    def __init__(self, trace: RequestTrace, interval: float) -> None:
+        self.trace = trace
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="quant-sampler", daemon=True)
+
+    def __enter__(self) -> StackSampler:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in self.trace.active_threads():
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[_folded(frame)] += 1
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+def _folded(frame: Any) -> str:
+    names: list[str] = []
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.basename(code.co_filename)
+        names.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+
+class InstrumentationMiddleware:
+    """ASGI middleware: trace, time and size every HTTP request when enabled."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not settings.instrumentation:
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current.set(trace)
+        body_bytes = 0
+
+        async def send_traced(message: dict) -> None:
+            nonlocal body_bytes
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode()))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+
+        sampler = None
+        if settings.profile_slow_ms > 0:
+            sampler = StackSampler(trace, settings.profile_interval_ms / 1e3)
+        try:
+            with sampler or contextlib.nullcontext():
+                await self.app(scope, receive, send_traced)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - trace.started
+            route = _route_template(scope)
+            _observe(route, trace, elapsed, body_bytes)
+            if sampler is not None and elapsed * 1e3 >= settings.profile_slow_ms:
+                name = f"{time.strftime('%Y%m%d-%H%M%S')}-{route.strip('/').replace('/', '_')}"
+                sampler.write(os.path.join(settings.profile_dir, f"{name}-{id(trace):x}.folded"))
+
+
+def _route_template(scope: dict) -> str:
+    """Matched path template (``/api/v1/sessions/{session_id}/klines``), not the raw path.
+
+    FastAPI keeps the router's own ``APIRoute`` (without the include prefix)
+    in ``scope["route"]``; the prefixed path is on the effective route context.
+    """
+    effective = scope.get("fastapi", {}).get("effective_route_context")
+    if effective is not None:
+        return effective.path
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+def _observe(route: str, trace: RequestTrace, elapsed: float, body_bytes: int) -> None:
+    REQUEST_SECONDS.observe(elapsed, route)
+    RESPONSE_BYTES.observe(body_bytes, route)
+    for name, seconds in trace.stages.items():
+        STAGE_SECONDS.observe(seconds, route, name)
+    for kind, value in trace.counts.items():
+        REQUEST_COUNTS.observe(value, route, kind)
@@ -0,0 +1,95 @@
+"""Compact columnar binary encoding for kline payloads.
+
+The JSON request carries klines as ``list[list[float]]``, which costs one
+Python object per value on the way in.  The binary encoding ships the same
+data as little-endian float64 *columns* so the engine can map it straight
+into ``np.frombuffer`` views without creating per-element objects.
+
+Layout (all integers little-endian)::
+
+    offset  size  field
+    0       4     magic  b"LPQK"
+    4       2     version (uint16, currently 1)
+    6       2     n_cols  (uint16, >= 5)
+    8       4     n_rows  (uint32)
+    12      4     params_len (uint32)
+    16      ...   params: UTF-8 JSON of :class:`RecommendParams`,
+                  zero-padded to the next multiple of 8 bytes
+    ...     ...   n_cols * n_rows float64 values, column-major
+
+Columns follow the JSON kline order: open_time, open, high, low, close,
+volume.  Only the first five are required.
+"""
+
+from __future__ import annotations
+
+import struct
+
+import numpy as np
+
+MAGIC = b"LPQK"
+VERSION = 1
+MEDIA_TYPE = "application/octet-stream"
+
+COL_OPEN_TIME = 0
+COL_OPEN = 1
+COL_HIGH = 2
+COL_LOW = 3
+COL_CLOSE = 4
+COL_VOLUME = 5
+MIN_COLUMNS = 5
+
+_HEADER = struct.Struct("<4sHHII")
+
+
+class KlineBufferError(ValueError):
+    """Raised when a binary kline payload is malformed."""
+
+
+def _padded(length: int) -> int:
+    return (length + 7) & ~7
+
+
+def encode_kline_buffer(params_json: bytes, columns: np.ndarray) -> bytes:
+    """Encode *params_json* and a ``(n_cols, n_rows)`` column matrix."""
+    columns = np.ascontiguousarray(columns, dtype="<f8")
+    if columns.ndim != 2 or columns.shape[0] < MIN_COLUMNS:
+        raise KlineBufferError(
+            f"columns must have shape (n_cols >= {MIN_COLUMNS}, n_rows)"
+        )
+    n_cols, n_rows = columns.shape
+    header = _HEADER.pack(MAGIC, VERSION, n_cols, n_rows, len(params_json))
+    padding = b"\0" * (_padded(len(params_json)) - len(params_json))
+    return b"".join([header, params_json, padding, columns.tobytes()])
+
+
+def decode_kline_buffer(buf: bytes | bytearray | memoryview) -> tuple[bytes, np.ndarray]:
+    """Decode a binary payload into ``(params_json, columns)``.
+
+    *columns* is a read-only ``(n_cols, n_rows)`` float64 view over *buf*;
+    no per-element Python objects are created and nothing is copied.
+    """
+    if len(buf) < _HEADER.size:
+        raise KlineBufferError("payload is shorter than the header")
+    magic, version, n_cols, n_rows, params_len = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise KlineBufferError("bad magic, expected b'LPQK'")
+    if version != VERSION:
+        raise KlineBufferError(f"unsupported version {version}")
+    if n_cols < MIN_COLUMNS:
+        raise KlineBufferError(
+            f"each kline must have at least {MIN_COLUMNS} columns, got {n_cols}"
+        )
+
+    data_offset = _HEADER.size + _padded(params_len)
+    expected = data_offset + n_cols * n_rows * 8
+    if len(buf) != expected:
+        raise KlineBufferError(
+            f"payload is {len(buf)} bytes, header describes {expected}"
+        )
+
+    params_json = bytes(buf[_HEADER.size : _HEADER.size + params_len])
+    columns = np.frombuffer(
+        buf, dtype="<f8", count=n_cols * n_rows, offset=data_offset
+    ).reshape(n_cols, n_rows)
+    return params_json, columns
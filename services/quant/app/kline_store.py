@@ -0,0 +1,211 @@
+"""Append-only columnar kline store backed by memory-mapped float64 files.
+
+Shipping a pool's full kline history as JSON on every request costs one
+Python object per value to parse.  The store keeps each history on disk
+once, keyed by ``(pool_id, pair, interval)``; requests then name the
+series and a time range (optionally appending the newest bars) and the
+pipeline works on read-only ``np.memmap`` slices of the columns: no
+parsing and no copying, the pages come straight from the OS page cache.
+
+Layout of one series::
+
+    {root}/{pool_id}/{pair}/{interval}/
+        open_time.f64 open.f64 high.f64 low.f64 close.f64 volume.f64
+        index.f64    open_time of every INDEX_STRIDE-th bar
+        meta.json    {"version": 1, "bars": n, "index_stride": INDEX_STRIDE}
+
+Column files are raw little-endian float64 in the JSON kline order (the
+:mod:`app.kline_codec` column indices apply to :meth:`KlineSeries.read`).
+Bars are kept sorted by ``open_time``; an append writes the bars newer than
+the last stored one after the committed rows of every file and then
+atomically replaces ``meta.json``, so only the first ``bars`` rows are ever
+read and an interrupted append is overwritten by the next one.  A time
+range is located with a binary search over the in-memory sparse index and
+then within one block of the ``open_time`` column.
+
+The in-memory state assumes one writing process per store directory.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+COLUMNS = ("open_time", "open", "high", "low", "close", "volume")
+INDEX_STRIDE = 1024
+VERSION = 1
+
+_DTYPE = np.dtype("<f8")
+# Series key parts become directory names: no separators, no "." / "..".
+_KEY_PART = re.compile(r"[A-Za-z0-9][A-Za-z0-9._:-]{0,127}")
+
+
+class KlineStoreError(ValueError):
+    """Raised for invalid series keys or kline data."""
+
+
+class KlineSeries:
+    """One stored kline series; obtain it from :meth:`KlineStore.series`."""
+
+    __slots__ = ("path", "_lock", "_bars", "_index", "_maps")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._bars = 0
+        self._maps: tuple[np.ndarray, ...] | None = None
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("version") != VERSION or meta.get("index_stride") != INDEX_STRIDE:
+                raise KlineStoreError(f"unsupported kline store layout in {path}")
+            self._bars = int(meta["bars"])
+        n_index = -(-self._bars // INDEX_STRIDE)
+        self._index = (
+            np.fromfile(self._file("index"), dtype=_DTYPE, count=n_index)
+            if n_index
+            else np.empty(0, dtype=_DTYPE)
+        )
+
+    def __len__(self) -> int:
+        return self._bars
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.f64")
+
+    def bounds(self) -> tuple[float, float] | None:
+        """``(first, last)`` stored open_time, or None while the series is empty."""
+        with self._lock:
+            if not self._bars:
+                return None
+            times = self._columns()[0]
+            return float(times[0]), float(times[self._bars - 1])
+
+    def append(self, columns: np.ndarray) -> int:
+        """Append a ``(6, n)`` column matrix of bars; returns how many were new.
+
+        Bars are sorted by open_time; duplicates within *columns* keep the
+        last one and bars at or before the last stored bar are dropped.
+        """
+        columns = np.asarray(columns, dtype=np.float64)
+        if columns.ndim != 2 or columns.shape[0] != len(COLUMNS):
+            raise KlineStoreError(f"klines must have {len(COLUMNS)} columns")
+        if not np.all(np.isfinite(columns[0])):
+            raise KlineStoreError("open_time must be finite")
+
+        order = np.argsort(columns[0], kind="stable")
+        columns = columns[:, order]
+        times = columns[0]
+        keep = np.append(times[1:] != times[:-1], True)
+
+        with self._lock:
+            if self._bars:
+                keep &= times > self._columns()[0][self._bars - 1]
+            columns = columns[:, keep]
+            n_new = columns.shape[1]
+            if not n_new:
+                return 0
+
+            os.makedirs(self.path, exist_ok=True)
+            start = self._bars
+            for name, column in zip(COLUMNS, columns):
+                _write_at(self._file(name), start, column)
+            # Index entries for the new rows that start a block.
+            first_block = -(-start // INDEX_STRIDE) * INDEX_STRIDE
+            new_index = columns[0, first_block - start :: INDEX_STRIDE]
+            _write_at(self._file("index"), len(self._index), new_index)
+
+            _write_meta(self.path, start + n_new)
+            self._bars = start + n_new
+            self._index = np.concatenate([self._index, new_index])
+            self._maps = None  # the files grew; map them again on the next read
+        return n_new
+
+    def span(self, start_ms: float | None = None, end_ms: float | None = None) -> tuple[int, int]:
+        """Row range ``[lo, hi)`` of the bars with ``start_ms <= open_time <= end_ms``."""
+        with self._lock:
+            return self._span(start_ms, end_ms)
+
+    def read(
+        self, start_ms: float | None = None, end_ms: float | None = None
+    ) -> tuple[np.ndarray, ...]:
+        """Read-only views of every column, restricted to the open_time range.
+
+        The arrays are slices of the memory-mapped files; nothing is copied.
+        """
+        with self._lock:
+            lo, hi = self._span(start_ms, end_ms)
+            if lo >= hi:
+                return tuple(np.empty(0, dtype=_DTYPE) for _ in COLUMNS)
+            return tuple(column[lo:hi] for column in self._columns())
+
+    def _span(self, start_ms: float | None, end_ms: float | None) -> tuple[int, int]:
+        lo = 0 if start_ms is None else self._search(start_ms, "left")
+        hi = self._bars if end_ms is None else self._search(end_ms, "right")
+        return lo, max(lo, hi)
+
+    def _search(self, t: float, side: str) -> int:
+        """``np.searchsorted(open_time, t, side)`` touching one index block."""
+        block = int(np.searchsorted(self._index, t, side="right")) - 1
+        if block < 0:
+            return 0
+        lo = block * INDEX_STRIDE
+        hi = min(lo + INDEX_STRIDE, self._bars)
+        times = self._columns()[0]
+        return lo + int(np.searchsorted(times[lo:hi], t, side=side))
+
+    def _columns(self) -> tuple[np.ndarray, ...]:
+        if self._maps is None:
+            self._maps = tuple(
+                np.memmap(self._file(name), dtype=_DTYPE, mode="r", shape=(self._bars,))
+                for name in COLUMNS
+            )
+        return self._maps
+
+
+class KlineStore:
+    """Directory of kline series keyed by ``(pool_id, pair, interval)``.
+
+    *pair* names the base and quote of the kline prices (``"SUI-USDC"``).
+    Series are opened on first use and kept open.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._series: dict[tuple[str, str, str], KlineSeries] = {}
+        self._lock = threading.Lock()
+
+    def series(self, pool_id: str, pair: str, interval: str) -> KlineSeries:
+        key = (pool_id, pair, interval)
+        for part in key:
+            if not _KEY_PART.fullmatch(part):
+                raise KlineStoreError(f"invalid series key part {part!r}")
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = KlineSeries(os.path.join(self.root, *key))
+            return series
+
+
+def _write_at(path: str, row: int, values: np.ndarray) -> None:
+    """Write *values* as float64 rows starting at *row*, creating the file if needed."""
+    with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+        f.seek(row * _DTYPE.itemsize)
+        f.write(np.ascontiguousarray(values, dtype=_DTYPE).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _write_meta(path: str, bars: int) -> None:
+    """Commit *bars* rows: the column writes above are durable before this lands."""
+    tmp = os.path.join(path, "meta.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"version": VERSION, "bars": bars, "index_stride": INDEX_STRIDE}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(path, "meta.json"))
@@ -1,21 +1,43 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.config import settings
-from app.routers import recommend
+from app.instrumentation import InstrumentationMiddleware, render_metrics
+from app.routers import batch, klines, rebalance, recommend
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    batch.shutdown_executor()
+    recommend.shutdown_executors()
 
-app = FastAPI(title="LPQuant Engine", version="0.1.0")
+
+app = FastAPI(title="LPQuant Engine", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(InstrumentationMiddleware)
 
 app.include_router(recommend.router, prefix="/api/v1")
+app.include_router(batch.router, prefix="/api/v1")
+app.include_router(rebalance.router, prefix="/api/v1")
+app.include_router(klines.router, prefix="/api/v1")
 
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,247 @@
+"""POST /api/v1/recommend/batch -- many pools fanned out to worker processes.
+
+``/recommend`` runs CPU-bound NumPy / Python work on the threadpool, so
+parallel requests are serialised by the GIL.  The batch endpoint instead
+runs each pool's pipeline in a :class:`ProcessPoolExecutor`.  Kline columns
+are written once into a single shared-memory block and workers receive only
+its name plus an offset, so the arrays are never pickled.  Results are
+streamed back as NDJSON (one :class:`BatchPoolResult` per line) in the order
+the pools finish.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import AsyncIterator, NamedTuple
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import numpy as np
+
+from app.config import settings
+from app.routers.recommend import (
+    NDJSON_MEDIA_TYPE,
+    _bar_columns,
+    _kline_columns,
+    _recommend,
+)
+from app.schemas import (
+    BatchError,
+    BatchPoolRequest,
+    BatchPoolResult,
+    RecommendBatchRequest,
+    RecommendParams,
+)
+from app.serialization import dumps
+
+router = APIRouter()
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the shared worker pool, starting it on first use.
+
+    Workers are spawned rather than forked: the server process runs
+    threads, which ``fork`` does not copy safely.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.batch_workers or None,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _executor
+
+
+def _init_worker() -> None:
+    """Run each worker's pipeline single-threaded.
+
+    The pool already spreads pools over the cores; per-process back-test
+    and simulation thread pools would oversubscribe them.
+    """
+    settings.backtest_workers = 1
+    settings.simulation_workers = 1
+
+
+def shutdown_executor() -> None:
+    """Stop the worker pool (called on application shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+class _PoolTask(NamedTuple):
+    """Everything a worker needs to run one pool; cheap to pickle."""
+
+    index: int
+    pool_id: str
+    params_json: str
+    shm_name: str
+    offset: int
+    shape: tuple[int, int]
+    bar_names: tuple[str, ...]
+
+
+def _attach(name: str) -> SharedMemory:
+    # The creating process owns (and unlinks) the block; since Python 3.13
+    # readers can opt out of resource tracking explicitly.
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    return SharedMemory(name=name)
+
+
+def _error_line(index: int, pool_id: str, status_code: int, detail: str) -> bytes:
+    result = BatchPoolResult(
+        index=index,
+        pool_id=pool_id,
+        error=BatchError(status_code=status_code, detail=detail),
+    )
+    return result.model_dump_json().encode() + b"\n"
+
+
+def _run_pool(task: _PoolTask) -> bytes:
+    """Worker entry point: run the recommend pipeline for one pool.
+
+    The columns are copied out of shared memory once (a single memcpy) so
+    the block can be released before the pipeline runs.  Returns the
+    serialised NDJSON line, so serialisation also happens in the worker.
+    """
+    shm = _attach(task.shm_name)
+    try:
+        columns = np.ndarray(
+            task.shape, dtype=np.float64, buffer=shm.buf, offset=task.offset
+        ).copy()
+    finally:
+        shm.close()
+
+    params = RecommendParams.model_validate_json(task.params_json)
+    bar_columns = dict(zip(task.bar_names, columns[2:]))
+    try:
+        response = _recommend(params, columns[0], columns[1], bar_columns)
+    except HTTPException as exc:
+        return _error_line(task.index, task.pool_id, exc.status_code, str(exc.detail))
+    result = BatchPoolResult(index=task.index, pool_id=task.pool_id, result=response)
+    return dumps(result) + b"\n"
+
+
+def _pool_columns(pool: BatchPoolRequest) -> tuple[tuple[str, ...], np.ndarray]:
+    """Stack (timestamps, closes, *optional bar columns) for one pool."""
+    if len(pool.klines) < 2:
+        raise HTTPException(status_code=400, detail="At least 2 klines are required")
+    timestamps, closes = _kline_columns(pool.klines)
+    bar_columns = _bar_columns(pool, pool.klines)
+    return tuple(bar_columns), np.vstack([timestamps, closes, *bar_columns.values()])
+
+
+def _pack(
+    pools: list[BatchPoolRequest],
+) -> tuple[SharedMemory | None, list[_PoolTask], list[bytes]]:
+    """Write every valid pool's columns into one shared-memory block.
+
+    Returns the block (``None`` if no pool is valid), the worker tasks and
+    the error lines of pools rejected up front.
+    """
+    prepared: list[tuple[int, BatchPoolRequest, tuple[str, ...], np.ndarray]] = []
+    errors: list[bytes] = []
+    for index, pool in enumerate(pools):
+        try:
+            bar_names, columns = _pool_columns(pool)
+        except HTTPException as exc:
+            errors.append(_error_line(index, pool.pool_id, exc.status_code, str(exc.detail)))
+            continue
+        prepared.append((index, pool, bar_names, columns))
+
+    if not prepared:
+        return None, [], errors
+
+    shm = SharedMemory(create=True, size=sum(c.nbytes for *_, c in prepared))
+    tasks: list[_PoolTask] = []
+    offset = 0
+    for index, pool, bar_names, columns in prepared:
+        target = np.ndarray(columns.shape, dtype=np.float64, buffer=shm.buf, offset=offset)
+        target[:] = columns
+        del target  # release the export so the block can be closed later
+        tasks.append(
+            _PoolTask(
+                index=index,
+                pool_id=pool.pool_id,
+                params_json=pool.model_dump_json(include=set(RecommendParams.model_fields)),
+                shm_name=shm.name,
+                offset=offset,
+                shape=columns.shape,
+                bar_names=bar_names,
+            )
+        )
+        offset += columns.nbytes
+    return shm, tasks, errors
+
+
+async def _run_task(future: Future[bytes], task: _PoolTask) -> bytes:
+    try:
+        return await asyncio.wrap_future(future)
+    except Exception as exc:  # worker crashed or raised unexpectedly
+        return _error_line(task.index, task.pool_id, 500, f"{type(exc).__name__}: {exc}")
+
+
+async def _stream(pools: list[BatchPoolRequest]) -> AsyncIterator[bytes]:
+    # The shared-memory block is created only once the body is being sent,
+    # so a response that is never iterated (client gone before the body
+    # starts) holds none; the finally below releases it on completion,
+    # errors and disconnects alike.
+    shm, tasks, errors = await run_in_threadpool(_pack, pools)
+    futures: list[Future[bytes]] = []
+    try:
+        for line in errors:
+            yield line
+        if not tasks:
+            return
+        executor = get_executor()
+        futures = [executor.submit(_run_pool, task) for task in tasks]
+        pending = [
+            asyncio.ensure_future(_run_task(future, task)) for future, task in zip(futures, tasks)
+        ]
+        for next_done in asyncio.as_completed(pending):
+            yield await next_done
+    finally:
+        # Cancelling drops the pools still queued; a worker that is already
+        # running a pool cannot be interrupted and finishes it unobserved
+        # (it copies its columns out of shared memory first, or fails to
+        # attach once the block is unlinked).
+        for future in futures:
+            future.cancel()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+
+@router.post(
+    "/recommend/batch",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def recommend_batch(req: RecommendBatchRequest) -> StreamingResponse:
+    """Recommend ranges for many pools, streaming one NDJSON line per pool.
+
+    Each line is a :class:`BatchPoolResult`; lines arrive in completion
+    order, so use ``index`` / ``pool_id`` to match them to the request.  A
+    failing pool yields a line with ``error`` set instead of failing the
+    whole batch.
+    """
+    if len(req.pools) > settings.batch_max_pools:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_max_pools} pools per batch",
+        )
+    return StreamingResponse(_stream(req.pools), media_type=NDJSON_MEDIA_TYPE)
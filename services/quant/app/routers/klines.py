@@ -0,0 +1,117 @@
+"""Stored kline series: /api/v1/klines/... and POST /api/v1/recommend/stored.
+
+The BFF appends new bars to a pool's series as it fetches them and
+recommendation requests name the series and a time range, so the history
+is read from the memory-mapped store (:mod:`app.kline_store`) instead of
+being posted and parsed as JSON every time.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from app.config import settings
+from app.instrumentation import count, stage
+from app.kline_codec import COL_CLOSE, COL_OPEN_TIME
+from app.kline_store import COLUMNS, KlineSeries, KlineStore, KlineStoreError
+from app.routers.recommend import (
+    _STREAM_RESPONSES,
+    _bar_column_indices,
+    _recommend,
+    _respond,
+)
+from app.schemas import (
+    KlineAppendRequest,
+    KlineSeriesInfo,
+    KlineSeriesKey,
+    RecommendResponse,
+    StoredRecommendRequest,
+)
+
+router = APIRouter()
+
+# Directories are only created when a series is first appended to.
+_store = KlineStore(settings.kline_store_dir)
+
+
+def _series(key: KlineSeriesKey) -> KlineSeries:
+    try:
+        return _store.series(key.pool_id, key.pair, key.interval)
+    except KlineStoreError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _append(series: KlineSeries, klines: list[list[float]]) -> int:
+    """Append JSON klines (all six fields) to *series*; returns the new bar count."""
+    try:
+        matrix = np.array([k[: len(COLUMNS)] for k in klines], dtype=np.float64)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid kline format: {exc}")
+    if matrix.ndim != 2 or matrix.shape[1] != len(COLUMNS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid kline format: stored klines need {len(COLUMNS)} elements "
+            "(open_time, open, high, low, close, volume)",
+        )
+    with stage("append"):
+        try:
+            return series.append(matrix.T)
+        except KlineStoreError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid kline format: {exc}")
+
+
+def _info(key: KlineSeriesKey, series: KlineSeries, appended: int = 0) -> KlineSeriesInfo:
+    bounds = series.bounds()
+    return KlineSeriesInfo(
+        **key.model_dump(),
+        bars=len(series),
+        first_open_time=bounds[0] if bounds else None,
+        last_open_time=bounds[1] if bounds else None,
+        appended=appended,
+    )
+
+
+@router.get("/klines/{pool_id}/{pair}/{interval}", response_model=KlineSeriesInfo)
+def series_info(pool_id: str, pair: str, interval: str) -> KlineSeriesInfo:
+    """Size and time bounds of a stored series (empty if it does not exist yet)."""
+    key = KlineSeriesKey(pool_id=pool_id, pair=pair, interval=interval)
+    return _info(key, _series(key))
+
+
+@router.post("/klines/{pool_id}/{pair}/{interval}", response_model=KlineSeriesInfo)
+def append_klines(
+    pool_id: str, pair: str, interval: str, req: KlineAppendRequest
+) -> KlineSeriesInfo:
+    """Append bars to a stored series, creating it on first use.
+
+    Only bars newer than the last stored one are kept, so clients can
+    re-send an overlapping window.
+    """
+    key = KlineSeriesKey(pool_id=pool_id, pair=pair, interval=interval)
+    series = _series(key)
+    appended = _append(series, req.klines) if req.klines else 0
+    return _info(key, series, appended)
+
+
+@router.post(
+    "/recommend/stored", response_model=RecommendResponse, responses=_STREAM_RESPONSES
+)
+def recommend_stored(req: StoredRecommendRequest, stream: bool = False) -> Response:
+    """Same as ``/recommend``, over the bars of a stored series in ``[start_ms, end_ms]``.
+
+    ``klines``, if given, are appended to the series first.  The pipeline
+    reads zero-copy slices of the memory-mapped columns.
+    """
+    series = _series(req.series)
+    if req.klines:
+        _append(series, req.klines)
+    with stage("load"):
+        columns = series.read(req.start_ms, req.end_ms)
+    count(stored_bars=len(series))
+
+    bar_columns = {name: columns[idx] for name, idx in _bar_column_indices(req).items()}
+    return _respond(
+        _recommend(req, columns[COL_OPEN_TIME], columns[COL_CLOSE], bar_columns, stream=stream)
+    )
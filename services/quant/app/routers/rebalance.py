@@ -0,0 +1,146 @@
+"""POST /api/v1/rebalance/sweep -- rebalancing strategy parameter sweep.
+
+Every (width, trigger) pair of the request is simulated with
+:func:`app.engine.rebalance.simulate_rebalancing` in one vectorised pass;
+the results are ranked by net PnL and the best configuration's LP-vs-HODL
+curve is returned as a :class:`ChartSeries`.
+"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+from fastapi import APIRouter, HTTPException
+
+from app.config import settings
+from app.engine.downsample import minmax_index
+from app.engine.rebalance import rebalance_curve, simulate_rebalancing
+from app.routers.recommend import _kline_columns, _sort_by_time
+from app.schemas import (
+    ChartMarker,
+    ChartSeries,
+    RebalanceConfigResult,
+    RebalanceSweepRequest,
+    RebalanceSweepResponse,
+    RebalanceTrigger,
+)
+
+router = APIRouter()
+
+
+def _trigger_params(trigger: RebalanceTrigger) -> tuple[float, int]:
+    """Map a trigger to the engine's (buffer_pct, interval_bars) pair."""
+    if trigger.kind == "interval":
+        if trigger.interval_bars is None:
+            raise HTTPException(
+                status_code=400, detail="interval triggers need interval_bars"
+            )
+        return math.nan, trigger.interval_bars
+    buffer_pct = trigger.buffer_pct if trigger.kind == "buffer" else 0.0
+    return buffer_pct, trigger.interval_bars or 0
+
+
+def _best_series(
+    req: RebalanceSweepRequest,
+    closes: np.ndarray,
+    timestamps: np.ndarray,
+    width_pct: float,
+    buffer_pct: float,
+    interval_bars: int,
+) -> ChartSeries:
+    curve = rebalance_curve(
+        closes,
+        width_pct,
+        buffer_pct,
+        interval_bars,
+        capital=req.capital_usd,
+        tick_spacing=req.tick_spacing,
+        cost_usd=req.cost_usd,
+        cost_pct=req.cost_pct,
+    )
+    lp_values, hodl_values = curve["lp_values"], curve["hodl_values"]
+    vs_hodl = curve["lp_vs_hodl_pct"]
+    events = np.asarray(curve["events"], dtype=np.intp)
+    if req.max_points is not None:
+        # Rebalance bars are always kept so that every marker has its bar.
+        index = minmax_index(closes, req.max_points, keep=events)
+        if index is not None:
+            timestamps, closes = timestamps[index], closes[index]
+            lp_values, hodl_values, vs_hodl = lp_values[index], hodl_values[index], vs_hodl[index]
+            events = np.searchsorted(index, events)
+
+    times = timestamps.astype(int).tolist()
+    return ChartSeries(
+        timestamps=times,
+        lp_values=np.round(lp_values, 4).tolist(),
+        hodl_values=np.round(hodl_values, 4).tolist(),
+        il_pct=np.round(vs_hodl, 4).tolist(),
+        prices=closes.tolist(),
+        markers=[
+            ChartMarker(time=times[i], position="belowBar", shape="arrowUp", text="Rebalance")
+            for i in events.tolist()
+        ],
+    )
+
+
+@router.post("/rebalance/sweep", response_model=RebalanceSweepResponse)
+def rebalance_sweep(req: RebalanceSweepRequest) -> RebalanceSweepResponse:
+    """Simulate every width x trigger rebalancing configuration.
+
+    Each configuration starts with ``capital_usd`` in a range of the given
+    width centred on the first close, and re-centres (snapped to
+    ``tick_spacing``) whenever its trigger fires, paying ``cost_usd`` plus
+    ``cost_pct`` of the position value per rebalance.
+    """
+    if len(req.klines) < 2:
+        raise HTTPException(status_code=400, detail="At least 2 klines are required")
+    if not req.widths_pct or not req.triggers:
+        raise HTTPException(status_code=400, detail="widths_pct and triggers must not be empty")
+    if any(not 0 < w < 200 for w in req.widths_pct):
+        raise HTTPException(status_code=400, detail="widths_pct must be in (0, 200)")
+    n_configs = len(req.widths_pct) * len(req.triggers)
+    if n_configs > settings.rebalance_max_configs:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.rebalance_max_configs} configurations per sweep",
+        )
+
+    timestamps, closes = _sort_by_time(*_kline_columns(req.klines))
+    if np.any(closes <= 0):
+        raise HTTPException(status_code=400, detail="close prices must be positive")
+    trigger_params = [_trigger_params(t) for t in req.triggers]
+    configs = [
+        (width, trigger, *params)
+        for width in req.widths_pct
+        for trigger, params in zip(req.triggers, trigger_params)
+    ]
+    sim = simulate_rebalancing(
+        closes,
+        np.array([c[0] for c in configs]),
+        np.array([c[2] for c in configs]),
+        np.array([c[3] for c in configs]),
+        capital=req.capital_usd,
+        tick_spacing=req.tick_spacing,
+        cost_usd=req.cost_usd,
+        cost_pct=req.cost_pct,
+    )
+
+    order = np.argsort(-sim["net_pnl"], kind="stable")
+    results = [
+        RebalanceConfigResult(
+            width_pct=configs[i][0],
+            trigger=configs[i][1],
+            rebalances=int(sim["rebalances"][i]),
+            total_cost_usd=round(float(sim["total_cost"][i]), 2),
+            final_value_usd=round(float(sim["final_value"][i]), 2),
+            net_pnl_usd=round(float(sim["net_pnl"][i]), 2),
+            lp_vs_hodl_pct=round(float(sim["lp_vs_hodl_pct"][i]), 2),
+        )
+        for i in order.tolist()
+    ]
+    best = configs[int(order[0])]
+    return RebalanceSweepResponse(
+        results=results,
+        best_series=_best_series(req, closes, timestamps, best[0], best[2], best[3]),
+    )
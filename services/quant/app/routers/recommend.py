@@ -2,33 +2,105 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+import math
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 import numpy as np
 
+from app.cache import TTLCache, kline_digest
+from app.config import settings
+from app.instrumentation import count, stage
+from app.kline_codec import (
+    COL_CLOSE,
+    COL_HIGH,
+    COL_LOW,
+    COL_OPEN_TIME,
+    COL_VOLUME,
+    MEDIA_TYPE,
+    KlineBufferError,
+    decode_kline_buffer,
+)
 from app.schemas import (
     BacktestMetrics,
     CandidateResult,
     ChartSeries,
+    ProfileRanking,
+    RecommendParams,
     RecommendRequest,
     RecommendResponse,
+    SessionAdvanceRequest,
+    SessionCreateRequest,
+    SessionResponse,
+    StreamCandidate,
+    StreamSeries,
+    StreamSummary,
+    WalkForwardResult,
 )
-from app.engine.tick_math import (
-    align_tick_down,
-    align_tick_up,
-    price_to_tick,
-    tick_to_price,
+from app.serialization import chart_series, dumps, json_response
+from app.engine.tick_math import align_ranges, tick_to_price_array
+from app.engine.clmm_math import (
+    MAX_SQRT_PRICE_X64,
+    MIN_SQRT_PRICE_X64,
+    align_range_exact,
+    get_amount_by_liquidity,
+    get_liquidity_from_value,
+    get_tick_at_sqrt_price,
+    price_to_sqrt_price,
+    sqrt_price_to_price,
+    sqrt_prices_at_aligned,
 )
 from app.engine.candidates import (
+    QUANTILE_PAIRS,
     generate_extreme_ranges,
     generate_quantile_ranges,
     generate_swing_ranges,
     generate_volband_ranges,
 )
-from app.engine.backtest import run_backtest
-from app.engine.scoring import score_candidates
+from app.engine.candidate_table import CandidateTable
+from app.engine.optimizer import optimize_tick_ranges
+from app.engine.price_index import SortedPrices
+from app.engine.backtest import (
+    BacktestState,
+    SlidingBacktestState,
+    build_series,
+    iter_series,
+    run_backtest_batch,
+)
+from app.engine.scoring import (
+    INVERTED,
+    PROFILES,
+    SCORED_METRICS,
+    annotate_candidate,
+    score_matrix,
+)
+from app.engine.simulation import horizon_bars, simulate_ranges
+from app.engine.walkforward import walk_forward, window_ends
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Whole responses keyed by (klines digest, request parameters), and
+# per-range metrics keyed by (klines digest, pa, pb, p0, capital, mode)
+# so that a request differing only in e.g. ``profile`` re-scores without
+# back-testing.  Responses are also bounded in bytes (see _response_nbytes).
+_response_cache = TTLCache(
+    settings.cache_max_entries, settings.cache_ttl_seconds, max_bytes=settings.cache_max_bytes
+)
+_metrics_cache = TTLCache(settings.metrics_cache_max_entries, settings.cache_ttl_seconds)
+
+# Incremental sessions keyed by session id (see ``create_session``)
+_sessions = TTLCache(settings.session_max_entries, settings.session_ttl_seconds)
+
 # Map of strategy name -> generator function (excluding extreme, which is always run)
 _STRATEGY_GENERATORS = {
     "quantile": generate_quantile_ranges,
@@ -37,47 +109,51 @@ _STRATEGY_GENERATORS = {
 }
 
 
-def _build_candidate(
-    label: str,
-    pa: float,
-    pb: float,
-    tick_spacing: int,
-    current_price: float,
-) -> dict:
-    """Build a raw candidate dict with aligned ticks and width info."""
-    raw_tick_lower = price_to_tick(pa)
-    raw_tick_upper = price_to_tick(pb)
+class _SharedPool:
+    """Thread pool shared by all requests, started on first use.
 
-    tick_lower = align_tick_down(raw_tick_lower, tick_spacing)
-    tick_upper = align_tick_up(raw_tick_upper, tick_spacing)
+    Concurrent requests share its threads instead of each starting a
+    CPU-count pool.  *workers* reads the configured thread count (0 uses
+    ``os.cpu_count()``); with one thread no pool is started at all.
+    """
 
-    # Recalculate aligned prices
-    aligned_pa = tick_to_price(tick_lower)
-    aligned_pb = tick_to_price(tick_upper)
+    def __init__(self, name: str, workers: Callable[[], int]) -> None:
+        self.name = name
+        self._workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
 
-    # Ensure pa < pb after alignment
-    if aligned_pa >= aligned_pb:
-        aligned_pb = tick_to_price(tick_upper + tick_spacing)
-        tick_upper = tick_upper + tick_spacing
+    def workers(self) -> int:
+        return self._workers() or os.cpu_count() or 1
 
-    width_pct = (aligned_pb - aligned_pa) / current_price * 100.0
+    def executor(self) -> ThreadPoolExecutor | None:
+        """The shared pool, or None when one thread is configured."""
+        workers = self.workers()
+        if workers <= 1:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix=self.name
+                )
+            return self._executor
 
-    requested_width_pct: float | None = None
-    if label.startswith("extreme_") and label.endswith("pct"):
-        try:
-            requested_width_pct = float(label.replace("extreme_", "").replace("pct", ""))
-        except ValueError:
-            requested_width_pct = None
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
 
-    return {
-        "strategy": label,
-        "pa": aligned_pa,
-        "pb": aligned_pb,
-        "tick_lower": tick_lower,
-        "tick_upper": tick_upper,
-        "width_pct": round(width_pct, 4),
-        "requested_width_pct": requested_width_pct,
-    }
+
+# Threads of the batched candidate back-test and of the forward simulation
+_backtest_pool = _SharedPool("quant-backtest", lambda: settings.backtest_workers)
+_simulation_pool = _SharedPool("quant-simulation", lambda: settings.simulation_workers)
+
+
+def shutdown_executors() -> None:
+    """Stop the shared thread pools (called on application shutdown)."""
+    _backtest_pool.shutdown()
+    _simulation_pool.shutdown()
 
 
 def _to_candidate_result(cand: dict) -> CandidateResult:
@@ -93,73 +169,187 @@ def _to_candidate_result(cand: dict) -> CandidateResult:
         metrics=cand["metrics"],
         score=cand["score"],
         insight=cand["insight"],
+        forecast=cand.get("forecast"),
+        position=cand.get("position"),
     )
 
 
-def _to_chart_series(series_dict: dict) -> ChartSeries:
-    """Convert the raw series dict from back-test into a ChartSeries schema."""
-    return ChartSeries(
-        timestamps=series_dict["timestamps"],
-        lp_values=series_dict["lp_values"],
-        hodl_values=series_dict["hodl_values"],
-        il_pct=series_dict["il_pct"],
-        prices=series_dict["prices"],
-    )
+def _kline_columns(klines: list[list[float]]) -> tuple[np.ndarray, np.ndarray]:
+    """Extract (timestamps, closes) arrays from JSON klines."""
+    try:
+        timestamps = np.array([k[0] for k in klines], dtype=np.float64)
+        closes = np.array([k[4] for k in klines], dtype=np.float64)
+    except (IndexError, ValueError) as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid kline format: each kline must have at least 5 elements. {exc}",
+        )
+    return timestamps, closes
 
 
-@router.post("/recommend", response_model=RecommendResponse)
-def recommend(req: RecommendRequest) -> RecommendResponse:
-    """Generate LP range recommendations for a Cetus CLMM pool."""
+def _bar_column_indices(req: RecommendParams) -> dict[str, int]:
+    """Optional kline columns the back-test needs for *req*, by keyword."""
+    indices: dict[str, int] = {}
+    if req.intrabar or req.simulate_fees:
+        indices["highs"] = COL_HIGH
+        indices["lows"] = COL_LOW
+    if req.simulate_fees:
+        indices["volumes"] = COL_VOLUME
+    return indices
 
-    # ------------------------------------------------------------------
-    # 1. Validate & extract data
-    # ------------------------------------------------------------------
-    if not req.klines or len(req.klines) < 2:
-        raise HTTPException(status_code=400, detail="At least 2 klines are required")
 
+def _bar_columns(req: RecommendParams, klines: list[list[float]]) -> dict[str, np.ndarray]:
+    """Extract the optional high / low / volume arrays from JSON klines."""
+    indices = _bar_column_indices(req)
     try:
-        timestamps = np.array([k[0] for k in req.klines], dtype=np.float64)
-        closes = np.array([k[4] for k in req.klines], dtype=np.float64)
+        return {
+            name: np.array([k[idx] for k in klines], dtype=np.float64)
+            for name, idx in indices.items()
+        }
     except (IndexError, ValueError) as exc:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid kline format: each kline must have at least 5 elements. {exc}",
+            detail=(
+                "Invalid kline format: intrabar / simulate_fees need "
+                f"{max(indices.values()) + 1} elements per kline. {exc}"
+            ),
         )
 
+
+def _sort_by_time(
+    timestamps: np.ndarray, *columns: np.ndarray
+) -> tuple[np.ndarray, ...]:
+    """Sort klines by time; already-sorted input is returned without copies.
+
+    Every column in *columns* is permuted along with *timestamps*.
+    """
+    if np.any(timestamps[1:] < timestamps[:-1]):
+        sort_idx = np.argsort(timestamps)
+        timestamps = timestamps[sort_idx]
+        columns = tuple(col[sort_idx] for col in columns)
+    return (timestamps, *columns)
+
+
+def _validate(req: RecommendParams, closes: np.ndarray) -> None:
+    """Reject requests the pipeline cannot handle."""
+    if len(closes) < 2:
+        raise HTTPException(status_code=400, detail="At least 2 klines are required")
+
     if req.current_price <= 0:
         raise HTTPException(status_code=400, detail="current_price must be positive")
 
     if req.tick_spacing <= 0:
         raise HTTPException(status_code=400, detail="tick_spacing must be positive")
 
-    sort_idx = np.argsort(timestamps)
-    timestamps = timestamps[sort_idx]
-    closes = closes[sort_idx]
+    if req.simulate_fees and req.pool_tvl_usd is None:
+        raise HTTPException(
+            status_code=400, detail="pool_tvl_usd is required when simulate_fees is on"
+        )
 
-    current_price = req.current_price
-    tick_spacing = req.tick_spacing
-    fee_rate = req.fee_rate
-    capital = req.capital_usd
-    profile = req.profile
-    p0_price = float(closes[0])
+    if req.quantile_pairs is not None and not all(
+        0 <= lo < hi <= 100 for lo, hi in req.quantile_pairs
+    ):
+        raise HTTPException(
+            status_code=400, detail="quantile_pairs must satisfy 0 <= low < high <= 100"
+        )
 
-    # ------------------------------------------------------------------
-    # 2. Generate candidate ranges from requested strategies
-    # ------------------------------------------------------------------
+    for name, weights in (req.weight_sets or {}).items():
+        if name in PROFILES:
+            raise HTTPException(
+                status_code=400, detail=f"weight set {name!r} shadows a built-in profile"
+            )
+        unknown = sorted(set(weights) - set(SCORED_METRICS))
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"weight set {name!r} has unknown metrics {unknown}; "
+                f"expected a subset of {list(SCORED_METRICS)}",
+            )
+        if any(w < 0 for w in weights.values()) or not any(w > 0 for w in weights.values()):
+            raise HTTPException(
+                status_code=400,
+                detail=f"weights of {name!r} must be non-negative and not all zero",
+            )
+
+    if req.exact_math:
+        sqrt_price = price_to_sqrt_price(req.current_price * _price_scale(req))
+        if not MIN_SQRT_PRICE_X64 <= sqrt_price <= MAX_SQRT_PRICE_X64:
+            raise HTTPException(
+                status_code=400,
+                detail="current_price is outside the pool's price range for these decimals",
+            )
+
+
+def _price_scale(req: RecommendParams) -> float:
+    """Factor from quoted prices to raw (smallest-unit) pool prices."""
+    return 10.0 ** (req.decimals_b - req.decimals_a)
+
+
+def _exact_position(
+    req: RecommendParams,
+    current: tuple[int, int],
+    tick_lower: int,
+    tick_upper: int,
+    sqrt_prices: tuple[int, int],
+) -> dict:
+    """Liquidity and token amounts the contract takes for capital_usd.
+
+    *current* is the pool's ``(sqrt_price, tick)`` and *sqrt_prices* the
+    range's Q64.64 sqrt prices.
+    """
+    sqrt_price, current_tick = current
+    liquidity = get_liquidity_from_value(
+        math.floor(req.capital_usd * 10**req.decimals_b),
+        tick_lower,
+        tick_upper,
+        current_tick,
+        sqrt_price,
+        sqrt_prices=sqrt_prices,
+    )
+    amount_a, amount_b = get_amount_by_liquidity(
+        tick_lower,
+        tick_upper,
+        current_tick,
+        sqrt_price,
+        liquidity,
+        round_up=True,
+        sqrt_prices=sqrt_prices,
+    )
+    return {
+        "sqrt_price_lower_x64": str(sqrt_prices[0]),
+        "sqrt_price_upper_x64": str(sqrt_prices[1]),
+        "liquidity": str(liquidity),
+        "amount_a": str(amount_a),
+        "amount_b": str(amount_b),
+    }
+
+
+def _generate_candidates(
+    req: RecommendParams, closes: np.ndarray, index: SortedPrices | None = None
+) -> CandidateTable:
+    """Generate candidate ranges for *req* and align them to the tick grid.
+
+    *index* is the request's :class:`SortedPrices` of *closes* (built here
+    if not given), shared by the quantile generator and the optimizer.
+    """
+    if index is None:
+        index = SortedPrices(closes)
     raw_ranges: list[tuple[float, float, str]] = []
 
-    for strat_name in req.strategies:
-        gen_fn = _STRATEGY_GENERATORS.get(strat_name)
-        if gen_fn is None:
-            continue  # silently skip unknown strategies
-        if strat_name == "volband":
-            raw_ranges.extend(gen_fn(closes))
-        else:
-            raw_ranges.extend(gen_fn(closes))
+    with stage("generate"):
+        for strat_name in req.strategies:
+            gen_fn = _STRATEGY_GENERATORS.get(strat_name)
+            if gen_fn is None:
+                continue  # silently skip unknown strategies
+            if strat_name == "quantile":
+                pairs = QUANTILE_PAIRS if req.quantile_pairs is None else req.quantile_pairs
+                raw_ranges.extend(gen_fn(closes, pairs, index=index))
+            else:
+                raw_ranges.extend(gen_fn(closes))
 
-    # Always generate extreme ranges (2% and 5%)
-    extreme_raw = generate_extreme_ranges(current_price)
-    raw_ranges.extend(extreme_raw)
+        # Always generate extreme ranges (2% and 5%)
+        extreme_raw = generate_extreme_ranges(req.current_price)
+        raw_ranges.extend(extreme_raw)
 
     if not raw_ranges:
         raise HTTPException(
@@ -167,97 +357,685 @@ def recommend(req: RecommendRequest) -> RecommendResponse:
             detail="No candidate ranges could be generated from the provided data",
         )
 
-    # ------------------------------------------------------------------
-    # 3. Align ticks & build candidate dicts
-    # ------------------------------------------------------------------
-    all_candidates: list[dict] = []
-    for pa, pb, label in raw_ranges:
-        if pa <= 0 or pb <= 0 or pa >= pb:
-            continue
-        cand = _build_candidate(label, pa, pb, tick_spacing, current_price)
-        all_candidates.append(cand)
-
-    if not all_candidates:
+    with stage("align"):
+        valid = [r for r in raw_ranges if r[0] > 0 and r[1] > 0 and r[0] < r[1]]
+        labels = [label for _, _, label in valid]
+        scale = _price_scale(req) if req.exact_math else None
+        if scale is not None:
+            aligned = [
+                align_range_exact(pa * scale, pb * scale, req.tick_spacing) for pa, pb, _ in valid
+            ]
+            tick_lowers = np.array([lower for lower, _ in aligned], dtype=np.int64)
+            tick_uppers = np.array([upper for _, upper in aligned], dtype=np.int64)
+        else:
+            # All price ranges are aligned to the tick grid in one array call.
+            tick_lowers, tick_uppers = align_ranges(
+                np.array([pa for pa, _, _ in valid]),
+                np.array([pb for _, pb, _ in valid]),
+                req.tick_spacing,
+            )
+
+    # The optimizer searches the tick lattice directly, so its picks skip
+    # the price -> tick alignment (in raw prices with exact math).
+    if "optimizer" in req.strategies:
+        with stage("generate"):
+            lattice_closes, lattice_price, lattice_index = closes, req.current_price, index
+            if scale is not None:
+                lattice_closes, lattice_price = closes * scale, req.current_price * scale
+                lattice_index = SortedPrices(index.values * scale, presorted=True)
+            picks = optimize_tick_ranges(
+                lattice_closes, lattice_price, req.tick_spacing, index=lattice_index
+            )
+            if picks:
+                picked = np.array([(lower, upper) for lower, upper, _ in picks], dtype=np.int64)
+                labels += [label for _, _, label in picks]
+                tick_lowers = np.concatenate([tick_lowers, picked[:, 0]])
+                tick_uppers = np.concatenate([tick_uppers, picked[:, 1]])
+
+    if not labels:
         raise HTTPException(
             status_code=400,
             detail="All candidate ranges were invalid after tick alignment",
         )
+    with stage("align"):
+        return _candidate_table(req, labels, tick_lowers, tick_uppers, scale)
 
-    # ------------------------------------------------------------------
-    # 4. Back-test each candidate
-    # ------------------------------------------------------------------
-    for cand in all_candidates:
-        result = run_backtest(
-            closes=closes,
-            timestamps=timestamps,
-            pa=cand["pa"],
-            pb=cand["pb"],
-            p0=p0_price,
-            capital=capital,
-            fee_rate=fee_rate,
+
+def _candidate_table(
+    req: RecommendParams,
+    labels: list[str],
+    tick_lowers: np.ndarray,
+    tick_uppers: np.ndarray,
+    price_scale: float | None,
+) -> CandidateTable:
+    """Candidate table of already-aligned tick ranges.
+
+    With *price_scale* (exact math) the ticks are the contract's and the
+    prices come from their Q64.64 sqrt prices, divided by the scale.
+    """
+    if price_scale is None:
+        pa = tick_to_price_array(tick_lowers, req.tick_spacing)
+        pb = tick_to_price_array(tick_uppers, req.tick_spacing)
+        return CandidateTable(labels, pa, pb, tick_lowers, tick_uppers, req.current_price)
+
+    # The ticks are aligned, so their sqrt prices come from the memoized
+    # per-spacing table instead of one bit-table walk per tick.
+    sqrt_lowers = sqrt_prices_at_aligned(tick_lowers, req.tick_spacing).tolist()
+    sqrt_uppers = sqrt_prices_at_aligned(tick_uppers, req.tick_spacing).tolist()
+    pa = [sqrt_price_to_price(s) / price_scale for s in sqrt_lowers]
+    pb = [sqrt_price_to_price(s) / price_scale for s in sqrt_uppers]
+    sqrt_price = price_to_sqrt_price(req.current_price * price_scale)
+    current = (sqrt_price, get_tick_at_sqrt_price(sqrt_price))
+    positions = [
+        _exact_position(req, current, lower, upper, sqrt_prices)
+        for lower, upper, sqrt_prices in zip(
+            tick_lowers.tolist(), tick_uppers.tolist(), zip(sqrt_lowers, sqrt_uppers)
         )
-        cand["metrics"] = result["metrics"]
-        cand["series"] = result["series"]
+    ]
+    return CandidateTable(
+        labels, pa, pb, tick_lowers, tick_uppers, req.current_price, positions=positions
+    )
+
+
+def _weight_sets(req: RecommendParams) -> dict[str, dict[str, tuple[float, bool]]]:
+    """Weight sets the candidates are scored with, ``req.profile``'s first."""
+    custom = {
+        name: {metric: (w, INVERTED[metric]) for metric, w in weights.items()}
+        for name, weights in (req.weight_sets or {}).items()
+    }
+    sets = {req.profile: custom.get(req.profile) or PROFILES.get(req.profile, PROFILES["balanced"])}
+    if req.rank_profiles:
+        sets.update(PROFILES)
+    sets.update(custom)
+    return sets
+
+
+def _rank_candidates(table: CandidateTable, scores: np.ndarray) -> tuple[list[dict], dict, dict]:
+    """Pick (top3, extreme_2pct, extreme_5pct) by one column of *scores*."""
+    order = np.argsort(-scores, kind="stable").tolist()
+    extreme = table.extreme
+    strategy_rows = [i for i in order if not extreme[i]]
+    extreme_rows = {table.strategy[i]: i for i in order if extreme[i]}
+
+    # If we don't have enough strategy candidates, pad with extreme ones
+    top = strategy_rows[:3]
+    if len(top) < 3:
+        top += list(extreme_rows.values())[: 3 - len(top)]
+        top.sort(key=lambda i: -scores[i])
+
+    # Ensure we always have extreme candidates
+    if "extreme_2.0pct" not in extreme_rows or "extreme_5.0pct" not in extreme_rows:
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to generate extreme range candidates",
+        )
+
+    def pick(i: int) -> dict:
+        return annotate_candidate(table.row(i), float(scores[i]))
+
+    return (
+        [pick(i) for i in top],
+        pick(extreme_rows["extreme_2.0pct"]),
+        pick(extreme_rows["extreme_5.0pct"]),
+    )
+
+
+def _rank_all(
+    req: RecommendParams, table: CandidateTable
+) -> tuple[tuple[list[dict], dict, dict], dict[str, ProfileRanking] | None]:
+    """Score the back-tested *table* under every weight set of *req* at once.
+
+    Returns ``req.profile``'s picks and, with ``rank_profiles`` /
+    ``weight_sets``, the picks of every weight set as ``rankings``.
+    Strategy and extreme candidates are normalized separately.
+    """
+    weight_sets = _weight_sets(req)
+    scores = score_matrix(table.values, weight_sets, groups=table.extreme)
+    picks = _rank_candidates(table, scores[:, 0])
+    if not (req.rank_profiles or req.weight_sets):
+        return picks, None
+
+    rankings: dict[str, ProfileRanking] = {}
+    for j, name in enumerate(weight_sets):
+        top3, extreme_2pct, extreme_5pct = _rank_candidates(table, scores[:, j])
+        rankings[name] = ProfileRanking(
+            top3=[_to_candidate_result(c) for c in top3],
+            extreme_2pct=_to_candidate_result(extreme_2pct),
+            extreme_5pct=_to_candidate_result(extreme_5pct),
+        )
+    return picks, rankings
+
+
+def _charted(top3: list[dict], extreme_2pct: dict, extreme_5pct: dict) -> dict[str, dict]:
+    """Map series keys ("top1".."top3", "extreme_*") to their candidates."""
+    charted = {f"top{i + 1}": cand for i, cand in enumerate(top3)}
+    charted["extreme_2pct"] = extreme_2pct
+    charted["extreme_5pct"] = extreme_5pct
+    return charted
+
+
+def _add_forecasts(
+    req: RecommendParams,
+    charted: dict[str, dict],
+    closes: np.ndarray,
+    timestamps: np.ndarray,
+) -> None:
+    """Attach Monte Carlo forecasts to the charted candidates (in place)."""
+    sim = req.simulation
+    horizon, bar_hours = horizon_bars(timestamps, sim.horizon_hours)
+    forecasts = simulate_ranges(
+        closes,
+        np.array([[c["pa"], c["pb"]] for c in charted.values()], dtype=np.float64),
+        p0=req.current_price,
+        capital=req.capital_usd,
+        horizon=horizon,
+        n_paths=sim.n_paths,
+        bar_hours=bar_hours,
+        method=sim.method,
+        block_size=sim.block_bars,
+        seed=sim.seed,
+        workers=_simulation_pool.workers(),
+        executor=_simulation_pool.executor(),
+    )
+    for cand, forecast in zip(charted.values(), forecasts):
+        cand["forecast"] = forecast
+
+
+def _walk_forward(
+    req: RecommendParams,
+    closes: np.ndarray,
+    timestamps: np.ndarray,
+    bar_columns: dict[str, np.ndarray],
+) -> WalkForwardResult:
+    """Evaluate the requested strategies walk-forward over the history."""
+    wf = req.walk_forward
+    step_bars = wf.step_bars or wf.test_bars
+    n_windows = len(window_ends(len(closes), wf.train_bars, wf.test_bars, step_bars))
+    if n_windows == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="walk_forward needs at least train_bars + test_bars klines",
+        )
+    if n_windows > settings.walk_forward_max_windows:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"walk_forward would evaluate {n_windows} windows "
+                f"(at most {settings.walk_forward_max_windows}); increase step_bars"
+            ),
+        )
+    backtest_options: dict = {"intrabar": req.intrabar}
+    if req.simulate_fees:
+        backtest_options.update(pool_tvl=req.pool_tvl_usd, volume_scale=req.fee_volume_scale)
+    return walk_forward(
+        closes,
+        timestamps,
+        strategies=req.strategies,
+        tick_spacing=req.tick_spacing,
+        capital=req.capital_usd,
+        fee_rate=req.fee_rate,
+        weights=_weight_sets(req)[req.profile],
+        train_bars=wf.train_bars,
+        test_bars=wf.test_bars,
+        step_bars=step_bars,
+        bar_columns=bar_columns,
+        quantile_pairs=QUANTILE_PAIRS if req.quantile_pairs is None else req.quantile_pairs,
+        **backtest_options,
+    )
+
+
+def _build_series_map(
+    charted: dict[str, dict],
+    closes: np.ndarray,
+    timestamps: np.ndarray,
+    p0: float,
+    capital: float,
+    max_points: int | None = None,
+) -> dict[str, ChartSeries]:
+    """Materialise chart series for the charted candidates only.
+
+    The timestamps / prices lists are built once and shared between them.
+    """
+    charted_series = build_series(
+        closes=closes,
+        timestamps=timestamps,
+        ranges=np.array([[c["pa"], c["pb"]] for c in charted.values()], dtype=np.float64),
+        p0=p0,
+        capital=capital,
+        max_points=max_points,
+        as_arrays=True,
+    )
+    return {
+        key: chart_series(series_dict)
+        for key, series_dict in zip(charted, charted_series)
+    }
+
+
+def _ndjson_records(
+    current_price: float,
+    fee_rate: float,
+    candidates: dict[str, CandidateResult],
+    series: Iterable[tuple[str, ChartSeries]],
+    walk_forward: WalkForwardResult | None = None,
+    rankings: dict[str, ProfileRanking] | None = None,
+) -> Iterator[bytes]:
+    """Yield the NDJSON lines of a streamed response (see ``StreamSummary``)."""
+    summary = StreamSummary(
+        current_price=current_price,
+        pool_fee_rate=fee_rate,
+        keys=list(candidates),
+        walk_forward=walk_forward,
+        rankings=rankings,
+    )
+    yield dumps(summary) + b"\n"
+    for key, cand in candidates.items():
+        yield dumps(StreamCandidate(key=key, candidate=cand)) + b"\n"
+    for key, chart in series:
+        yield dumps(StreamSeries(key=key, series=chart)) + b"\n"
+
+
+def _cached_records(response: RecommendResponse) -> Iterator[bytes]:
+    """Stream an already-assembled (cached) response."""
+    candidates = {f"top{i + 1}": cand for i, cand in enumerate(response.top3)}
+    candidates["extreme_2pct"] = response.extreme_2pct
+    candidates["extreme_5pct"] = response.extreme_5pct
+    return _ndjson_records(
+        response.current_price,
+        response.pool_fee_rate,
+        candidates,
+        response.series.items(),
+        response.walk_forward,
+        response.rankings,
+    )
+
+
+def _respond(result: RecommendResponse | Iterator[bytes]) -> Response:
+    if isinstance(result, RecommendResponse):
+        return json_response(result)
+    return StreamingResponse(result, media_type=NDJSON_MEDIA_TYPE)
+
+
+_STREAM_RESPONSES = {
+    200: {
+        "content": {NDJSON_MEDIA_TYPE: {}},
+        "description": "RecommendResponse, or NDJSON records with ?stream=true",
+    }
+}
+
+
+@router.post("/recommend", response_model=RecommendResponse, responses=_STREAM_RESPONSES)
+def recommend(
+    req: RecommendRequest, stream: bool = False
+) -> Response:
+    """Generate LP range recommendations for a Cetus CLMM pool.
+
+    With ``?stream=true`` the result is sent as NDJSON records instead: a
+    ``StreamSummary``, one ``StreamCandidate`` per key and then one
+    ``StreamSeries`` per key, so clients can render the candidates before
+    the chart series are serialised.
+    """
+    if not req.klines or len(req.klines) < 2:
+        raise HTTPException(status_code=400, detail="At least 2 klines are required")
+
+    timestamps, closes = _kline_columns(req.klines)
+    return _respond(
+        _recommend(req, timestamps, closes, _bar_columns(req, req.klines), stream=stream)
+    )
+
+
+@router.post(
+    "/recommend/binary",
+    response_model=RecommendResponse,
+    responses=_STREAM_RESPONSES,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+async def recommend_binary(
+    request: Request, stream: bool = False
+) -> Response:
+    """Same as :func:`recommend`, with klines sent as a columnar float64 buffer.
+
+    See :mod:`app.kline_codec` for the payload layout.  The kline columns are
+    used as zero-copy ``np.frombuffer`` views.
+    """
+    body = await request.body()
+    try:
+        params_json, columns = decode_kline_buffer(body)
+    except KlineBufferError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid kline buffer: {exc}")
+    try:
+        params = RecommendParams.model_validate_json(params_json)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
+
+    indices = _bar_column_indices(params)
+    if indices and len(columns) <= max(indices.values()):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid kline buffer: simulate_fees needs the volume column",
+        )
+    bar_columns = {name: columns[idx] for name, idx in indices.items()}
+
+    result = await run_in_threadpool(
+        _recommend,
+        params,
+        columns[COL_OPEN_TIME],
+        columns[COL_CLOSE],
+        bar_columns,
+        stream=stream,
+    )
+    return _respond(result)
+
+
+def _recommend(
+    req: RecommendParams,
+    timestamps: np.ndarray,
+    closes: np.ndarray,
+    bar_columns: dict[str, np.ndarray] | None = None,
+    *,
+    stream: bool = False,
+) -> RecommendResponse | Iterator[bytes]:
+    """Run the recommendation pipeline on already-extracted kline columns.
+
+    *bar_columns* holds the highs / lows / volumes arrays that ``intrabar``
+    and ``simulate_fees`` need (see :func:`_bar_column_indices`).
+
+    With *stream*, returns an iterator of NDJSON lines instead.  Everything
+    up to ranking runs eagerly (so errors still surface as HTTP errors); the
+    chart series are built and serialised one at a time as the iterator is
+    consumed, and the streamed result is not put in the response cache.
+
+    Each numbered step is timed as an instrumentation stage (see
+    :mod:`app.instrumentation`).
+    """
 
     # ------------------------------------------------------------------
-    # 5. Score & rank
+    # 1. Validate & extract data
     # ------------------------------------------------------------------
-    # Separate extreme candidates before scoring
-    extreme_cands = {c["strategy"]: c for c in all_candidates if c["strategy"].startswith("extreme_")}
-    strategy_cands = [c for c in all_candidates if not c["strategy"].startswith("extreme_")]
+    with stage("validate"):
+        _validate(req, closes)
+        bar_columns = bar_columns or {}
+        timestamps, closes, *extra = _sort_by_time(timestamps, closes, *bar_columns.values())
+        bar_columns = dict(zip(bar_columns, extra))
 
-    # Score strategy candidates (non-extreme)
-    if strategy_cands:
-        strategy_cands = score_candidates(strategy_cands, profile)
+        digest = kline_digest(timestamps, closes, *extra)
+        response_key = (
+            digest,
+            req.model_dump_json(include=set(RecommendParams.model_fields)),
+        )
+        cached = _response_cache.get(response_key)
+    count(bars=len(closes))
+    if cached is not None:
+        return _cached_records(cached) if stream else cached
 
-    # Also score extreme candidates so they have scores/insights
-    if extreme_cands:
-        extreme_list = list(extreme_cands.values())
-        extreme_list = score_candidates(extreme_list, profile)
-        extreme_cands = {c["strategy"]: c for c in extreme_list}
+    fee_rate = req.fee_rate
+    capital = req.capital_usd
+    p0_price = float(closes[0])
 
     # ------------------------------------------------------------------
-    # 6. Pick top-3 + extreme 2% and 5%
+    # 2-3. Generate candidate ranges, align ticks & build candidate dicts
     # ------------------------------------------------------------------
-    # If we don't have enough strategy candidates, pad with extreme ones
-    if len(strategy_cands) < 3:
-        # Add extreme candidates that aren't already in strategy_cands
-        for ec in extreme_cands.values():
-            if len(strategy_cands) >= 3:
-                break
-            strategy_cands.append(ec)
-        # Re-sort after adding
-        strategy_cands.sort(key=lambda c: c.get("score", 0), reverse=True)
+    index = SortedPrices(closes)
+    table = _generate_candidates(req, closes, index)
 
-    top3 = strategy_cands[:3]
+    # ------------------------------------------------------------------
+    # 4. Back-test all candidates in one batched pass
+    # ------------------------------------------------------------------
+    # Only ranges missing from the metrics cache are back-tested.
+    with stage("backtest"):
+        bar_inputs: dict = dict(bar_columns, intrabar=req.intrabar)
+        fee_model = None
+        if req.simulate_fees:
+            bar_inputs.update(pool_tvl=req.pool_tvl_usd, volume_scale=req.fee_volume_scale)
+            fee_model = (fee_rate, req.pool_tvl_usd, req.fee_volume_scale)
+        metric_keys = [
+            (digest, pa, pb, p0_price, capital, req.intrabar, fee_model)
+            for pa, pb in zip(table.pa.tolist(), table.pb.tolist())
+        ]
+        metrics: list[BacktestMetrics | None] = [_metrics_cache.get(key) for key in metric_keys]
+        pending = [i for i, m in enumerate(metrics) if m is None]
 
-    # Ensure we always have extreme candidates
-    extreme_2pct = extreme_cands.get("extreme_2.0pct")
-    extreme_5pct = extreme_cands.get("extreme_5.0pct")
+        if pending:
+            batch_metrics = run_backtest_batch(
+                closes=closes,
+                timestamps=timestamps,
+                ranges=table.ranges[pending],
+                p0=p0_price,
+                capital=capital,
+                fee_rate=fee_rate,
+                sorted_prices=index,
+                workers=_backtest_pool.workers(),
+                executor=_backtest_pool.executor(),
+                **bar_inputs,
+            )
+            for i, row_metrics in zip(pending, batch_metrics):
+                metrics[i] = row_metrics
+                _metrics_cache.set(metric_keys[i], row_metrics)
+        table.set_metrics(metrics)
+    count(candidates=len(table), backtested=len(pending))
 
-    if extreme_2pct is None or extreme_5pct is None:
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to generate extreme range candidates",
+    # ------------------------------------------------------------------
+    # 5-6. Score & rank, pick top-3 + extreme 2% and 5%
+    # ------------------------------------------------------------------
+    with stage("score"):
+        (top3, extreme_2pct, extreme_5pct), rankings = _rank_all(req, table)
+    with stage("pick"):
+        charted = _charted(top3, extreme_2pct, extreme_5pct)
+    if req.simulation is not None:
+        with stage("simulation"):
+            _add_forecasts(req, charted, closes, timestamps)
+    walk_forward_result = None
+    if req.walk_forward is not None:
+        with stage("walk_forward"):
+            walk_forward_result = _walk_forward(req, closes, timestamps, bar_columns)
+
+    if stream:
+        ranges = np.array([[c["pa"], c["pb"]] for c in charted.values()], dtype=np.float64)
+        series = iter_series(
+            closes, timestamps, ranges, p0_price, capital, req.max_points, as_arrays=True
+        )
+        return _ndjson_records(
+            req.current_price,
+            fee_rate,
+            {key: _to_candidate_result(c) for key, c in charted.items()},
+            ((key, chart_series(s)) for key, s in zip(charted, series)),
+            walk_forward_result,
+            rankings,
         )
 
     # ------------------------------------------------------------------
     # 7. Build series map for selected candidates
     # ------------------------------------------------------------------
-    series_map: dict[str, ChartSeries] = {}
-    for i, cand in enumerate(top3):
-        series_map[f"top{i + 1}"] = _to_chart_series(cand["series"])
-    series_map["extreme_2pct"] = _to_chart_series(extreme_2pct["series"])
-    series_map["extreme_5pct"] = _to_chart_series(extreme_5pct["series"])
+    with stage("series"):
+        series_map = _build_series_map(
+            charted, closes, timestamps, p0_price, capital, req.max_points
+        )
 
     # ------------------------------------------------------------------
     # 8. Assemble response
     # ------------------------------------------------------------------
-    return RecommendResponse(
-        top3=[_to_candidate_result(c) for c in top3],
-        extreme_2pct=_to_candidate_result(extreme_2pct),
-        extreme_5pct=_to_candidate_result(extreme_5pct),
-        series=series_map,
-        current_price=current_price,
-        pool_fee_rate=fee_rate,
+    with stage("assemble"):
+        response = RecommendResponse(
+            top3=[_to_candidate_result(c) for c in top3],
+            extreme_2pct=_to_candidate_result(extreme_2pct),
+            extreme_5pct=_to_candidate_result(extreme_5pct),
+            series=series_map,
+            current_price=req.current_price,
+            pool_fee_rate=fee_rate,
+            walk_forward=walk_forward_result,
+            rankings=rankings,
+        )
+    _response_cache.set(response_key, response, _response_nbytes(response))
+    return response
+
+
+def _response_nbytes(response: RecommendResponse) -> int:
+    """Approximate memory of a cached response: its distinct chart-series arrays.
+
+    Everything else in a response is a few kB; the series hold up to one
+    value per kline each.  List-valued series count 8 bytes per value.
+    """
+    arrays = {
+        id(values): values
+        for series in response.series.values()
+        for values in (
+            series.timestamps, series.lp_values, series.hodl_values, series.il_pct, series.prices
+        )
+    }
+    return sum(
+        values.nbytes if isinstance(values, np.ndarray) else 8 * len(values)
+        for values in arrays.values()
     )
+
+
+@router.get("/cache/stats")
+def cache_stats() -> dict:
+    """Hit/miss counters and sizes of the in-process result caches."""
+    return {
+        "responses": _response_cache.stats(),
+        "metrics": _metrics_cache.stats(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Incremental sessions
+# ---------------------------------------------------------------------------
+
+class _Session:
+    """Candidate table of one request plus a resumable back-test state per range.
+
+    The candidate ranges are fixed when the session is created; new bars only
+    advance their states, so a refresh costs O(new bars x candidates).
+    """
+
+    def __init__(
+        self,
+        params: RecommendParams,
+        table: CandidateTable,
+        states: list[BacktestState],
+        timestamps: np.ndarray,
+        closes: np.ndarray,
+        window_bars: int | None,
+    ) -> None:
+        self.params = params
+        self.table = table
+        self.states = states
+        self.p0 = float(closes[0])
+        self.window_bars = window_bars
+        self.last_timestamp = float(timestamps[-1])
+        self.lock = threading.Lock()
+        # History is kept as chunks and only concatenated when series are
+        # requested; in window mode chunks that left the window are dropped.
+        self._chunks: list[tuple[np.ndarray, np.ndarray]] = [(timestamps, closes)]
+
+    def advance(self, timestamps: np.ndarray, closes: np.ndarray) -> None:
+        for state in self.states:
+            state.advance(closes, timestamps)
+        self.last_timestamp = float(timestamps[-1])
+        self._chunks.append((timestamps, closes))
+        if self.window_bars is not None:
+            kept = sum(len(t) for t, _ in self._chunks)
+            while len(self._chunks) > 1 and kept - len(self._chunks[0][0]) >= self.window_bars:
+                kept -= len(self._chunks.pop(0)[0])
+
+    def history(self) -> tuple[np.ndarray, np.ndarray]:
+        timestamps = np.concatenate([t for t, _ in self._chunks])
+        closes = np.concatenate([c for _, c in self._chunks])
+        if self.window_bars is not None:
+            timestamps = timestamps[-self.window_bars :]
+            closes = closes[-self.window_bars :]
+        return timestamps, closes
+
+    def response(self, session_id: str, include_series: bool) -> SessionResponse:
+        self.table.set_metrics([state.metrics() for state in self.states])
+        (top3, extreme_2pct, extreme_5pct), rankings = _rank_all(self.params, self.table)
+
+        series_map: dict[str, ChartSeries] = {}
+        if include_series:
+            timestamps, closes = self.history()
+            series_map = _build_series_map(
+                _charted(top3, extreme_2pct, extreme_5pct),
+                closes,
+                timestamps,
+                self.p0,
+                self.params.capital_usd,
+                self.params.max_points,
+            )
+
+        bars = self.states[0].n
+        if self.window_bars is not None:
+            bars = min(bars, self.window_bars)
+        return SessionResponse(
+            session_id=session_id,
+            bars=bars,
+            result=RecommendResponse(
+                top3=[_to_candidate_result(c) for c in top3],
+                extreme_2pct=_to_candidate_result(extreme_2pct),
+                extreme_5pct=_to_candidate_result(extreme_5pct),
+                series=series_map,
+                current_price=self.params.current_price,
+                pool_fee_rate=self.params.fee_rate,
+                rankings=rankings,
+            ),
+        )
+
+
+@router.post("/sessions", response_model=SessionResponse)
+def create_session(req: SessionCreateRequest) -> Response:
+    """Open an incremental recommendation session over the full history.
+
+    Later refreshes send only the new bars to ``/sessions/{session_id}/klines``.
+    With ``window_bars`` the metrics cover only the most recent bars.
+    """
+    if req.simulate_fees or req.intrabar or req.simulation or req.walk_forward:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                "simulate_fees, intrabar, simulation and walk_forward are not "
+                "supported for sessions"
+            ),
+        )
+    timestamps, closes = _kline_columns(req.klines)
+    _validate(req, closes)
+    timestamps, closes = _sort_by_time(timestamps, closes)
+
+    table = _generate_candidates(req, closes)
+    p0_price = float(closes[0])
+    states: list[BacktestState] = []
+    for pa, pb in zip(table.pa.tolist(), table.pb.tolist()):
+        if req.window_bars is None:
+            state = BacktestState(pa, pb, p0_price, req.capital_usd)
+        else:
+            state = SlidingBacktestState(
+                pa, pb, p0_price, req.capital_usd, window=req.window_bars
+            )
+        state.advance(closes, timestamps)
+        states.append(state)
+
+    params = RecommendParams.model_validate(req.model_dump(include=set(RecommendParams.model_fields)))
+    session = _Session(params, table, states, timestamps, closes, req.window_bars)
+    session_id = uuid.uuid4().hex
+    _sessions.set(session_id, session)
+    return json_response(session.response(session_id, include_series=True))
+
+
+@router.post("/sessions/{session_id}/klines", response_model=SessionResponse)
+def advance_session(session_id: str, req: SessionAdvanceRequest) -> Response:
+    """Append new bars to a session and return the refreshed ranking."""
+    session: _Session | None = _sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+
+    timestamps, closes = _kline_columns(req.klines)
+    timestamps, closes = _sort_by_time(timestamps, closes)
+
+    with session.lock:
+        fresh = timestamps > session.last_timestamp
+        if np.any(fresh):
+            session.advance(timestamps[fresh], closes[fresh])
+        _sessions.set(session_id, session)  # refresh the TTL
+        return json_response(session.response(session_id, include_series=req.include_series))
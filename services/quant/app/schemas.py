@@ -1,14 +1,115 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
-class RecommendRequest(BaseModel):
-    klines: list[list[float]]  # [[open_time, open, high, low, close, volume], ...]
+class SimulationParams(BaseModel):
+    """Monte Carlo forward simulation of the returned candidates."""
+
+    horizon_hours: float = Field(gt=0, le=24 * 90)
+    n_paths: int = Field(default=2_000, gt=0, le=50_000)
+    method: Literal["bootstrap", "gbm"] = "bootstrap"
+    block_bars: int = Field(default=24, gt=0)  # bootstrap block length
+    seed: int = 0
+
+
+class WalkForwardParams(BaseModel):
+    """Re-pick ranges from a trailing window and test them on the next one."""
+
+    train_bars: int = Field(gt=1)
+    test_bars: int = Field(gt=0)
+    step_bars: int | None = Field(default=None, gt=0)  # None: test_bars
+
+
+class RecommendParams(BaseModel):
+    """Recommendation parameters shared by the JSON and binary kline encodings."""
+
     current_price: float
     tick_spacing: int
     fee_rate: float  # e.g. 0.0025
     profile: str  # "conservative" | "balanced" | "aggressive"
     capital_usd: float
-    strategies: list[str]  # subset of ["quantile", "volband", "swing"]
+    strategies: list[str]  # subset of ["quantile", "volband", "swing", "optimizer"]
+    # (low, high) percentile pairs of the quantile strategy; None: P5-P95, P10-P90, P25-P75
+    quantile_pairs: list[tuple[float, float]] | None = None
+    # Fee accrual from kline volume (k[5]); off by default to keep the
+    # back-test conservative.  pool_tvl_usd is required when it is on.
+    simulate_fees: bool = False
+    pool_tvl_usd: float | None = Field(default=None, gt=0)
+    fee_volume_scale: float = Field(default=1.0, gt=0)  # kline volume -> pool volume
+    # Use high/low (k[2], k[3]) for range exits and intrabar IL, not just close
+    intrabar: bool = False
+    # Downsample chart series to about this many bars (None: one per kline)
+    max_points: int | None = Field(default=None, ge=64)
+    # Forward-simulate the returned candidates from current_price
+    simulation: SimulationParams | None = None
+    # Out-of-sample evaluation of the strategies over rolling windows
+    walk_forward: WalkForwardParams | None = None
+    # Contract-exact (Q64.64) ticks, prices and deposit amounts.  Token
+    # decimals map prices to the pool's raw units: price * 10**(b - a).
+    exact_math: bool = False
+    decimals_a: int = Field(default=0, ge=0, le=30)
+    decimals_b: int = Field(default=0, ge=0, le=30)
+    # Also rank the candidates under every built-in profile and under these
+    # custom weight sets ({name: {metric: weight}}, metric directions as in
+    # the built-in profiles), returned as ``rankings``.  ``profile`` may name
+    # a custom weight set.
+    rank_profiles: bool = False
+    weight_sets: dict[str, dict[str, float]] | None = None
+
+
+class RecommendRequest(RecommendParams):
+    klines: list[list[float]]  # [[open_time, open, high, low, close, volume], ...]
+
+
+class BatchPoolRequest(RecommendRequest):
+    pool_id: str
+
+
+class RecommendBatchRequest(BaseModel):
+    pools: list[BatchPoolRequest]
+
+
+class SessionCreateRequest(RecommendRequest):
+    # Keep metrics over only the last N bars; None keeps the full history.
+    window_bars: int | None = Field(default=None, gt=0)
+
+
+class SessionAdvanceRequest(BaseModel):
+    klines: list[list[float]]  # new bars only; bars at or before the last one are ignored
+    include_series: bool = False
+
+
+class KlineSeriesKey(BaseModel):
+    """One series of the on-disk kline store (see ``app.kline_store``)."""
+
+    pool_id: str
+    pair: str  # base-quote of the kline prices, e.g. "SUI-USDC"
+    interval: str  # e.g. "1h"
+
+
+class KlineAppendRequest(BaseModel):
+    # [[open_time, open, high, low, close, volume], ...]; bars at or before
+    # the last stored one are ignored
+    klines: list[list[float]]
+
+
+class KlineSeriesInfo(KlineSeriesKey):
+    bars: int
+    first_open_time: float | None = None  # None while the series is empty
+    last_open_time: float | None = None
+    appended: int = 0  # bars added by this request
+
+
+class StoredRecommendRequest(RecommendParams):
+    """Recommendation over a stored kline series instead of posted klines."""
+
+    series: KlineSeriesKey
+    # Inclusive open_time bounds (ms) of the bars to use; None: unbounded
+    start_ms: float | None = None
+    end_ms: float | None = None
+    # New bars appended to the series before it is read
+    klines: list[list[float]] | None = None
 
 
 class BacktestMetrics(BaseModel):
@@ -19,6 +120,33 @@ class BacktestMetrics(BaseModel):
     max_il_pct: float
     max_drawdown_pct: float
     capital_efficiency: float
+    # Only set when fees are simulated
+    fees_earned: float | None = None
+    fee_apr_pct: float | None = None
+    net_vs_hodl_pct: float | None = None  # lp_vs_hodl_pct including fees
+
+
+class ForecastMetrics(BaseModel):
+    horizon_hours: float
+    n_paths: int
+    survival_pct: float  # paths that never leave the range within the horizon
+    mean_time_to_exit_hours: float  # censored at the horizon
+    il_median_pct: float  # IL at the horizon, positive = loss
+    il_p95_pct: float  # 95th percentile loss at the horizon
+    max_il_p95_pct: float  # 95th percentile of the worst IL along a path
+
+
+class ExactPosition(BaseModel):
+    """Deposit of capital_usd (in token B) at current_price, as the contract computes it.
+
+    u128 / u64 values are decimal strings; amounts are in smallest units.
+    """
+
+    sqrt_price_lower_x64: str
+    sqrt_price_upper_x64: str
+    liquidity: str
+    amount_a: str
+    amount_b: str
 
 
 class CandidateResult(BaseModel):
@@ -33,6 +161,8 @@ class CandidateResult(BaseModel):
     score: float
     insight: str
     insight_data: dict | None = None
+    forecast: ForecastMetrics | None = None  # only with RecommendParams.simulation
+    position: ExactPosition | None = None  # only with RecommendParams.exact_math
 
 
 class ChartMarker(BaseModel):
@@ -44,6 +174,9 @@ class ChartMarker(BaseModel):
 
 
 class ChartSeries(BaseModel):
+    # The recommend pipeline fills these with NumPy arrays, unvalidated
+    # (app.serialization.chart_series); encode such models with
+    # app.serialization.dumps.
     timestamps: list[int]
     lp_values: list[float]
     hodl_values: list[float]
@@ -52,6 +185,35 @@ class ChartSeries(BaseModel):
     markers: list[ChartMarker] = Field(default_factory=list)
 
 
+class WalkForwardStrategy(BaseModel):
+    strategy: str  # candidate label, e.g. "quantile_P10_P90"
+    windows: int  # windows that produced this candidate
+    mean_width_pct: float
+    mean_in_range_pct: float
+    held_pct: float  # windows in which the range was never left
+    mean_vs_hodl_pct: float  # lp_vs_hodl_pct, or net_vs_hodl_pct with fees
+    worst_vs_hodl_pct: float
+    mean_max_il_pct: float
+    worst_max_il_pct: float
+    top1_pct: float  # windows in which it scored best under the profile
+
+
+class WalkForwardResult(BaseModel):
+    train_bars: int
+    test_bars: int
+    step_bars: int
+    windows: int
+    strategies: list[WalkForwardStrategy]
+
+
+class ProfileRanking(BaseModel):
+    """Picks of one weight set; scores and insights are that set's."""
+
+    top3: list[CandidateResult]
+    extreme_2pct: CandidateResult
+    extreme_5pct: CandidateResult
+
+
 class RecommendResponse(BaseModel):
     top3: list[CandidateResult]
     extreme_2pct: CandidateResult
@@ -59,3 +221,92 @@ class RecommendResponse(BaseModel):
     series: dict[str, ChartSeries]  # keyed by "top1", "top2", "top3", "extreme_2pct", "extreme_5pct"
     current_price: float
     pool_fee_rate: float
+    walk_forward: WalkForwardResult | None = None
+    # By weight set name, with rank_profiles / weight_sets (series and
+    # forecasts are only computed for ``profile``'s picks)
+    rankings: dict[str, ProfileRanking] | None = None
+
+
+# NDJSON records of ``POST /recommend?stream=true``, in this order: one
+# summary, one candidate per key, then one series per key.
+class StreamSummary(BaseModel):
+    type: Literal["summary"] = "summary"
+    current_price: float
+    pool_fee_rate: float
+    keys: list[str]  # "top1".."top3", "extreme_2pct", "extreme_5pct"
+    walk_forward: WalkForwardResult | None = None
+    rankings: dict[str, ProfileRanking] | None = None
+
+
+class StreamCandidate(BaseModel):
+    type: Literal["candidate"] = "candidate"
+    key: str
+    candidate: CandidateResult
+
+
+class StreamSeries(BaseModel):
+    type: Literal["series"] = "series"
+    key: str
+    series: ChartSeries
+
+
+class SessionResponse(BaseModel):
+    session_id: str
+    bars: int  # bars currently covered by the session's metrics
+    result: RecommendResponse  # series is empty unless requested
+
+
+class BatchError(BaseModel):
+    status_code: int
+    detail: str
+
+
+class BatchPoolResult(BaseModel):
+    """One NDJSON line of /recommend/batch, emitted as each pool finishes."""
+
+    index: int  # position of the pool in the request
+    pool_id: str
+    result: RecommendResponse | None = None
+    error: BatchError | None = None
+
+
+class RebalanceTrigger(BaseModel):
+    """When a rebalancing configuration re-centres its range.
+
+    ``exit``: the close leaves the range; ``buffer``: the close comes within
+    ``buffer_pct`` of the range width of a bound; ``interval``: every
+    ``interval_bars`` bars.  ``interval_bars`` also adds a time trigger to
+    ``exit`` / ``buffer``.
+    """
+
+    kind: Literal["exit", "buffer", "interval"]
+    buffer_pct: float = Field(default=0.0, ge=0, lt=50)
+    interval_bars: int | None = Field(default=None, gt=0)
+
+
+class RebalanceSweepRequest(BaseModel):
+    klines: list[list[float]]  # [[open_time, open, high, low, close, volume], ...]
+    tick_spacing: int = Field(gt=0)
+    capital_usd: float = Field(gt=0)
+    widths_pct: list[float]  # range widths as % of the entry price, each in (0, 200)
+    triggers: list[RebalanceTrigger]  # every width is run with every trigger
+    cost_usd: float = Field(default=0.0, ge=0)  # per rebalance, e.g. gas
+    cost_pct: float = Field(default=0.0, ge=0, lt=100)  # of position value, e.g. swap + slippage
+    max_points: int | None = Field(default=None, ge=64)  # downsample the best curve
+
+
+class RebalanceConfigResult(BaseModel):
+    width_pct: float
+    trigger: RebalanceTrigger
+    rebalances: int
+    total_cost_usd: float
+    final_value_usd: float
+    net_pnl_usd: float  # after costs
+    lp_vs_hodl_pct: float
+
+
+class RebalanceSweepResponse(BaseModel):
+    results: list[RebalanceConfigResult]  # sorted by net_pnl_usd, best first
+    # Curve of the best configuration; il_pct holds LP vs HODL % and the
+    # markers are its rebalances.
+    best_series: ChartSeries
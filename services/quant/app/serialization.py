@@ -0,0 +1,101 @@
+"""JSON encoding of responses whose chart series hold NumPy arrays.
+
+Chart series are the bulk of a ``/recommend`` response: five series of up
+to one value per kline.  Building them as validated ``ChartSeries`` models
+costs a ``.tolist()`` and a validation pass per array, and the response
+model then encodes the timestamps / prices / HODL lists that all five
+series share five times over.
+
+The pipeline instead wraps the arrays with :func:`chart_series` (no
+validation) and responses are written with :func:`dumps`: models that can
+hold such series are walked field by field, every distinct array is
+encoded once, and all other values go through pydantic-core's encoder, so
+the bytes are the same as ``model.model_dump_json()`` on the list-based
+models.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, get_args
+
+import numpy as np
+from fastapi.responses import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from app.schemas import ChartSeries
+
+
+def chart_series(series: dict[str, Any]) -> ChartSeries:
+    """``ChartSeries`` around the arrays of a :func:`~app.engine.backtest.iter_series` dict.
+
+    The arrays are not validated or copied; encode the models holding the
+    result with :func:`dumps` (``model_dump_json`` expects lists).
+    """
+    return ChartSeries.model_construct(
+        timestamps=series["timestamps"],
+        lp_values=series["lp_values"],
+        hodl_values=series["hodl_values"],
+        il_pct=series["il_pct"],
+        prices=series["prices"],
+    )
+
+
+def dumps(value: Any) -> bytes:
+    """JSON bytes of *value*, identical to pydantic's encoding of the list-based models."""
+    out: list[bytes] = []
+    _encode(value, out, {})
+    return b"".join(out)
+
+
+def json_response(model: BaseModel) -> Response:
+    """``application/json`` response of *model*, encoded with :func:`dumps`."""
+    return Response(dumps(model), media_type="application/json")
+
+
+@lru_cache(maxsize=None)
+def _may_hold_series(model: type[BaseModel]) -> bool:
+    return model is ChartSeries or any(
+        _mentions_series(field.annotation) for field in model.model_fields.values()
+    )
+
+
+def _mentions_series(annotation: Any) -> bool:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _may_hold_series(annotation)
+    return any(_mentions_series(arg) for arg in get_args(annotation))
+
+
+def _walks(value: Any) -> bool:
+    return isinstance(value, BaseModel) and _may_hold_series(type(value))
+
+
+def _encode(value: Any, out: list[bytes], arrays: dict[int, bytes]) -> None:
+    if isinstance(value, np.ndarray):
+        # Arrays shared between series are encoded once per dumps() call.
+        encoded = arrays.get(id(value))
+        if encoded is None:
+            encoded = arrays[id(value)] = to_json(value.tolist(), inf_nan_mode="null")
+        out.append(encoded)
+    elif _walks(value):
+        out.append(b"{")
+        for i, name in enumerate(type(value).model_fields):
+            out.append(b',"%s":' % name.encode() if i else b'"%s":' % name.encode())
+            _encode(getattr(value, name), out, arrays)
+        out.append(b"}")
+    elif isinstance(value, dict) and any(_walks(v) for v in value.values()):
+        out.append(b"{")
+        for i, (key, item) in enumerate(value.items()):
+            out.append(b"," + to_json(key) + b":" if i else to_json(key) + b":")
+            _encode(item, out, arrays)
+        out.append(b"}")
+    elif isinstance(value, list) and any(_walks(v) for v in value):
+        out.append(b"[")
+        for i, item in enumerate(value):
+            if i:
+                out.append(b",")
+            _encode(item, out, arrays)
+        out.append(b"]")
+    else:
+        out.append(to_json(value, inf_nan_mode="null"))
@@ -0,0 +1,57 @@
+"""Candidate back-test scaling: run_backtest_batch on 1 .. N worker threads.
+
+    uv run python -m benchmarks.bench_backtest_workers [--bars 100000] [--candidates 30]
+
+On a GIL build the speed-up comes from the NumPy kernels, which release
+the GIL; on a free-threaded build (3.13t) the per-row Python glue runs in
+parallel as well.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from app.engine.backtest import run_backtest_batch
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--candidates", type=int, default=30)
+    parser.add_argument("--max-workers", type=int, default=0, help="0 = CPU count")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    closes = 1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.002, args.bars)))
+    timestamps = 1_700_000_000_000 + 60_000 * np.arange(args.bars, dtype=np.float64)
+    half = np.linspace(0.005, 0.4, args.candidates)
+    ranges = np.column_stack([closes[0] * (1 - half), closes[0] * (1 + half)])
+
+    max_workers = args.max_workers or os.cpu_count() or 1
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(
+        f"{args.candidates} candidates x {args.bars} bars, "
+        f"{os.cpu_count()} CPUs, GIL {'enabled' if gil else 'disabled'}"
+    )
+    counts = sorted({min(2**i, max_workers) for i in range(max_workers.bit_length() + 1)})
+    baseline = None
+    for workers in counts:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run_backtest_batch(
+                closes, timestamps, ranges, float(closes[0]), 10_000.0, 0.0025, workers=workers
+            )
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        print(f"  {workers:3d} workers  {best * 1e3:8.0f} ms  ({baseline / best:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
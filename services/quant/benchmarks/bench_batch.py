@@ -0,0 +1,75 @@
+"""Multi-pool throughput: sequential POST /recommend vs. /recommend/batch.
+
+    uv run python -m benchmarks.bench_batch [--pools 32] [--bars 5000] [--workers 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.routers import recommend
+
+
+def _payload(n: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    closes = 1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.003, n)))
+    timestamps = 1_700_000_000_000 + 60_000 * np.arange(n)
+    return {
+        "pool_id": f"pool-{seed}",
+        "klines": [
+            [float(t), float(c), float(c) * 1.001, float(c) * 0.999, float(c), 100.0]
+            for t, c in zip(timestamps, closes)
+        ],
+        "current_price": float(closes[-1]),
+        "tick_spacing": 60,
+        "fee_rate": 0.0025,
+        "profile": "balanced",
+        "capital_usd": 10_000,
+        "strategies": ["quantile", "volband", "swing"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pools", type=int, default=32)
+    parser.add_argument("--bars", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, default=0, help="0 uses os.cpu_count()")
+    args = parser.parse_args()
+
+    settings.batch_workers = args.workers
+    payloads = [_payload(args.bars, seed) for seed in range(args.pools)]
+
+    with TestClient(app) as client:
+        # Start the worker pool outside the timed region.
+        client.post("/api/v1/recommend/batch", json={"pools": payloads[:1]})
+
+        # Caches would turn the second pass into lookups; measure cold runs.
+        recommend._response_cache.clear()
+        recommend._metrics_cache.clear()
+        start = time.perf_counter()
+        for payload in payloads:
+            client.post("/api/v1/recommend", json=payload).raise_for_status()
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        first_line = None
+        with client.stream("POST", "/api/v1/recommend/batch", json={"pools": payloads}) as res:
+            for _ in res.iter_lines():
+                if first_line is None:
+                    first_line = time.perf_counter() - start
+        batched = time.perf_counter() - start
+
+    print(f"{args.pools} pools x {args.bars} bars")
+    print(f"  sequential /recommend   {sequential * 1e3:9.0f} ms")
+    print(f"  /recommend/batch        {batched * 1e3:9.0f} ms  ({sequential / batched:.1f}x)")
+    print(f"  first batch line after  {first_line * 1e3:9.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Parse-time and peak-memory benchmark: JSON klines vs. the binary buffer.
+
+Each encoding is measured in a fresh subprocess so that the reported peak
+RSS belongs to that encoding alone.
+
+    uv run python -m benchmarks.bench_kline_ingest [--bars 100000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.kline_codec import COL_CLOSE, COL_OPEN_TIME, decode_kline_buffer, encode_kline_buffer
+from app.schemas import RecommendParams, RecommendRequest
+
+_PARAMS = {
+    "current_price": 1.5,
+    "tick_spacing": 60,
+    "fee_rate": 0.0025,
+    "profile": "balanced",
+    "capital_usd": 10_000,
+    "strategies": ["quantile", "volband", "swing"],
+}
+
+
+def _columns(bars: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    closes = 1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.002, bars)))
+    return np.vstack(
+        [
+            1_700_000_000_000 + 60_000 * np.arange(bars, dtype=np.float64),
+            closes,
+            closes * 1.001,
+            closes * 0.999,
+            closes,
+            rng.uniform(10, 1_000, bars),
+        ]
+    )
+
+
+def _parse_json(body: bytes) -> tuple[np.ndarray, np.ndarray]:
+    # Mirrors FastAPI: json.loads, model validation, then the router's
+    # per-kline array extraction.
+    req = RecommendRequest.model_validate(json.loads(body))
+    timestamps = np.array([k[0] for k in req.klines], dtype=np.float64)
+    closes = np.array([k[4] for k in req.klines], dtype=np.float64)
+    return timestamps, closes
+
+
+def _parse_binary(body: bytes) -> tuple[np.ndarray, np.ndarray]:
+    params_json, columns = decode_kline_buffer(body)
+    RecommendParams.model_validate_json(params_json)
+    return columns[COL_OPEN_TIME], columns[COL_CLOSE]
+
+
+def _run_one(encoding: str, bars: int, repeat: int) -> dict:
+    columns = _columns(bars)
+    if encoding == "json":
+        body = json.dumps({**_PARAMS, "klines": columns.T.tolist()}).encode()
+        parse = _parse_json
+    else:
+        body = encode_kline_buffer(json.dumps(_PARAMS).encode(), columns)
+        parse = _parse_binary
+    del columns
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(body)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(body)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "encoding": encoding,
+        "bars": bars,
+        "body_bytes": len(body),
+        "parse_ms_best": min(timings) * 1e3,
+        "parse_ms_median": float(np.median(timings)) * 1e3,
+        "traced_peak_mb": traced_peak / 2**20,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--encoding", choices=["json", "binary"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.encoding:
+        print(json.dumps(_run_one(args.encoding, args.bars, args.repeat)))
+        return
+
+    print(f"{'encoding':<8} {'body MB':>8} {'best ms':>9} {'median ms':>10} {'traced MB':>10} {'RSS MB':>8}")
+    for encoding in ("json", "binary"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_kline_ingest", "--encoding", encoding,
+             "--bars", str(args.bars), "--repeat", str(args.repeat)],
+            check=True, capture_output=True, text=True,
+        )
+        r = json.loads(out.stdout)
+        print(
+            f"{r['encoding']:<8} {r['body_bytes'] / 2**20:>8.2f} {r['parse_ms_best']:>9.2f} "
+            f"{r['parse_ms_median']:>10.2f} {r['traced_peak_mb']:>10.2f} {r['max_rss_mb']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Rebalance sweep benchmark: event-driven vectorised sweep vs. a bar-by-bar loop.
+
+    uv run python -m benchmarks.bench_rebalance [--bars 8760] [--widths 50] [--reference 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from app.engine.backtest import _compute_liquidity, _lp_value
+from app.engine.rebalance import simulate_rebalancing
+from app.engine.tick_math import align_range, tick_to_price
+
+
+def _bar_by_bar(closes: np.ndarray, width: float, buffer_pct: float, interval: int) -> float:
+    # Straightforward per-bar simulation of one configuration.
+    def centred(price: float) -> tuple[float, float]:
+        half = width / 100 / 2
+        lower, upper = align_range(price * (1 - half), price * (1 + half), 60)
+        return tick_to_price(lower), tick_to_price(upper)
+
+    prices = closes.tolist()
+    pa, pb = centred(prices[0])
+    L = _compute_liquidity(10_000.0, prices[0], pa, pb)
+    last = 0
+    for j, price in enumerate(prices[1:], start=1):
+        lo, hi = -math.inf, math.inf
+        if not math.isnan(buffer_pct):
+            margin = (pb - pa) * (buffer_pct / 100)
+            lo, hi = pa + margin, pb - margin
+        if price < lo or price > hi or (interval and j - last >= interval):
+            value = _lp_value(L, price, pa, pb) - 1.0
+            pa, pb = centred(price)
+            L = _compute_liquidity(value, price, pa, pb)
+            last = j
+    return _lp_value(L, prices[-1], pa, pb)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bars", type=int, default=8_760)
+    parser.add_argument("--widths", type=int, default=50)
+    parser.add_argument("--reference", type=int, default=20, help="configs run bar by bar")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    closes = 1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.003, args.bars)))
+    # 20 triggers per width: 12 exit / buffer levels and 8 intervals.
+    buffers = np.r_[np.linspace(0, 40, 12), [math.nan] * 8]
+    intervals = np.r_[[0] * 12, np.linspace(24, 720, 8).astype(int)]
+    widths = np.repeat(np.linspace(0.5, 30, args.widths), len(buffers))
+    buffers = np.tile(buffers, args.widths)
+    intervals = np.tile(intervals, args.widths)
+
+    start = time.perf_counter()
+    sim = simulate_rebalancing(
+        closes, widths, buffers, intervals, capital=10_000, tick_spacing=60, cost_usd=1.0
+    )
+    swept = time.perf_counter() - start
+
+    picks = rng.choice(len(widths), size=min(args.reference, len(widths)), replace=False)
+    start = time.perf_counter()
+    for i in picks:
+        _bar_by_bar(closes, widths[i], buffers[i], int(intervals[i]))
+    per_config = (time.perf_counter() - start) / len(picks)
+
+    print(f"{len(widths)} configs x {args.bars} bars, {int(sim['rebalances'].sum())} rebalances")
+    print(f"  event-driven sweep      {swept * 1e3:9.0f} ms")
+    print(f"  bar-by-bar (estimated)  {per_config * len(widths) * 1e3:9.0f} ms"
+          f"  ({per_config * len(widths) / swept:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
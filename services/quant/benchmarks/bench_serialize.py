@@ -0,0 +1,79 @@
+"""Response serialization: validated ChartSeries lists vs. NumPy arrays + dumps().
+
+    uv run python -m benchmarks.bench_serialize [--bars 100000] [--repeat 5]
+
+Both paths start from the same five charted ranges.  The model path does
+what the router did before: ``.tolist()`` per array, ``ChartSeries``
+validation and ``model_dump_json()``; the array path wraps the arrays with
+``chart_series`` and encodes with :func:`app.serialization.dumps`.  The
+outputs are checked to be byte-identical.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.engine.backtest import build_series
+from app.schemas import BacktestMetrics, CandidateResult, ChartSeries, RecommendResponse
+from app.serialization import chart_series, dumps
+from benchmarks.synthetic import synthetic_klines
+
+_KEYS = ("top1", "top2", "top3", "extreme_2pct", "extreme_5pct")
+
+
+def _response(series: dict[str, ChartSeries]) -> RecommendResponse:
+    metrics = BacktestMetrics(
+        in_range_pct=80.0, touch_count=3, mean_time_to_exit_hours=12.0, lp_vs_hodl_pct=0.5,
+        max_il_pct=1.2, max_drawdown_pct=2.0, capital_efficiency=4.0,
+    )
+    card = CandidateResult(
+        strategy="quantile_P10_P90", pa=1.4, pb=1.6, tick_lower=3360, tick_upper=4680,
+        width_pct=13.3, metrics=metrics, score=71.5, insight="",
+    )
+    return RecommendResponse(
+        top3=[card] * 3, extreme_2pct=card, extreme_5pct=card, series=series,
+        current_price=1.5, pool_fee_rate=0.0025,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    klines = synthetic_klines(args.bars, seed=0)
+    timestamps, closes = klines[:, 0], klines[:, 4]
+    p0 = float(closes[0])
+    ranges = np.array([[p0 * (1 - w), p0 * (1 + w)] for w in (0.05, 0.1, 0.2, 0.02, 0.05)])
+
+    def model_path() -> bytes:
+        series = build_series(closes, timestamps, ranges, p0, 10_000.0)
+        charts = {
+            key: ChartSeries(**{k: v for k, v in s.items() if k != "markers"})
+            for key, s in zip(_KEYS, series)
+        }
+        return _response(charts).model_dump_json().encode()
+
+    def array_path() -> bytes:
+        series = build_series(closes, timestamps, ranges, p0, 10_000.0, as_arrays=True)
+        return dumps(_response({key: chart_series(s) for key, s in zip(_KEYS, series)}))
+
+    assert model_path() == array_path(), "encodings differ"
+    print(f"5 series x {args.bars} bars, {len(array_path()) / 2**20:.1f} MiB of JSON")
+    baseline = None
+    for name, fn in (("validated lists", model_path), ("arrays + dumps", array_path)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        print(f"  {name:16s} {best * 1e3:8.1f} ms  ({baseline / best:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
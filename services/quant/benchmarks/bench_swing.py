@@ -0,0 +1,62 @@
+"""Swing-range detection benchmark: O(n) rolling extrema vs. the old scan.
+
+    uv run python -m benchmarks.bench_swing [--sizes 1000,10000,...] [--reference-max 200000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.engine.candidates import generate_swing_ranges
+
+
+def _reference_swing_points(closes: np.ndarray) -> tuple[list[float], list[float]]:
+    # The pre-rolling-window implementation: one slice + min + max per bar.
+    window = max(5, len(closes) // 20)
+    local_mins: list[float] = []
+    local_maxs: list[float] = []
+    for i in range(window, len(closes) - window):
+        segment = closes[i - window : i + window + 1]
+        if closes[i] == float(np.min(segment)):
+            local_mins.append(float(closes[i]))
+        if closes[i] == float(np.max(segment)):
+            local_maxs.append(float(closes[i]))
+    return local_mins, local_maxs
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,5000,10000,50000,100000,200000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--reference-max", type=int, default=200_000,
+        help="skip the quadratic reference above this many bars",
+    )
+    args = parser.parse_args()
+
+    print(f"{'bars':>8} {'rolling ms':>11} {'reference ms':>13} {'speed-up':>9}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        rng = np.random.default_rng(n)
+        closes = 1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.002, n)))
+        fast = _best_of(lambda: generate_swing_ranges(closes), args.repeat)
+        if n <= args.reference_max:
+            slow = _best_of(lambda: _reference_swing_points(closes), 1)
+            print(f"{n:>8} {fast * 1e3:>11.2f} {slow * 1e3:>13.1f} {slow / fast:>8.0f}x")
+        else:
+            print(f"{n:>8} {fast * 1e3:>11.2f} {'-':>13} {'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Engine benchmark suite: per-stage timings and peak memory vs. a baseline.
+
+    uv run python -m benchmarks.suite [--bars 1000 10000 100000 500000]
+        [--shapes gbm trend mean_revert gaps] [--save baseline.json]
+        [--compare baseline.json --tolerance 0.25]
+
+Each stage (candidate generators, optimizer, single and batched back-test,
+scoring under one and under all profiles, and the end-to-end ``recommend()``
+handler) runs on seeded synthetic klines (:mod:`benchmarks.synthetic`) of
+every shape and size.
+The best of ``--repeat`` wall times is reported; peak memory comes from one
+extra run under ``tracemalloc`` (NumPy buffers included).  ``--compare``
+exits with status 1 if a stage is slower, or peaks higher, than the
+baseline by more than ``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import numpy as np
+
+from app.engine.backtest import run_backtest, run_backtest_batch
+from app.engine.candidates import (
+    generate_quantile_ranges,
+    generate_swing_ranges,
+    generate_volband_ranges,
+)
+from app.engine.optimizer import optimize_tick_ranges
+from app.engine.scoring import PROFILES, metric_matrix, score_candidates, score_matrix
+from app.routers import recommend
+from app.schemas import RecommendRequest
+from benchmarks.synthetic import SHAPES, recommend_payload, synthetic_klines
+
+# Stage timings below this many seconds are too noisy to gate on.
+_MIN_GATED_SECONDS = 0.005
+
+
+def _stages(klines: np.ndarray, n_candidates: int) -> dict[str, Callable[[], Any]]:
+    """Zero-argument callables per stage; all inputs are prepared up front."""
+    timestamps, closes = klines[:, 0], klines[:, 4]
+    p0 = float(closes[0])
+    half = np.linspace(0.005, 0.4, n_candidates)
+    ranges = np.column_stack([p0 * (1 - half), p0 * (1 + half)])
+    metrics = run_backtest_batch(closes, timestamps, ranges, p0, 10_000.0, 0.0025)
+    candidates = [
+        {"strategy": f"c{i}", "pa": pa, "pb": pb, "metrics": m}
+        for i, ((pa, pb), m) in enumerate(zip(ranges.tolist(), metrics))
+    ]
+    request = RecommendRequest.model_validate(recommend_payload(klines))
+
+    def end_to_end() -> Any:
+        recommend._response_cache.clear()
+        recommend._metrics_cache.clear()
+        return recommend.recommend(request)
+
+    return {
+        "generate_quantile": lambda: generate_quantile_ranges(closes),
+        "generate_volband": lambda: generate_volband_ranges(closes),
+        "generate_swing": lambda: generate_swing_ranges(closes),
+        "optimizer": lambda: optimize_tick_ranges(closes, float(closes[-1]), 60),
+        "run_backtest": lambda: run_backtest(
+            closes, timestamps, *ranges[n_candidates // 2], p0, 10_000.0, 0.0025
+        ),
+        "run_backtest_batch": lambda: run_backtest_batch(
+            closes, timestamps, ranges, p0, 10_000.0, 0.0025
+        ),
+        "score_candidates": lambda: score_candidates([dict(c) for c in candidates], "balanced"),
+        "score_profiles": lambda: score_matrix(metric_matrix(metrics), PROFILES),
+        "recommend": end_to_end,
+    }
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> tuple[float, float]:
+    """(best wall time in seconds, peak traced memory in MiB)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 2**20
+
+
+def run_suite(
+    bars: list[int], shapes: list[str], n_candidates: int, repeat: int
+) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+    for n in bars:
+        for shape in shapes:
+            klines = synthetic_klines(n, shape, seed=n)
+            for stage, fn in _stages(klines, n_candidates).items():
+                seconds, peak_mb = _measure(fn, repeat)
+                results.append(
+                    {
+                        "stage": stage,
+                        "shape": shape,
+                        "bars": n,
+                        "seconds": round(seconds, 6),
+                        "peak_mb": round(peak_mb, 3),
+                    }
+                )
+                print(
+                    f"{stage:20s} {shape:12s} {n:>8d} bars "
+                    f"{seconds * 1e3:10.2f} ms {peak_mb:9.1f} MiB",
+                    flush=True,
+                )
+    return results
+
+
+def compare(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]], tolerance: float
+) -> list[str]:
+    """Describe every result more than *tolerance* worse than its baseline."""
+    reference = {(r["stage"], r["shape"], r["bars"]): r for r in baseline}
+    regressions: list[str] = []
+    for result in results:
+        base = reference.get((result["stage"], result["shape"], result["bars"]))
+        if base is None:
+            continue
+        label = f"{result['stage']} [{result['shape']}, {result['bars']} bars]"
+        if (
+            max(result["seconds"], base["seconds"]) >= _MIN_GATED_SECONDS
+            and result["seconds"] > base["seconds"] * (1 + tolerance)
+        ):
+            regressions.append(
+                f"{label}: {result['seconds'] * 1e3:.2f} ms vs {base['seconds'] * 1e3:.2f} ms"
+            )
+        if result["peak_mb"] > base["peak_mb"] * (1 + tolerance) + 0.1:
+            regressions.append(
+                f"{label}: {result['peak_mb']:.1f} MiB vs {base['peak_mb']:.1f} MiB"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bars", type=int, nargs="+", default=[1_000, 10_000, 100_000, 500_000])
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--candidates", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="write the results to this JSON baseline")
+    parser.add_argument("--compare", help="fail on regressions against this JSON baseline")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)"
+    )
+    args = parser.parse_args()
+
+    results = run_suite(args.bars, args.shapes, args.candidates, args.repeat)
+
+    if args.save:
+        document = {
+            "meta": {
+                "python": sys.version.split()[0],
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "candidates": args.candidates,
+            },
+            "results": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(document, f, indent=1)
+        print(f"saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Seeded synthetic OHLCV klines for the benchmarks.
+
+Every generator returns an ``(n, 6)`` float64 array in the Binance kline
+layout the API takes (open_time ms, open, high, low, close, volume), so it
+can be fed to the engine as columns or to the endpoints via ``.tolist()``.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+SHAPES = ("gbm", "trend", "mean_revert", "gaps")
+
+_START_MS = 1_700_000_000_000
+_HOUR_MS = 3_600_000
+
+
+def _log_prices(n: int, shape: str, rng: np.random.Generator) -> np.ndarray:
+    """Log close path of the given shape, starting near log(1.5)."""
+    if shape == "gbm":
+        steps = rng.normal(0.0, 0.006, n)
+    elif shape == "trend":
+        # Persistent drift of about +60% over the series plus noise.
+        steps = rng.normal(0.47 / max(n, 1), 0.004, n)
+    elif shape == "mean_revert":
+        # Ornstein-Uhlenbeck around log(1.5) with a ~1-week half-life.
+        theta, sigma = 1 - 0.5 ** (1 / 168), 0.006
+        x = np.empty(n)
+        level = 0.0
+        for i, shock in enumerate(rng.normal(0.0, sigma, n)):
+            level += -theta * level + shock
+            x[i] = level
+        return np.log(1.5) + x
+    elif shape == "gaps":
+        # GBM with occasional overnight-style jumps (about 1 bar in 200).
+        steps = rng.normal(0.0, 0.006, n)
+        jumps = rng.random(n) < 0.005
+        steps[jumps] += rng.normal(0.0, 0.05, int(jumps.sum()))
+    else:
+        raise ValueError(f"shape must be one of {SHAPES}")
+    return np.log(1.5) + np.cumsum(steps)
+
+
+def synthetic_klines(n: int, shape: str = "gbm", seed: int = 0) -> np.ndarray:
+    """``(n, 6)`` hourly klines of the given *shape*; equal seeds, equal klines.
+
+    The ``gaps`` shape also has missing bars: its open times skip forward
+    by 2-24 hours where the price jumps.
+    """
+    rng = np.random.default_rng(seed)
+    closes = np.exp(_log_prices(n, shape, rng))
+    opens = np.empty(n)
+    opens[0] = closes[0]
+    opens[1:] = closes[:-1]
+    wick = np.abs(rng.normal(0.0, 0.002, (2, n)))
+    highs = np.maximum(opens, closes) * (1 + wick[0])
+    lows = np.minimum(opens, closes) * (1 - wick[1])
+    volumes = rng.lognormal(mean=8.0, sigma=0.6, size=n)
+
+    steps = np.full(n, _HOUR_MS, dtype=np.float64)
+    if shape == "gaps":
+        gap = np.abs(np.diff(np.log(closes), prepend=np.log(closes[0]))) > 0.03
+        steps[gap] *= rng.integers(2, 25, int(gap.sum()))
+    open_times = _START_MS + np.cumsum(steps) - steps[0]
+    return np.column_stack([open_times, opens, highs, lows, closes, volumes])
+
+
+def recommend_payload(klines: np.ndarray, **overrides) -> dict:
+    """``/recommend`` request body over *klines* (close of the last bar as price)."""
+    payload = {
+        "klines": klines.tolist(),
+        "current_price": float(klines[-1, 4]),
+        "tick_spacing": 60,
+        "fee_rate": 0.0025,
+        "profile": "balanced",
+        "capital_usd": 10_000,
+        "strategies": ["quantile", "volband", "swing", "optimizer"],
+    }
+    payload.update(overrides)
+    return payload
@@ -0,0 +1,39 @@
+"""Shared fixtures for the quant engine tests."""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_payload():
+    """Factory for a /recommend JSON payload over a seeded random walk."""
+
+    def _payload(n: int = 2_000, seed: int = 0, **overrides) -> dict:
+        rng = np.random.default_rng(seed)
+        closes = 1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.003, n)))
+        timestamps = 1_700_000_000_000 + 60_000 * np.arange(n)
+        klines = [
+            [float(t), float(c), float(c) * 1.001, float(c) * 0.999, float(c), 100.0]
+            for t, c in zip(timestamps, closes)
+        ]
+        payload = {
+            "klines": klines,
+            "current_price": float(closes[-1]),
+            "tick_spacing": 60,
+            "fee_rate": 0.0025,
+            "profile": "balanced",
+            "capital_usd": 10_000,
+            "strategies": ["quantile", "volband", "swing"],
+        }
+        payload.update(overrides)
+        return payload
+
+    return _payload
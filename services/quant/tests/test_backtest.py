@@ -0,0 +1,402 @@
+"""Parity tests: vectorised back-test kernel vs. the per-bar reference loop."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.engine import backtest
+from app.engine.backtest import (
+    BacktestState,
+    SlidingBacktestState,
+    _compute_liquidity,
+    _lp_value,
+    _lp_values,
+    _run_backtest_loop,
+    build_series,
+    run_backtest,
+    run_backtest_batch,
+)
+
+
+def _random_walk(n: int, seed: int, p_start: float = 1.5, vol: float = 0.002) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return p_start * np.exp(np.cumsum(rng.normal(0.0, vol, n)))
+
+
+def _timestamps(n: int, start_ms: float = 1_700_000_000_000.0, step_ms: float = 60_000.0) -> np.ndarray:
+    return start_ms + step_ms * np.arange(n, dtype=np.float64)
+
+
+def _assert_parity(closes, timestamps, pa, pb, p0, capital=10_000.0, fee_rate=0.0025):
+    expected = _run_backtest_loop(closes, timestamps, pa, pb, p0, capital, fee_rate)
+    actual = run_backtest(closes, timestamps, pa, pb, p0, capital, fee_rate)
+    assert actual["metrics"] == expected["metrics"]
+    assert actual["series"] == expected["series"]
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("half_width", [0.005, 0.02, 0.1, 0.5])
+def test_parity_random_walks(seed, half_width):
+    closes = _random_walk(2_000, seed)
+    p0 = float(closes[0])
+    _assert_parity(closes, _timestamps(len(closes)), p0 * (1 - half_width), p0 * (1 + half_width), p0)
+
+
+@pytest.mark.parametrize(
+    "pa, pb",
+    [
+        (0.5, 0.9),  # range entirely below the price path
+        (5.0, 9.0),  # range entirely above the price path
+        (1.5, 1.6),  # p0 sitting exactly on the lower bound
+        (1.4, 1.5),  # p0 sitting exactly on the upper bound
+        (1e-30, 1e-29),  # degenerate bounds get clamped
+    ],
+)
+def test_parity_range_edges(pa, pb):
+    closes = _random_walk(500, seed=42)
+    _assert_parity(closes, _timestamps(len(closes)), pa, pb, float(closes[0]))
+
+
+def test_parity_prices_exactly_on_bounds():
+    closes = np.array([1.0, 1.1, 1.2, 1.1, 1.0, 0.9, 1.0, 1.2, 1.3, 1.2], dtype=np.float64)
+    _assert_parity(closes, _timestamps(len(closes)), 1.0, 1.2, 1.1)
+
+
+def test_parity_p0_differs_from_first_close():
+    closes = _random_walk(1_000, seed=7)
+    _assert_parity(closes, _timestamps(len(closes)), 1.3, 1.7, p0=1.62)
+
+
+def test_parity_flat_series():
+    closes = np.full(100, 2.0)
+    _assert_parity(closes, _timestamps(len(closes)), 1.9, 2.1, 2.0)
+
+
+@pytest.mark.parametrize("n", [1, 2, 3])
+def test_parity_short_series(n):
+    closes = _random_walk(n, seed=3)
+    _assert_parity(closes, _timestamps(n), 1.49, 1.51, float(closes[0]))
+
+
+def test_parity_integer_timestamps_and_irregular_gaps():
+    closes = _random_walk(300, seed=11, vol=0.01)
+    rng = np.random.default_rng(11)
+    timestamps = np.cumsum(rng.integers(60_000, 3_600_000, len(closes))).astype(np.int64)
+    _assert_parity(closes, timestamps, 1.45, 1.55, float(closes[0]))
+
+
+def test_lp_values_match_scalar_helper_bitwise():
+    closes = _random_walk(5_000, seed=5, vol=0.01)
+    pa, pb = 1.3, 1.7
+    L = _compute_liquidity(10_000.0, float(closes[0]), pa, pb)
+    expected = np.array([_lp_value(L, float(p), pa, pb) for p in closes])
+    np.testing.assert_array_equal(_lp_values(L, closes, pa, pb), expected)
+
+
+def test_empty_closes_raises():
+    with pytest.raises(ValueError):
+        run_backtest(np.array([]), np.array([]), 1.0, 2.0, 1.5, 1_000.0, 0.003)
+
+
+def _ranges_around(p0: float) -> list[list[float]]:
+    return [[p0 * (1 - h), p0 * (1 + h)] for h in (0.002, 0.01, 0.03, 0.08, 0.25)] + [
+        [p0 * 0.5, p0 * 0.8],  # entirely below
+        [p0 * 1.2, p0 * 1.5],  # entirely above
+        [p0, p0 * 1.05],  # p0 on the lower bound
+    ]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_batch_matches_single_backtests(seed):
+    closes = _random_walk(3_000, seed, vol=0.004)
+    timestamps = _timestamps(len(closes))
+    p0 = float(closes[0])
+    ranges = _ranges_around(p0)
+
+    batch = run_backtest_batch(closes, timestamps, ranges, p0, 10_000.0, 0.0025)
+
+    assert len(batch) == len(ranges)
+    for (pa, pb), metrics in zip(ranges, batch):
+        expected = _run_backtest_loop(closes, timestamps, pa, pb, p0, 10_000.0, 0.0025)
+        assert metrics == expected["metrics"]
+
+
+def test_batch_row_chunking_is_transparent(monkeypatch):
+    closes = _random_walk(1_000, seed=9, vol=0.004)
+    timestamps = _timestamps(len(closes))
+    p0 = float(closes[0])
+    ranges = _ranges_around(p0)
+
+    whole = run_backtest_batch(closes, timestamps, ranges, p0, 10_000.0, 0.0025)
+    monkeypatch.setattr(backtest, "_MAX_BLOCK_CELLS", 3 * len(closes))
+    chunked = run_backtest_batch(closes, timestamps, ranges, p0, 10_000.0, 0.0025)
+
+    assert chunked == whole
+
+
+def test_batch_worker_threads_are_transparent(monkeypatch):
+    closes = _random_walk(1_000, seed=10, vol=0.004)
+    timestamps = _timestamps(len(closes))
+    highs, lows, volumes = closes * 1.002, closes * 0.998, np.full(len(closes), 50.0)
+    p0 = float(closes[0])
+    ranges = _ranges_around(p0) * 3
+    options = dict(highs=highs, lows=lows, volumes=volumes, pool_tvl=1e6, intrabar=True)
+
+    serial = run_backtest_batch(closes, timestamps, ranges, p0, 10_000.0, 0.0025, **options)
+    monkeypatch.setattr(backtest, "_MIN_PARALLEL_CELLS", 0)
+    threaded = run_backtest_batch(
+        closes, timestamps, ranges, p0, 10_000.0, 0.0025, workers=4, **options
+    )
+
+    assert threaded == serial
+
+    # A shared executor is used as given; no pool is started per call.
+    def no_pool(*args, **kwargs):
+        raise AssertionError("run_backtest_batch started its own pool")
+
+    monkeypatch.setattr(backtest, "ThreadPoolExecutor", no_pool)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        shared = run_backtest_batch(
+            closes, timestamps, ranges, p0, 10_000.0, 0.0025, workers=4, executor=executor,
+            **options,
+        )
+    assert shared == serial
+
+
+def test_build_series_matches_reference_and_shares_lists():
+    closes = _random_walk(2_000, seed=21, vol=0.004)
+    timestamps = _timestamps(len(closes))
+    p0 = float(closes[0])
+    ranges = _ranges_around(p0)
+
+    series = build_series(closes, timestamps, ranges, p0, 10_000.0)
+
+    assert len(series) == len(ranges)
+    for (pa, pb), s in zip(ranges, series):
+        expected = _run_backtest_loop(closes, timestamps, pa, pb, p0, 10_000.0, 0.0025)
+        assert s == expected["series"]
+    for key in ("timestamps", "prices", "hodl_values"):
+        assert all(s[key] is series[0][key] for s in series)
+
+
+def _split_points(n: int, seed: int) -> list[int]:
+    rng = np.random.default_rng(seed)
+    return sorted(rng.choice(np.arange(1, n), size=12, replace=False).tolist())
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_state_advance_in_chunks_matches_full_backtest(seed):
+    closes = _random_walk(3_000, seed, vol=0.004)
+    timestamps = _timestamps(len(closes))
+    p0 = float(closes[0])
+
+    for pa, pb in _ranges_around(p0):
+        state = BacktestState(pa, pb, p0, 10_000.0)
+        for chunk_c, chunk_t in zip(
+            np.split(closes, _split_points(len(closes), seed)),
+            np.split(timestamps, _split_points(len(closes), seed)),
+        ):
+            state.advance(chunk_c, chunk_t)
+        expected = _run_backtest_loop(closes, timestamps, pa, pb, p0, 10_000.0, 0.0025)
+        assert state.metrics() == expected["metrics"]
+
+
+def _window_reference(closes, timestamps, pa, pb, p0, window):
+    """Brute-force metrics of the last *window* bars (see SlidingBacktestState)."""
+    pa, pb = max(pa, 1e-18), max(pb, max(pa, 1e-18) + 1e-18)
+    state = BacktestState(pa, pb, p0, 10_000.0)
+    lp = _lp_values(state.L, closes, pa, pb)
+    hodl = state._hodl_token_x * closes + state._hodl_token_y
+    il = (lp - hodl) / hodl * 100.0
+    peak = np.maximum(np.maximum.accumulate(lp), 10_000.0)
+    dd = (peak - lp) / peak * 100.0
+    mask = (closes >= pa) & (closes <= pb)
+
+    start = max(0, len(closes) - window)
+    durations, entry = [], None
+    for i, inside in enumerate(mask):
+        was_inside = bool(mask[i - 1]) if i else False
+        if inside and not was_inside:
+            entry = timestamps[i]
+        elif was_inside and not inside:
+            if i >= start:
+                durations.append(timestamps[i] - entry)
+    if mask[-1]:
+        durations.append(timestamps[-1] - entry)
+
+    return backtest._make_metrics(
+        n=len(closes) - start,
+        pa=pa,
+        pb=pb,
+        in_range_count=int(np.count_nonzero(mask[start:])),
+        touch_count=int(np.count_nonzero(~mask[start:] & np.r_[False, mask[:-1]][start:])),
+        mean_exit_ms=float(np.mean(durations)) if durations else 0.0,
+        max_il=min(float(il[start:].min()), 0.0),
+        max_drawdown=max(float(dd[start:].max()), 0.0),
+        final_lp=float(lp[-1]),
+        final_hodl=float(hodl[-1]),
+    )
+
+
+@pytest.mark.parametrize("window", [50, 400, 5_000])
+def test_sliding_state_matches_brute_force_window(window):
+    closes = _random_walk(3_000, seed=17, vol=0.004)
+    timestamps = _timestamps(len(closes))
+    p0 = float(closes[0])
+    cuts = _split_points(len(closes), seed=17)
+
+    for pa, pb in _ranges_around(p0):
+        state = SlidingBacktestState(pa, pb, p0, 10_000.0, window=window)
+        prev = 0
+        for cut in cuts + [len(closes)]:
+            state.advance(closes[prev:cut], timestamps[prev:cut])
+            expected = _window_reference(closes[:cut], timestamps[:cut], pa, pb, p0, window)
+            assert state.metrics() == expected
+            prev = cut
+
+
+def test_sliding_state_tracks_extremum_indices():
+    closes = np.array([1.0, 0.8, 1.0, 1.0, 1.0, 1.0], dtype=np.float64)
+    timestamps = _timestamps(len(closes))
+    state = SlidingBacktestState(0.9, 1.1, 1.0, 1_000.0, window=3)
+    state.advance(closes[:2], timestamps[:2])
+    assert state.max_il_idx == 1
+    state.advance(closes[2:], timestamps[2:])
+    assert state.max_il_idx is None or state.max_il_idx >= 3
+
+
+def test_fee_accrual_hand_checked():
+    closes = np.array([1.0, 1.0, 2.0])
+    highs = np.array([1.1, 1.0, 2.0])
+    lows = np.array([0.9, 1.0, 2.0])
+    volumes = np.array([1_000.0, 500.0, 800.0])
+    timestamps = _timestamps(3, step_ms=365.0 * 24 * 3_600_000.0 / 2)
+
+    metrics = run_backtest_batch(
+        closes, timestamps, [[0.95, 1.05]], 1.0, 1_000.0, 0.01,
+        highs=highs, lows=lows, volumes=volumes, pool_tvl=50_000.0,
+    )[0]
+
+    # Bar 0 trades half its [low, high] inside the range, bar 1 has no spread
+    # and is in range, bar 2 is out of range.
+    L = _compute_liquidity(1_000.0, 1.0, 0.95, 1.05)
+    share = L / (L + 50_000.0 / 2.0)
+    fees = 0.01 * (1_000.0 * 0.5 + 500.0) * share
+    assert metrics.fees_earned == round(fees, 2)
+    assert metrics.fee_apr_pct == round(fees / 1_000.0 * 100.0, 2)  # one-year span
+    assert metrics.net_vs_hodl_pct == round(metrics.lp_vs_hodl_pct + fees / 1_500.0 * 100.0, 2)
+
+
+def test_fee_accrual_batch_matches_single_ranges(monkeypatch):
+    closes = _random_walk(1_000, seed=13, vol=0.004)
+    timestamps = _timestamps(len(closes))
+    rng = np.random.default_rng(13)
+    fee_inputs = {
+        "highs": closes * (1 + rng.uniform(0, 0.003, len(closes))),
+        "lows": closes * (1 - rng.uniform(0, 0.003, len(closes))),
+        "volumes": rng.uniform(50, 500, len(closes)),
+        "pool_tvl": 2_000_000.0,
+        "volume_scale": 0.5,
+    }
+    p0 = float(closes[0])
+    ranges = _ranges_around(p0)
+
+    batch = run_backtest_batch(closes, timestamps, ranges, p0, 10_000.0, 0.0025, **fee_inputs)
+    monkeypatch.setattr(backtest, "_MAX_BLOCK_CELLS", 3 * len(closes))
+    chunked = run_backtest_batch(closes, timestamps, ranges, p0, 10_000.0, 0.0025, **fee_inputs)
+
+    assert chunked == batch
+    for (pa, pb), metrics in zip(ranges, batch):
+        single = run_backtest(closes, timestamps, pa, pb, p0, 10_000.0, 0.0025, **fee_inputs)
+        assert single["metrics"] == metrics
+        assert metrics.fees_earned >= 0.0
+    assert batch[5].fees_earned == 0.0  # range entirely below the price path
+
+
+def test_fee_accrual_requires_pool_tvl():
+    closes = _random_walk(10, seed=1)
+    with pytest.raises(ValueError):
+        run_backtest_batch(
+            closes, _timestamps(10), [[1.4, 1.6]], 1.5, 1_000.0, 0.0025,
+            volumes=np.ones(10),
+        )
+
+
+def _intrabar_reference(closes, highs, lows, timestamps, pa, pb, p0, capital=10_000.0):
+    """Per-bar loop over (lows, highs): in-range status, exits and worst IL."""
+    pa, pb = max(pa, 1e-18), max(pb, max(pa, 1e-18) + 1e-18)
+    L = _compute_liquidity(capital, min(max(p0, pa), pb), pa, pb)
+    hodl_x, hodl_y = capital / 2.0 / p0, capital / 2.0
+    in_range_count = touch_count = 0
+    was_inside, entry, durations, max_il = False, None, [], 0.0
+    for c, hi, lo, t in zip(closes, highs, lows, timestamps):
+        hi, lo = max(hi, c), min(lo, c)
+        for p in (lo, hi):
+            hodl = hodl_x * p + hodl_y
+            max_il = min(max_il, (_lp_value(L, p, pa, pb) - hodl) / hodl * 100.0)
+        inside = lo >= pa and hi <= pb
+        in_range_count += inside
+        if inside and not was_inside:
+            entry = t
+        elif was_inside and not inside:
+            touch_count += 1
+            durations.append(t - entry)
+        was_inside = inside
+    if was_inside:
+        durations.append(timestamps[-1] - entry)
+    return in_range_count, touch_count, (np.mean(durations) if durations else 0.0), max_il
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_intrabar_mode_matches_per_bar_reference(seed):
+    closes = _random_walk(2_000, seed, vol=0.004)
+    timestamps = _timestamps(len(closes))
+    rng = np.random.default_rng(seed)
+    highs = closes * (1 + rng.exponential(0.002, len(closes)))
+    lows = closes * (1 - rng.exponential(0.002, len(closes)))
+    p0 = float(closes[0])
+    ranges = _ranges_around(p0)
+
+    close_only = run_backtest_batch(closes, timestamps, ranges, p0, 10_000.0, 0.0025)
+    intrabar = run_backtest_batch(
+        closes, timestamps, ranges, p0, 10_000.0, 0.0025,
+        highs=highs, lows=lows, intrabar=True,
+    )
+
+    for (pa, pb), base, metrics in zip(ranges, close_only, intrabar):
+        in_range_count, touches, mean_exit_ms, max_il = _intrabar_reference(
+            closes, highs, lows, timestamps, pa, pb, p0
+        )
+        assert metrics.in_range_pct == round(in_range_count / len(closes) * 100.0, 2)
+        assert metrics.touch_count == touches
+        assert metrics.mean_time_to_exit_hours == pytest.approx(
+            round(mean_exit_ms / 3_600_000.0, 2), abs=0.011
+        )
+        assert metrics.max_il_pct == pytest.approx(round(abs(max_il), 2), abs=0.011)
+        # Wicks can only add exits and deepen IL
+        assert metrics.in_range_pct <= base.in_range_pct
+        assert metrics.max_il_pct >= base.max_il_pct
+        assert metrics.lp_vs_hodl_pct == base.lp_vs_hodl_pct
+
+
+def test_intrabar_mode_counts_wick_exits():
+    closes = np.array([1.0, 1.0, 1.0, 1.0])
+    highs = np.array([1.0, 1.2, 1.0, 1.0])  # bar 1 wicks above pb
+    lows = closes.copy()
+    metrics = run_backtest_batch(
+        closes, _timestamps(4), [[0.9, 1.1]], 1.0, 1_000.0, 0.0025,
+        highs=highs, lows=lows, intrabar=True,
+    )[0]
+    assert metrics.touch_count == 1
+    assert metrics.in_range_pct == 75.0
+    assert metrics.max_il_pct > 0.0
+    assert run_backtest_batch(closes, _timestamps(4), [[0.9, 1.1]], 1.0, 1_000.0, 0.0025)[0].touch_count == 0
+
+
+def test_intrabar_mode_requires_highs_and_lows():
+    with pytest.raises(ValueError):
+        run_backtest_batch(
+            _random_walk(10, seed=1), _timestamps(10), [[1.4, 1.6]], 1.5, 1_000.0, 0.0025,
+            intrabar=True,
+        )
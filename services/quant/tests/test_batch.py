@@ -0,0 +1,96 @@
+"""Tests for the multi-pool POST /api/v1/recommend/batch endpoint."""
+
+import asyncio
+import json
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from app.config import settings
+from app.routers import batch
+from app.schemas import BatchPoolRequest, RecommendResponse
+
+
+@pytest.fixture
+def small_pool(monkeypatch):
+    monkeypatch.setattr(settings, "batch_workers", 2)
+    batch.shutdown_executor()
+    yield
+    batch.shutdown_executor()
+
+
+def test_pack_and_run_pool_in_process(make_payload):
+    pools = [
+        BatchPoolRequest(pool_id="a", **make_payload(n=300, seed=1)),
+        BatchPoolRequest(pool_id="b", **make_payload(n=1)),
+        BatchPoolRequest(pool_id="c", **make_payload(n=500, seed=2, intrabar=True)),
+    ]
+    shm, tasks, errors = batch._pack(pools)
+    try:
+        assert [t.pool_id for t in tasks] == ["a", "c"]
+        assert tasks[1].bar_names == ("highs", "lows")
+        assert json.loads(errors[0])["error"]["status_code"] == 400
+
+        line = json.loads(batch._run_pool(tasks[1]))
+        assert (line["index"], line["pool_id"], line["error"]) == (2, "c", None)
+        RecommendResponse.model_validate(line["result"])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_batch_endpoint_streams_one_line_per_pool(client, make_payload, small_pool):
+    payloads = [make_payload(n=400, seed=seed) for seed in range(3)]
+    body = {
+        "pools": [dict(p, pool_id=f"pool-{i}") for i, p in enumerate(payloads)]
+        + [dict(make_payload(n=1), pool_id="too-short")]
+    }
+
+    res = client.post("/api/v1/recommend/batch", json=body)
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith(batch.NDJSON_MEDIA_TYPE)
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    by_index = {line["index"]: line for line in lines}
+    assert sorted(by_index) == [0, 1, 2, 3]
+    assert by_index[3]["error"]["status_code"] == 400
+    for i, payload in enumerate(payloads):
+        expected = client.post("/api/v1/recommend", json=payload).json()
+        assert by_index[i]["pool_id"] == f"pool-{i}"
+        assert by_index[i]["result"] == expected
+
+
+def test_batch_rejects_too_many_pools(client, make_payload, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_pools", 1)
+    pool = dict(make_payload(n=10), pool_id="x")
+    res = client.post("/api/v1/recommend/batch", json={"pools": [pool, pool]})
+    assert res.status_code == 400
+
+
+def test_workers_run_the_pipeline_single_threaded(monkeypatch):
+    monkeypatch.setattr(settings, "backtest_workers", 0)
+    monkeypatch.setattr(settings, "simulation_workers", 0)
+    batch._init_worker()
+    assert (settings.backtest_workers, settings.simulation_workers) == (1, 1)
+
+
+def test_stream_allocates_and_releases_its_shared_memory(make_payload, monkeypatch, small_pool):
+    pack, blocks = batch._pack, []
+
+    def recording_pack(pools):
+        shm, tasks, errors = pack(pools)
+        blocks.append(shm.name)
+        return shm, tasks, errors
+
+    monkeypatch.setattr(batch, "_pack", recording_pack)
+    stream = batch._stream([BatchPoolRequest(pool_id="a", **make_payload(n=300, seed=1))])
+    assert blocks == []  # nothing is allocated for a body that is never sent
+
+    async def first_line() -> bytes:
+        line = await stream.__anext__()
+        await stream.aclose()
+        return line
+
+    assert json.loads(asyncio.run(first_line()))["pool_id"] == "a"
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=blocks[0])
@@ -0,0 +1,128 @@
+"""Tests for the in-process result caches."""
+
+import numpy as np
+import pytest
+
+from app.cache import TTLCache, kline_digest
+from app.routers import recommend as recommend_router
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_eviction_and_counters():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" becomes most recently used
+    cache.set("c", 3)  # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1, 1)
+
+
+def test_entries_expire_after_ttl():
+    clock = _Clock()
+    cache = TTLCache(max_entries=4, ttl_seconds=10, clock=clock)
+    cache.set("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_zero_capacity_disables_cache():
+    cache = TTLCache(max_entries=0, ttl_seconds=10)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_byte_budget_evicts_and_skips_oversized_values():
+    cache = TTLCache(max_entries=10, ttl_seconds=60, max_bytes=100)
+    cache.set("a", 1, nbytes=40)
+    cache.set("b", 2, nbytes=40)
+    cache.set("a", 3, nbytes=50)  # refreshing "a" replaces its size
+    assert cache.stats()["bytes"] == 90
+    cache.set("c", 4, nbytes=30)  # evicts "b"
+    assert (cache.get("b"), cache.get("a"), cache.get("c")) == (None, 3, 4)
+    assert cache.stats()["bytes"] == 80
+
+    cache.set("big", 5, nbytes=101)
+    assert cache.get("big") is None
+    assert len(cache) == 2
+
+
+def test_kline_digest_is_content_addressed():
+    a = np.arange(10, dtype=np.float64)
+    assert kline_digest(a, a * 2) == kline_digest(a.copy(), a * 2)
+    assert kline_digest(a, a * 2) != kline_digest(a, a * 3)
+    assert kline_digest(a[:5], a[5:]) != kline_digest(a[:4], a[4:])
+
+
+@pytest.fixture
+def fresh_caches(monkeypatch):
+    responses = TTLCache(max_entries=8, ttl_seconds=60)
+    metrics = TTLCache(max_entries=64, ttl_seconds=60)
+    monkeypatch.setattr(recommend_router, "_response_cache", responses)
+    monkeypatch.setattr(recommend_router, "_metrics_cache", metrics)
+    return responses, metrics
+
+
+def test_repeated_request_is_served_from_cache(client, make_payload, fresh_caches, monkeypatch):
+    responses, _ = fresh_caches
+    payload = make_payload(seed=1)
+    first = client.post("/api/v1/recommend", json=payload)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("back-test should not run on a cache hit")
+
+    monkeypatch.setattr(recommend_router, "run_backtest_batch", _fail)
+    second = client.post("/api/v1/recommend", json=payload)
+
+    assert second.content == first.content
+    assert responses.stats()["hits"] == 1
+
+
+def test_profile_change_rescores_cached_metrics(client, make_payload, fresh_caches, monkeypatch):
+    _, metrics = fresh_caches
+    client.post("/api/v1/recommend", json=make_payload(seed=2, profile="balanced"))
+    misses = metrics.stats()["misses"]
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("metrics should come from the cache")
+
+    monkeypatch.setattr(recommend_router, "run_backtest_batch", _fail)
+    res = client.post("/api/v1/recommend", json=make_payload(seed=2, profile="aggressive"))
+
+    assert res.status_code == 200
+    assert metrics.stats()["misses"] == misses
+
+
+def test_response_cache_is_bounded_by_series_bytes(client, make_payload, monkeypatch):
+    responses = TTLCache(max_entries=8, ttl_seconds=60, max_bytes=250_000)
+    monkeypatch.setattr(recommend_router, "_response_cache", responses)
+
+    # 1000 bars: 3 shared + 2 x 5 per-range float64 arrays = 104 kB
+    client.post("/api/v1/recommend", json=make_payload(n=1_000, seed=3))
+    client.post("/api/v1/recommend", json=make_payload(n=1_000, seed=4))
+    assert (len(responses), responses.stats()["bytes"]) == (2, 208_000)
+
+    client.post("/api/v1/recommend", json=make_payload(n=4_000, seed=3))  # too large
+    client.post("/api/v1/recommend", json=make_payload(n=1_000, seed=5))  # evicts seed 3
+    assert (len(responses), responses.stats()["bytes"]) == (2, 208_000)
+    assert responses.stats()["evictions"] == 1
+
+
+def test_cache_stats_endpoint(client):
+    body = client.get("/api/v1/cache/stats").json()
+    assert set(body) == {"responses", "metrics"}
+    assert {"hits", "misses", "size", "max_entries", "ttl_seconds"} <= set(body["responses"])
@@ -0,0 +1,60 @@
+"""Tests for candidate range generation."""
+
+import numpy as np
+import pytest
+
+from app.engine.candidates import generate_swing_ranges
+from app.engine.rolling import rolling_max, rolling_min
+
+
+def _swing_ranges_reference(closes: np.ndarray) -> list[tuple[float, float, str]]:
+    """The original O(n * window) swing detector, kept as the regression oracle."""
+    if len(closes) < 10:
+        return []
+    window = max(5, len(closes) // 20)
+    ranges = []
+    local_mins, local_maxs = [], []
+    for i in range(window, len(closes) - window):
+        segment = closes[i - window : i + window + 1]
+        if closes[i] == float(np.min(segment)):
+            local_mins.append(float(closes[i]))
+        if closes[i] == float(np.max(segment)):
+            local_maxs.append(float(closes[i]))
+    if local_mins and local_maxs:
+        pa = float(np.median(local_mins[-3:])) if len(local_mins) >= 3 else float(min(local_mins))
+        pb = float(np.median(local_maxs[-3:])) if len(local_maxs) >= 3 else float(max(local_maxs))
+        if pa < pb:
+            ranges.append((pa, pb, "swing_recent"))
+        pa, pb = float(min(local_mins)), float(max(local_maxs))
+        if pa < pb:
+            ranges.append((pa, pb, "swing_full"))
+    return ranges
+
+
+@pytest.mark.parametrize("n", [0, 9, 10, 11, 25, 100, 237, 1_000, 5_003])
+@pytest.mark.parametrize("seed", range(3))
+def test_swing_ranges_match_reference(n, seed):
+    rng = np.random.default_rng(seed)
+    closes = 1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.01, n)))
+    assert generate_swing_ranges(closes) == _swing_ranges_reference(closes)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_swing_ranges_match_reference_with_plateaus(seed):
+    # Coarse ticks produce many equal prices, exercising the tie handling.
+    rng = np.random.default_rng(seed)
+    closes = np.round(1.5 + np.cumsum(rng.normal(0.0, 0.004, 2_000)), 2)
+    assert generate_swing_ranges(closes) == _swing_ranges_reference(closes)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 99, 100])
+def test_rolling_extrema_match_naive(size):
+    values = np.random.default_rng(size).normal(size=100)
+    expected_min = np.array([values[j : j + size].min() for j in range(len(values) - size + 1)])
+    expected_max = np.array([values[j : j + size].max() for j in range(len(values) - size + 1)])
+    np.testing.assert_array_equal(rolling_min(values, size), expected_min)
+    np.testing.assert_array_equal(rolling_max(values, size), expected_max)
+
+
+def test_rolling_window_longer_than_series_is_empty():
+    assert len(rolling_min(np.arange(3.0), 4)) == 0
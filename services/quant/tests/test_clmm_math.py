@@ -0,0 +1,162 @@
+"""Tests for the contract-exact Q64.64 CLMM math and the exact_math option."""
+
+import math
+
+import numpy as np
+import pytest
+
+from app.engine.clmm_math import (
+    MAX_SQRT_PRICE_X64,
+    MIN_SQRT_PRICE_X64,
+    Q64,
+    align_range_exact,
+    get_amount_by_liquidity,
+    get_delta_a,
+    get_delta_b,
+    get_liquidity_from_amount,
+    get_liquidity_from_value,
+    get_sqrt_price_at_tick,
+    get_sqrt_prices_at_ticks,
+    get_tick_at_sqrt_price,
+    price_to_sqrt_price,
+    sqrt_price_to_price,
+    sqrt_prices_at_aligned,
+)
+from app.engine.tick_math import MAX_TICK, MIN_TICK, tick_to_price
+
+
+def test_sqrt_price_at_tick_hits_the_contract_bounds():
+    assert get_sqrt_price_at_tick(MIN_TICK) == MIN_SQRT_PRICE_X64
+    assert get_sqrt_price_at_tick(MAX_TICK) == MAX_SQRT_PRICE_X64
+    assert get_sqrt_price_at_tick(0) == Q64
+    for tick in (-50_000, -1, 1, 50_000):
+        exact = get_sqrt_price_at_tick(tick) / Q64
+        assert exact == pytest.approx(math.sqrt(tick_to_price(tick)), rel=1e-12)
+    with pytest.raises(ValueError):
+        get_sqrt_price_at_tick(MAX_TICK + 1)
+
+
+def test_batched_and_table_sqrt_prices_match_scalar():
+    rng = np.random.default_rng(0)
+    ticks = np.concatenate([rng.integers(MIN_TICK, MAX_TICK + 1, 3_000), [MIN_TICK, 0, MAX_TICK]])
+    expected = [get_sqrt_price_at_tick(int(t)) for t in ticks]
+    assert get_sqrt_prices_at_ticks(ticks).tolist() == expected
+
+    aligned = ticks // 60 * 60
+    aligned = aligned[aligned >= MIN_TICK]
+    assert sqrt_prices_at_aligned(aligned, 60).tolist() == [
+        get_sqrt_price_at_tick(int(t)) for t in aligned
+    ]
+    with pytest.raises(ValueError):
+        sqrt_prices_at_aligned([61], 60)
+
+
+def test_tick_at_sqrt_price_inverts_exactly():
+    rng = np.random.default_rng(1)
+    for tick in rng.integers(MIN_TICK + 1, MAX_TICK, 500).tolist():
+        sqrt_price = get_sqrt_price_at_tick(tick)
+        assert get_tick_at_sqrt_price(sqrt_price) == tick
+        assert get_tick_at_sqrt_price(sqrt_price - 1) == tick - 1
+    assert get_tick_at_sqrt_price(MAX_SQRT_PRICE_X64) == MAX_TICK
+
+
+def test_price_conversions_round_trip():
+    for price in (1e-12, 0.0015, 1.0, 3.7, 1e9):
+        sqrt_price = price_to_sqrt_price(price)
+        assert sqrt_price**2 <= price * 2**128 < (sqrt_price + 1) ** 2
+        assert sqrt_price_to_price(sqrt_price) == pytest.approx(price, rel=1e-15)
+
+
+def test_align_range_exact_snaps_outwards_and_never_collapses():
+    lower, upper = align_range_exact(0.0012, 0.0018, 60)
+    assert lower % 60 == 0 and upper % 60 == 0
+    assert sqrt_price_to_price(get_sqrt_price_at_tick(lower)) <= 0.0012
+    assert sqrt_price_to_price(get_sqrt_price_at_tick(upper)) >= 0.0018
+
+    assert align_range_exact(1.0, 1.0, 60) == (0, 60)
+    lower, upper = align_range_exact(1e-40, 1e40, 200)
+    assert lower >= MIN_TICK and upper <= MAX_TICK and upper - lower > 0
+
+
+def test_amount_rounding_matches_the_contract():
+    sqrt_lower, sqrt_upper = get_sqrt_price_at_tick(-600), get_sqrt_price_at_tick(600)
+    liquidity = 123_456_789_012
+    down_a = get_delta_a(sqrt_lower, sqrt_upper, liquidity, False)
+    up_a = get_delta_a(sqrt_lower, sqrt_upper, liquidity, True)
+    down_b = get_delta_b(sqrt_lower, sqrt_upper, liquidity, False)
+    up_b = get_delta_b(sqrt_lower, sqrt_upper, liquidity, True)
+    assert up_a == down_a + 1 and up_b == down_b + 1
+
+    # Object arrays go through the same expressions element-wise.
+    batch = get_delta_a(
+        np.array([sqrt_lower, sqrt_lower], dtype=object),
+        np.array([sqrt_upper, sqrt_upper], dtype=object),
+        np.array([liquidity, 2 * liquidity], dtype=object),
+        True,
+    )
+    assert batch.tolist() == [up_a, get_delta_a(sqrt_lower, sqrt_upper, 2 * liquidity, True)]
+
+    # Fixing token A: the contract never takes more A than offered.
+    current = get_sqrt_price_at_tick(100)
+    liquidity, amount_a, amount_b = get_liquidity_from_amount(-600, 600, 100, current, 10**9, True)
+    taken_a, taken_b = get_amount_by_liquidity(-600, 600, 100, current, liquidity, True)
+    assert taken_a <= amount_a == 10**9 and taken_b == amount_b
+    with pytest.raises(ValueError):
+        get_liquidity_from_amount(-600, 600, 700, get_sqrt_price_at_tick(700), 10**9, True)
+
+
+@pytest.mark.parametrize("current_tick", [-1_000, 90, 1_000])
+def test_liquidity_from_value_is_the_largest_within_budget(current_tick):
+    current = get_sqrt_price_at_tick(current_tick) + 12_345
+    price = current**2 / 2**128
+    budget = 10**12
+
+    def value(liquidity):
+        amount_a, amount_b = get_amount_by_liquidity(
+            -600, 600, current_tick, current, liquidity, False
+        )
+        return amount_a * price + amount_b
+
+    liquidity = get_liquidity_from_value(budget, -600, 600, current_tick, current)
+    assert value(liquidity) <= budget * (1 + 1e-12)
+    assert value(liquidity) == pytest.approx(budget, rel=1e-9)
+
+    # Precomputed sqrt prices (as the router passes from the table) change nothing.
+    table = tuple(sqrt_prices_at_aligned([-600, 600], 60).tolist())
+    assert get_liquidity_from_value(
+        budget, -600, 600, current_tick, current, sqrt_prices=table
+    ) == liquidity
+    assert get_amount_by_liquidity(
+        -600, 600, current_tick, current, liquidity, True, sqrt_prices=table
+    ) == get_amount_by_liquidity(-600, 600, current_tick, current, liquidity, True)
+
+
+def test_recommend_exact_math_returns_contract_positions(client, make_payload):
+    # SUI (9 decimals) / USDC (6 decimals): raw price = price * 1e-3
+    payload = make_payload(
+        n=500, exact_math=True, decimals_a=9, decimals_b=6,
+        strategies=["quantile", "swing", "optimizer"],
+    )
+    res = client.post("/api/v1/recommend", json=payload)
+
+    assert res.status_code == 200
+    data = res.json()
+    for cand in [*data["top3"], data["extreme_2pct"], data["extreme_5pct"]]:
+        lower, upper = cand["tick_lower"], cand["tick_upper"]
+        assert lower % 60 == 0 and upper % 60 == 0 and lower < upper
+        position = cand["position"]
+        assert int(position["sqrt_price_lower_x64"]) == get_sqrt_price_at_tick(lower)
+        assert cand["pa"] == pytest.approx(sqrt_price_to_price(get_sqrt_price_at_tick(lower)) * 1e3)
+        # The deposit is worth capital_usd (token B has 6 decimals).
+        deposit = int(position["amount_a"]) * 1e-9 * payload["current_price"]
+        deposit += int(position["amount_b"]) * 1e-6
+        assert deposit == pytest.approx(payload["capital_usd"], rel=1e-6)
+
+    plain = client.post("/api/v1/recommend", json=make_payload(n=500)).json()
+    assert plain["extreme_2pct"].get("position") is None
+    assert data["extreme_2pct"]["pa"] == pytest.approx(plain["extreme_2pct"]["pa"], rel=0.01)
+
+
+def test_recommend_exact_math_rejects_out_of_range_prices(client, make_payload):
+    payload = make_payload(n=100, exact_math=True, decimals_a=0, decimals_b=30)
+    assert client.post("/api/v1/recommend", json=payload).status_code == 400
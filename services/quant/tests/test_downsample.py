@@ -0,0 +1,66 @@
+"""Tests for min/max bucketed chart-series downsampling."""
+
+import numpy as np
+import pytest
+
+from app.engine.backtest import build_series
+from app.engine.downsample import minmax_index
+
+
+def _random_walk(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.004, n)))
+
+
+def test_short_series_are_left_alone():
+    assert minmax_index(np.arange(100.0), 100) is None
+
+
+@pytest.mark.parametrize("n, max_points", [(1_000, 64), (10_001, 500), (130_000, 2_000)])
+def test_index_keeps_bucket_extremes_and_extra_bars(n, max_points):
+    values = _random_walk(n, seed=n)
+    keep = [7, n // 2, n - 3]
+
+    index = minmax_index(values, max_points, keep=keep)
+
+    assert len(index) <= max_points
+    assert np.all(np.diff(index) > 0)
+    assert {0, n - 1, *keep} <= set(index.tolist())
+    assert values[index].min() == values.min()
+    assert values[index].max() == values.max()
+
+
+def test_downsampled_series_match_full_resolution_values():
+    closes = _random_walk(20_000, seed=3)
+    timestamps = 1_700_000_000_000.0 + 60_000.0 * np.arange(len(closes))
+    p0 = float(closes[0])
+    ranges = [[p0 * 0.9, p0 * 1.1], [p0 * 0.97, p0 * 1.03], [p0 * 0.5, p0 * 2.0]]
+
+    full = build_series(closes, timestamps, ranges, p0, 10_000.0)
+    small = build_series(closes, timestamps, ranges, p0, 10_000.0, max_points=800)
+
+    for f, s in zip(full, small):
+        assert len(s["timestamps"]) <= 800
+        positions = np.searchsorted(f["timestamps"], s["timestamps"])
+        for key in ("lp_values", "hodl_values", "il_pct", "prices"):
+            assert s[key] == [f[key][i] for i in positions]
+        for key in ("lp_values", "hodl_values", "prices"):
+            assert min(s[key]) == min(f[key]) and max(s[key]) == max(f[key])
+        assert min(s["il_pct"]) == min(f["il_pct"])  # worst IL survives
+        assert s["markers"] == f["markers"]
+        assert {m["time"] for m in s["markers"]} <= set(s["timestamps"])
+    assert all(s["timestamps"] is small[0]["timestamps"] for s in small)
+
+
+def test_recommend_max_points(client, make_payload):
+    res = client.post("/api/v1/recommend", json=make_payload(n=5_000, max_points=300))
+
+    assert res.status_code == 200
+    for series in res.json()["series"].values():
+        assert len(series["timestamps"]) <= 300
+        assert len(series["lp_values"]) == len(series["timestamps"])
+
+
+def test_recommend_rejects_tiny_point_budget(client, make_payload):
+    res = client.post("/api/v1/recommend", json=make_payload(n=100, max_points=3))
+    assert res.status_code == 422
@@ -0,0 +1,67 @@
+"""Tests for per-stage timing, /metrics and the slow-request profiler."""
+
+import pytest
+
+from app.config import settings
+from app.instrumentation import Histogram, stage
+
+
+@pytest.fixture
+def instrumented(monkeypatch):
+    monkeypatch.setattr(settings, "instrumentation", True)
+
+
+def test_stage_is_a_no_op_without_a_trace():
+    with stage("anything"):
+        pass
+
+
+def test_server_timing_lists_pipeline_stages(client, make_payload, instrumented):
+    resp = client.post("/api/v1/recommend", json=make_payload(seed=2201))
+    assert resp.status_code == 200
+    timing = resp.headers["server-timing"]
+    for name in ("validate", "generate", "align", "backtest", "score", "total"):
+        assert f"{name};dur=" in timing
+    assert 'bars;desc="2000"' in timing
+
+
+def test_no_header_when_disabled(client, make_payload):
+    resp = client.post("/api/v1/recommend", json=make_payload(seed=2202))
+    assert resp.status_code == 200
+    assert "server-timing" not in resp.headers
+
+
+def test_metrics_exposes_stage_histograms(client, make_payload, instrumented):
+    client.post("/api/v1/recommend", json=make_payload(seed=2203))
+    body = client.get("/metrics").text
+    assert 'quant_stage_seconds_bucket{route="/api/v1/recommend",stage="backtest",le="+Inf"}' in body
+    assert 'quant_request_size_count{route="/api/v1/recommend",kind="bars"}' in body
+    assert "# TYPE quant_response_bytes histogram" in body
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("h", "test", (1.0, 10.0), ("k",))
+    for value in (0.5, 5.0, 50.0):
+        h.observe(value, "a")
+    lines = h.render()
+    assert 'h_bucket{k="a",le="1"} 1' in lines
+    assert 'h_bucket{k="a",le="10"} 2' in lines
+    assert 'h_bucket{k="a",le="+Inf"} 3' in lines
+    assert 'h_count{k="a"} 3' in lines
+
+
+def test_slow_requests_write_folded_stacks(
+    client, make_payload, instrumented, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(settings, "profile_slow_ms", 1e-6)
+    monkeypatch.setattr(settings, "profile_interval_ms", 0.5)
+    monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+    resp = client.post("/api/v1/recommend", json=make_payload(n=20_000, seed=2204))
+    assert resp.status_code == 200
+
+    files = list(tmp_path.glob("*-api_v1_recommend-*.folded"))
+    assert len(files) == 1
+    lines = files[0].read_text().splitlines()
+    assert lines
+    stack, n = lines[0].rsplit(" ", 1)
+    assert int(n) >= 1 and "recommend.py" in stack
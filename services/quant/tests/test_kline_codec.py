@@ -0,0 +1,87 @@
+"""Tests for the columnar binary kline encoding and /recommend/binary."""
+
+import json
+
+import numpy as np
+import pytest
+
+from app.kline_codec import (
+    KlineBufferError,
+    MEDIA_TYPE,
+    decode_kline_buffer,
+    encode_kline_buffer,
+)
+
+
+def _encode_payload(payload: dict) -> bytes:
+    params = {k: v for k, v in payload.items() if k != "klines"}
+    columns = np.array(payload["klines"], dtype=np.float64).T
+    return encode_kline_buffer(json.dumps(params).encode(), columns)
+
+
+def test_round_trip_is_zero_copy():
+    columns = np.arange(6 * 7, dtype=np.float64).reshape(6, 7)
+    buf = encode_kline_buffer(b'{"a": 1}', columns)
+
+    params_json, decoded = decode_kline_buffer(buf)
+
+    assert params_json == b'{"a": 1}'
+    np.testing.assert_array_equal(decoded, columns)
+    assert not decoded.flags.owndata
+    assert not decoded.flags.writeable
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda b: b[:10],  # truncated header
+        lambda b: b"XXXX" + b[4:],  # bad magic
+        lambda b: b[:-8],  # truncated data
+    ],
+)
+def test_malformed_buffers_are_rejected(mutate):
+    buf = encode_kline_buffer(b"{}", np.zeros((5, 4)))
+    with pytest.raises(KlineBufferError):
+        decode_kline_buffer(mutate(buf))
+
+
+def test_binary_endpoint_matches_json_endpoint(client, make_payload):
+    payload = make_payload()
+
+    json_res = client.post("/api/v1/recommend", json=payload)
+    bin_res = client.post(
+        "/api/v1/recommend/binary",
+        content=_encode_payload(payload),
+        headers={"Content-Type": MEDIA_TYPE},
+    )
+
+    assert bin_res.status_code == 200
+    assert bin_res.content == json_res.content
+
+
+def test_binary_endpoint_reports_bad_payloads(client, make_payload):
+    payload = make_payload()
+
+    res = client.post("/api/v1/recommend/binary", content=b"nope")
+    assert res.status_code == 400
+
+    bad_params = make_payload(tick_spacing="wide")
+    res = client.post("/api/v1/recommend/binary", content=_encode_payload(bad_params))
+    assert res.status_code == 422
+
+    del payload["current_price"]
+    res = client.post("/api/v1/recommend/binary", content=_encode_payload(payload))
+    assert res.status_code == 422
+
+
+def test_binary_endpoint_fees_need_volume_column(client, make_payload):
+    payload = make_payload(n=100, simulate_fees=True, pool_tvl_usd=1e6)
+    payload["klines"] = [k[:5] for k in payload["klines"]]
+
+    res = client.post(
+        "/api/v1/recommend/binary",
+        content=_encode_payload(payload),
+        headers={"Content-Type": MEDIA_TYPE},
+    )
+
+    assert res.status_code == 400
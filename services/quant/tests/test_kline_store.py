@@ -0,0 +1,80 @@
+"""Tests for the memory-mapped kline store and /recommend/stored."""
+
+import numpy as np
+import pytest
+
+from app.kline_store import INDEX_STRIDE, KlineStore, KlineStoreError
+from app.routers import klines as klines_router
+
+
+def _columns(n: int, start: int = 0) -> np.ndarray:
+    rows = np.arange(start, start + n, dtype=np.float64)
+    return np.vstack([1_000.0 * rows, rows, rows + 0.5, rows - 0.5, rows + 0.25, rows * 0 + 7])
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch) -> KlineStore:
+    store = KlineStore(str(tmp_path))
+    monkeypatch.setattr(klines_router, "_store", store)
+    return store
+
+
+def test_append_dedupes_and_reopens(store):
+    series = store.series("0xpool", "SUI-USDC", "1h")
+    assert series.append(_columns(3_000)) == 3_000
+    # Overlap with stored bars and a duplicate inside the batch are dropped.
+    overlap = np.hstack([_columns(100, 2_950), _columns(1, 3_049)])
+    assert series.append(overlap[:, ::-1]) == 50
+    assert series.append(_columns(10)) == 0
+
+    reopened = KlineStore(store.root).series("0xpool", "SUI-USDC", "1h")
+    assert len(reopened) == 3_050
+    np.testing.assert_array_equal(np.vstack(reopened.read()), _columns(3_050))
+
+
+def test_read_slices_by_time_without_copying(store):
+    series = store.series("0xpool", "SUI-USDC", "1h")
+    series.append(_columns(5 * INDEX_STRIDE + 7))
+    times = _columns(5 * INDEX_STRIDE + 7)[0]
+    for start, end in [(None, None), (2_000.0, 9_000.5), (1_023_000.0, 1_025_000.0),
+                       (-5.0, 0.0), (10.0**9, None), (9_000.0, 8_000.0)]:
+        lo = 0 if start is None else np.searchsorted(times, start, "left")
+        hi = len(times) if end is None else np.searchsorted(times, end, "right")
+        assert series.span(start, end) == (lo, max(lo, hi))
+
+    open_time, *_, close, _ = series.read(2_000.0, 4_000.0)
+    np.testing.assert_array_equal(close, [2.25, 3.25, 4.25])
+    assert isinstance(open_time, np.memmap)
+    assert not open_time.flags.writeable
+
+
+def test_invalid_keys_and_klines(store, client):
+    with pytest.raises(KlineStoreError):
+        store.series("..", "SUI-USDC", "1h")
+    res = client.post("/api/v1/klines/0xpool/SUI-USDC/1h", json={"klines": [[1, 2, 3, 4, 5]]})
+    assert res.status_code == 400
+    res = client.get("/api/v1/klines/0xpool/.hidden/1h")
+    assert res.status_code == 400
+
+
+def test_recommend_stored_matches_posted_klines(store, client, make_payload):
+    payload = make_payload(n=1_200, seed=11, simulate_fees=True, pool_tvl_usd=1e6)
+    klines = payload.pop("klines")
+
+    res = client.post("/api/v1/klines/0xpool/SUI-USDC/1m", json={"klines": klines[:1_000]})
+    assert res.json() == {
+        "pool_id": "0xpool", "pair": "SUI-USDC", "interval": "1m", "bars": 1_000,
+        "first_open_time": klines[0][0], "last_open_time": klines[999][0], "appended": 1_000,
+    }
+
+    series = {"pool_id": "0xpool", "pair": "SUI-USDC", "interval": "1m"}
+    start, end = klines[100][0], klines[-1][0]
+    stored = client.post(
+        "/api/v1/recommend/stored",
+        json={**payload, "series": series, "start_ms": start, "end_ms": end,
+              "klines": klines[900:]},
+    )
+    posted = client.post("/api/v1/recommend", json={**payload, "klines": klines[100:]})
+    assert stored.status_code == 200
+    assert stored.json() == posted.json()
+    assert client.get("/api/v1/klines/0xpool/SUI-USDC/1m").json()["bars"] == 1_200
@@ -0,0 +1,93 @@
+"""Tests for the tick-lattice range optimizer."""
+
+import numpy as np
+import pytest
+
+from app.engine.optimizer import (
+    COVERAGE_LEVELS,
+    optimize_tick_ranges,
+    pareto_front,
+    range_coverage,
+)
+from app.engine.tick_math import price_to_tick, tick_to_price
+
+
+def _random_walk(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.003, n)))
+
+
+def test_range_coverage_matches_brute_force():
+    closes = _random_walk(2_000, seed=0)
+    closes[::50] = 1.5  # exact hits on a bound
+    pa = np.array([1.2, 1.4, 1.5, 1.55])
+    pb = np.array([1.5, 1.6, 1.8])
+
+    coverage = range_coverage(np.sort(closes), pa, pb)
+
+    for i, lo in enumerate(pa):
+        for j, hi in enumerate(pb):
+            if lo <= hi:
+                assert coverage[i, j] == np.count_nonzero((closes >= lo) & (closes <= hi))
+
+
+def test_pareto_front_is_the_non_dominated_set():
+    rng = np.random.default_rng(1)
+    coverage = rng.integers(0, 50, size=(12, 9))
+    width = rng.integers(1, 30, size=(12, 9))
+
+    front = set(pareto_front(coverage, width).tolist())
+
+    c, w = coverage.ravel(), width.ravel()
+    for idx in range(len(c)):
+        dominated = np.any((c >= c[idx]) & (w <= w[idx]) & ((c > c[idx]) | (w < w[idx])))
+        if dominated:
+            assert idx not in front
+    # One representative per (coverage, width) value on the front
+    assert len({(c[i], w[i]) for i in front}) == len(front)
+
+
+@pytest.mark.parametrize("tick_spacing", [1, 10, 60, 200])
+def test_optimizer_picks_bracket_current_price(tick_spacing):
+    closes = _random_walk(3_000, seed=2)
+    current = float(closes[-1])
+
+    picks = optimize_tick_ranges(closes, current, tick_spacing)
+
+    assert picks
+    current_tick = price_to_tick(current)
+    widths = []
+    for tick_lower, tick_upper, label in picks:
+        assert tick_lower % tick_spacing == 0 and tick_upper % tick_spacing == 0
+        assert tick_lower <= current_tick < tick_upper
+        widths.append(tick_upper - tick_lower)
+        if label != "optimizer_max":
+            level = int(label.removeprefix("optimizer_cov"))
+            pa, pb = tick_to_price(tick_lower), tick_to_price(tick_upper)
+            inside = np.count_nonzero((closes >= pa) & (closes <= pb))
+            assert inside / len(closes) * 100.0 >= level
+    assert widths == sorted(widths)
+    assert picks[-1][2] == "optimizer_max"
+
+
+def test_optimizer_keeps_best_range_when_no_level_is_reached():
+    closes = np.r_[np.full(900, 3.0), np.full(100, 1.5)]  # mostly outside 30%
+
+    picks = optimize_tick_ranges(closes, 1.5, 60)
+
+    assert [label for _, _, label in picks] == ["optimizer_max"]
+
+
+def test_optimizer_returns_nothing_when_history_is_far_away():
+    closes = _random_walk(500, seed=3)
+    assert optimize_tick_ranges(closes, 10.0, 60) == []
+
+
+def test_recommend_with_optimizer_strategy(client, make_payload):
+    res = client.post("/api/v1/recommend", json=make_payload(strategies=["optimizer"]))
+
+    assert res.status_code == 200
+    body = res.json()
+    assert len(body["top3"]) == 3
+    labels = {f"optimizer_cov{lvl}" for lvl in COVERAGE_LEVELS} | {"optimizer_max"}
+    assert {c["strategy"] for c in body["top3"]} <= labels
@@ -0,0 +1,78 @@
+"""Tests for the sorted-price index and the quantile generator built on it."""
+
+import numpy as np
+
+from app.engine.backtest import run_backtest_batch
+from app.engine.candidates import generate_quantile_ranges
+from app.engine.optimizer import optimize_tick_ranges
+from app.engine.price_index import SortedPrices, sorted_percentiles
+
+
+def _random_walk(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.round(1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.004, n))), 3)
+
+
+def test_sorted_percentiles_match_numpy():
+    rng = np.random.default_rng(0)
+    q = np.array([0, 5, 10, 25, 50, 75, 90, 95, 100])
+    for n in (1, 2, 3, 24, 999):
+        values = rng.random(n)
+        np.testing.assert_array_equal(
+            sorted_percentiles(np.sort(values), q), np.percentile(values, q)
+        )
+
+
+def test_count_in_range_matches_a_mask():
+    closes = _random_walk(5_000, seed=1)
+    index = SortedPrices(closes)
+    rng = np.random.default_rng(1)
+    pa = rng.choice(closes, 300) * rng.uniform(0.95, 1.0, 300)
+    pb = pa * rng.uniform(0.9, 1.2, 300)  # includes pa > pb
+    expected = [np.count_nonzero((closes >= a) & (closes <= b)) for a, b in zip(pa, pb)]
+    assert index.count_in_range(pa, pb).tolist() == expected
+    np.testing.assert_allclose(index.in_range_pct(pa, pb), np.array(expected) / 50)
+
+
+def test_quantile_ranges_match_per_percentile_calls():
+    closes = _random_walk(2_000, seed=2)
+    expected = []
+    for lo_q, hi_q in [(5, 95), (10, 90), (25, 75)]:
+        pa, pb = float(np.percentile(closes, lo_q)), float(np.percentile(closes, hi_q))
+        expected.append((pa, pb, f"quantile_P{lo_q}_P{hi_q}"))
+
+    assert generate_quantile_ranges(closes) == expected
+    assert generate_quantile_ranges(closes, index=SortedPrices(closes)) == expected
+
+    custom = generate_quantile_ranges(closes, [(2.5, 97.5), (40, 60)])
+    assert [label for _, _, label in custom] == ["quantile_P2.5_P97.5", "quantile_P40_P60"]
+    assert custom[1][0] == np.percentile(closes, 40)
+
+
+def test_index_consumers_match_their_defaults():
+    closes = _random_walk(3_000, seed=3)
+    timestamps = 1_700_000_000_000 + 3_600_000 * np.arange(3_000, dtype=np.float64)
+    index = SortedPrices(closes)
+    current = float(closes[-1])
+
+    ranges = np.array([[1.3, 1.6], [1.45, 1.5], [0.5, 0.6], [float(closes[7])] * 2])
+    plain = run_backtest_batch(closes, timestamps, ranges, current, 1_000, 0.0025)
+    indexed = run_backtest_batch(
+        closes, timestamps, ranges, current, 1_000, 0.0025, sorted_prices=index
+    )
+    assert indexed == plain
+
+    assert optimize_tick_ranges(closes, current, 60, index=index) == optimize_tick_ranges(
+        closes, current, 60
+    )
+
+
+def test_recommend_accepts_custom_quantile_pairs(client, make_payload):
+    payload = make_payload(n=500, strategies=["quantile"], quantile_pairs=[[1, 99], [30, 70]])
+    res = client.post("/api/v1/recommend", json=payload)
+    assert res.status_code == 200
+    labels = {c["strategy"] for c in res.json()["top3"]}
+    assert {"quantile_P1_P99", "quantile_P30_P70"} <= labels
+
+    bad = make_payload(n=500, quantile_pairs=[[60, 40]])
+    assert client.post("/api/v1/recommend", json=bad).status_code == 400
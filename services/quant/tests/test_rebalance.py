@@ -0,0 +1,153 @@
+"""Tests for the event-driven rebalancing simulator and its sweep endpoint."""
+
+import math
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.engine.backtest import _compute_liquidity, _lp_value, run_backtest
+from app.engine.rebalance import (
+    _next_events,
+    _sparse_tables,
+    rebalance_curve,
+    simulate_rebalancing,
+)
+from app.engine.tick_math import align_range, tick_to_price
+
+
+def _random_walk(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.004, n)))
+
+
+def _reference(closes, width, buffer_pct, interval, capital, spacing, cost_usd, cost_pct):
+    """Bar-by-bar loop over the scalar CL helpers."""
+
+    def centred(price):
+        half = width / 100 / 2
+        lower, upper = align_range(price * (1 - half), price * (1 + half), spacing)
+        return tick_to_price(lower), tick_to_price(upper)
+
+    pa, pb = centred(closes[0])
+    L = _compute_liquidity(capital, closes[0], pa, pb)
+    last, rebalances, total_cost = 0, 0, 0.0
+    for j in range(1, len(closes)):
+        price = closes[j]
+        lo, hi = -math.inf, math.inf
+        if not math.isnan(buffer_pct):
+            margin = (pb - pa) * (buffer_pct / 100)
+            lo, hi = pa + margin, pb - margin
+        if price < lo or price > hi or (interval and j - last >= interval):
+            value = _lp_value(L, price, pa, pb)
+            cost = cost_usd + value * (cost_pct / 100)
+            if not value > cost:
+                return rebalances, total_cost + min(cost, value), 0.0
+            rebalances += 1
+            total_cost += cost
+            pa, pb = centred(price)
+            L = _compute_liquidity(value - cost, price, pa, pb)
+            last = j
+    return rebalances, total_cost, _lp_value(L, closes[-1], pa, pb)
+
+
+def test_next_events_match_a_linear_scan():
+    rng = np.random.default_rng(0)
+    closes = _random_walk(1_000, seed=0)
+    mins, maxs = _sparse_tables(closes)
+    start = rng.integers(0, 1_000, 200)
+    limit = np.minimum(start + rng.integers(0, 600, 200), 1_000)
+    lo = closes[start] * (1 - rng.uniform(0, 0.1, 200))
+    hi = closes[start] * (1 + rng.uniform(0, 0.1, 200))
+
+    events = _next_events(mins, maxs, start, lo, hi, limit)
+
+    for s, a, b, stop, event in zip(start, lo, hi, limit, events):
+        outside = np.flatnonzero((closes[s:stop] < a) | (closes[s:stop] > b))
+        assert event == (s + outside[0] if len(outside) else stop)
+
+
+def test_every_configuration_matches_the_scalar_loop():
+    closes = _random_walk(3_000, seed=3)
+    widths = [0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 1.0, 2.0, 5.0, 3.0]
+    buffers = [0.0, 0.0, 10.0, 25.0, 0.0, 0.0, math.nan, math.nan, 5.0, 40.0]
+    intervals = [0, 0, 0, 0, 100, 500, 48, 200, 300, 0]
+
+    sim = simulate_rebalancing(
+        closes, widths, buffers, intervals,
+        capital=10_000, tick_spacing=60, cost_usd=2.0, cost_pct=0.3,
+    )
+
+    for i, config in enumerate(zip(widths, buffers, intervals)):
+        rebalances, total_cost, final_value = _reference(closes, *config, 10_000, 60, 2.0, 0.3)
+        assert sim["rebalances"][i] == rebalances
+        assert sim["total_cost"][i] == total_cost
+        assert sim["final_value"][i] == final_value
+    assert sim["rebalances"][0] > 0
+
+
+def test_wide_range_without_exits_is_the_static_backtest():
+    closes = _random_walk(500, seed=4)
+    sim = simulate_rebalancing(closes, [150.0], capital=10_000, tick_spacing=60)
+    lower, upper = align_range(closes[0] * 0.25, closes[0] * 1.75, 60)
+    static = run_backtest(
+        closes, np.arange(500.0), tick_to_price(lower), tick_to_price(upper),
+        closes[0], 10_000, 0.0,
+    )["metrics"]
+    assert sim["rebalances"][0] == 0
+    assert round(float(sim["lp_vs_hodl_pct"][0]), 2) == static.lp_vs_hodl_pct
+
+
+def test_curve_follows_the_simulation_and_costs_can_close_out():
+    closes = _random_walk(2_000, seed=5)
+    curve = rebalance_curve(closes, 1.0, capital=10_000, tick_spacing=60, cost_usd=5.0)
+    assert len(curve["events"]) == curve["rebalances"] > 0
+    assert curve["lp_values"][-1] == curve["final_value"]
+    assert curve["lp_values"][0] == pytest.approx(10_000)
+
+    broke = rebalance_curve(closes, 0.2, capital=100, tick_spacing=1, cost_usd=5.0)
+    assert broke["final_value"] == 0.0
+    assert np.all(broke["lp_values"][broke["events"][-1] :] == 0.0)
+
+
+def _sweep_payload(make_payload, **overrides):
+    payload = make_payload(n=1_500, seed=2)
+    body = {
+        "klines": payload["klines"],
+        "tick_spacing": 60,
+        "capital_usd": 10_000,
+        "widths_pct": [1.0, 3.0, 10.0],
+        "triggers": [
+            {"kind": "exit"},
+            {"kind": "buffer", "buffer_pct": 20},
+            {"kind": "interval", "interval_bars": 240},
+        ],
+        "cost_usd": 1.0,
+        "cost_pct": 0.1,
+    }
+    body.update(overrides)
+    return body
+
+
+def test_sweep_endpoint_ranks_configurations(client, make_payload):
+    res = client.post("/api/v1/rebalance/sweep", json=_sweep_payload(make_payload, max_points=200))
+
+    assert res.status_code == 200
+    data = res.json()
+    pnl = [r["net_pnl_usd"] for r in data["results"]]
+    assert len(pnl) == 9 and pnl == sorted(pnl, reverse=True)
+    best = data["results"][0]
+    series = data["best_series"]
+    assert len(series["markers"]) == best["rebalances"]
+    assert len(series["timestamps"]) <= 200 + best["rebalances"]
+    assert series["lp_values"][-1] == pytest.approx(best["final_value_usd"], abs=0.01)
+
+
+def test_sweep_endpoint_rejects_bad_requests(client, make_payload, monkeypatch):
+    bad_trigger = _sweep_payload(make_payload, triggers=[{"kind": "interval"}])
+    assert client.post("/api/v1/rebalance/sweep", json=bad_trigger).status_code == 400
+    bad_width = _sweep_payload(make_payload, widths_pct=[250.0])
+    assert client.post("/api/v1/rebalance/sweep", json=bad_width).status_code == 400
+
+    monkeypatch.setattr(settings, "rebalance_max_configs", 4)
+    assert client.post("/api/v1/rebalance/sweep", json=_sweep_payload(make_payload)).status_code == 400
@@ -0,0 +1,174 @@
+"""End-to-end tests for POST /api/v1/recommend."""
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.routers import recommend
+
+
+def test_recommend_returns_top3_extremes_and_series(client, make_payload):
+    payload = make_payload()
+    res = client.post("/api/v1/recommend", json=payload)
+
+    assert res.status_code == 200
+    body = res.json()
+    assert len(body["top3"]) == 3
+    assert body["extreme_2pct"]["strategy"] == "extreme_2.0pct"
+    assert body["extreme_5pct"]["strategy"] == "extreme_5.0pct"
+    assert set(body["series"]) == {"top1", "top2", "top3", "extreme_2pct", "extreme_5pct"}
+    for series in body["series"].values():
+        assert len(series["timestamps"]) == len(payload["klines"])
+        assert len(series["lp_values"]) == len(payload["klines"])
+        assert series["prices"] == [k[4] for k in payload["klines"]]
+
+
+def test_recommend_rejects_too_few_klines(client, make_payload):
+    res = client.post("/api/v1/recommend", json=make_payload(n=1))
+    assert res.status_code == 400
+
+
+def test_recommend_simulates_fees_from_volume(client, make_payload):
+    plain = client.post("/api/v1/recommend", json=make_payload()).json()
+    res = client.post(
+        "/api/v1/recommend",
+        json=make_payload(simulate_fees=True, pool_tvl_usd=5_000_000.0),
+    )
+
+    assert res.status_code == 200
+    body = res.json()
+    for cand in body["top3"] + [body["extreme_2pct"], body["extreme_5pct"]]:
+        metrics = cand["metrics"]
+        assert metrics["fees_earned"] > 0
+        assert metrics["net_vs_hodl_pct"] >= metrics["lp_vs_hodl_pct"]
+    assert plain["top3"][0]["metrics"]["fees_earned"] is None
+
+
+def test_recommend_fees_require_pool_tvl(client, make_payload):
+    res = client.post("/api/v1/recommend", json=make_payload(simulate_fees=True))
+    assert res.status_code == 400
+
+
+def test_recommend_intrabar_mode_uses_high_low(client, make_payload):
+    plain = client.post("/api/v1/recommend", json=make_payload()).json()
+    res = client.post("/api/v1/recommend", json=make_payload(intrabar=True))
+
+    assert res.status_code == 200
+    body = res.json()
+    for key in ("extreme_2pct", "extreme_5pct"):
+        assert body[key]["metrics"]["in_range_pct"] <= plain[key]["metrics"]["in_range_pct"]
+        assert body[key]["metrics"]["max_il_pct"] >= plain[key]["metrics"]["max_il_pct"]
+
+
+def _stream_records(client, payload):
+    res = client.post("/api/v1/recommend?stream=true", json=payload)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in res.text.splitlines()]
+
+
+def _assert_stream_matches(records, body):
+    keys = ["top1", "top2", "top3", "extreme_2pct", "extreme_5pct"]
+    assert [r["type"] for r in records] == ["summary"] + ["candidate"] * 5 + ["series"] * 5
+    summary, candidates, series = records[0], records[1:6], records[6:]
+    assert summary == {
+        "type": "summary",
+        "current_price": body["current_price"],
+        "pool_fee_rate": body["pool_fee_rate"],
+        "keys": keys,
+        "walk_forward": body["walk_forward"],
+        "rankings": body["rankings"],
+    }
+    expected_cards = body["top3"] + [body["extreme_2pct"], body["extreme_5pct"]]
+    assert [r["key"] for r in candidates] == keys
+    assert [r["candidate"] for r in candidates] == expected_cards
+    assert {r["key"]: r["series"] for r in series} == body["series"]
+
+
+def test_recommend_stream_matches_full_response(client, make_payload):
+    from app.routers import recommend as recommend_router
+
+    payload = make_payload(seed=4)
+    recommend_router._response_cache.clear()
+    streamed = _stream_records(client, payload)  # computed, not cached
+    body = client.post("/api/v1/recommend", json=payload).json()
+    _assert_stream_matches(streamed, body)
+
+    # The second stream is served from the response cache.
+    _assert_stream_matches(_stream_records(client, payload), body)
+
+
+def test_recommend_stream_reports_errors_before_streaming(client, make_payload):
+    res = client.post("/api/v1/recommend?stream=true", json=make_payload(current_price=-1))
+    assert res.status_code == 400
+
+
+def test_recommend_ranks_every_profile_from_one_backtest(client, make_payload):
+    from app.routers import recommend as recommend_router
+
+    payload = make_payload(seed=23)
+    plain = client.post("/api/v1/recommend", json=payload).json()
+    metrics_misses = recommend_router._metrics_cache.stats()["misses"]
+
+    body = client.post(
+        "/api/v1/recommend",
+        json=make_payload(
+            seed=23,
+            rank_profiles=True,
+            weight_sets={"range_only": {"in_range_pct": 1.0}},
+        ),
+    ).json()
+
+    # All rankings are scored from the cached metrics of the first request.
+    assert recommend_router._metrics_cache.stats()["misses"] == metrics_misses
+    assert list(body["rankings"]) == ["balanced", "conservative", "aggressive", "range_only"]
+    assert body["rankings"]["balanced"]["top3"] == plain["top3"]
+    assert body["top3"] == plain["top3"]
+    in_range = [c["metrics"]["in_range_pct"] for c in body["rankings"]["range_only"]["top3"]]
+    assert in_range == sorted(in_range, reverse=True)
+
+
+def test_recommend_profile_may_name_a_weight_set(client, make_payload):
+    weight_sets = {"efficiency": {"capital_efficiency": 2.0, "max_il_pct": 1.0}}
+    body = client.post(
+        "/api/v1/recommend",
+        json=make_payload(seed=24, profile="efficiency", weight_sets=weight_sets),
+    ).json()
+
+    assert list(body["rankings"]) == ["efficiency"]
+    assert body["rankings"]["efficiency"]["top3"] == body["top3"]
+
+
+def test_recommend_rejects_invalid_weight_sets(client, make_payload):
+    for weight_sets in (
+        {"balanced": {"in_range_pct": 1.0}},
+        {"mine": {"fees_earned": 1.0}},
+        {"mine": {"in_range_pct": 0.0}},
+        {"mine": {"in_range_pct": 1.0, "max_il_pct": -1.0}},
+    ):
+        res = client.post("/api/v1/recommend", json=make_payload(weight_sets=weight_sets))
+        assert res.status_code == 400, weight_sets
+
+
+def test_recommend_shares_thread_pools_until_shutdown(make_payload, monkeypatch):
+    monkeypatch.setattr(settings, "backtest_workers", 2)
+    monkeypatch.setattr(settings, "simulation_workers", 2)
+    recommend.shutdown_executors()
+    pools = (recommend._backtest_pool, recommend._simulation_pool)
+    simulation = {"horizon_hours": 2, "n_paths": 200}
+
+    with TestClient(app) as client:
+        for seed in (1, 2):
+            payload = make_payload(n=300, seed=seed, simulation=simulation)
+            assert client.post("/api/v1/recommend", json=payload).status_code == 200
+            if seed == 1:
+                executors = [pool._executor for pool in pools]
+                assert None not in executors
+        assert [pool._executor for pool in pools] == executors
+
+    assert [pool._executor for pool in pools] == [None, None]
+
+    monkeypatch.setattr(settings, "backtest_workers", 1)
+    assert recommend._backtest_pool.executor() is None
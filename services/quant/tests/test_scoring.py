@@ -0,0 +1,87 @@
+"""Tests for matrix scoring of candidates under several weight sets."""
+
+import numpy as np
+
+from app.engine.scoring import (
+    INVERTED,
+    PROFILES,
+    SCORED_METRICS,
+    metric_matrix,
+    normalize_columns,
+    score_candidates,
+    score_matrix,
+)
+from app.schemas import BacktestMetrics
+
+
+def _metrics(rng, n):
+    return [
+        BacktestMetrics(
+            in_range_pct=float(rng.uniform(0, 100)),
+            touch_count=int(rng.integers(0, 50)),
+            mean_time_to_exit_hours=float(rng.uniform(0, 100)),
+            lp_vs_hodl_pct=float(rng.normal(0, 5)),
+            max_il_pct=float(rng.uniform(0, 20)),
+            max_drawdown_pct=float(rng.uniform(0, 30)),
+            capital_efficiency=float(rng.uniform(1, 20)),
+        )
+        for _ in range(n)
+    ]
+
+
+def _reference_scores(metrics, weights):
+    """Per-candidate loop over min-max normalized metrics."""
+    normed = {}
+    for name in weights:
+        values = [float(getattr(m, name)) for m in metrics]
+        lo, hi = min(values), max(values)
+        normed[name] = [50.0 if hi == lo else (v - lo) / (hi - lo) * 100 for v in values]
+    return [
+        round(
+            sum(
+                w * (100 - normed[name][i] if inverted else normed[name][i])
+                for name, (w, inverted) in weights.items()
+            ),
+            2,
+        )
+        for i in range(len(metrics))
+    ]
+
+
+def test_score_matrix_matches_per_profile_loop():
+    metrics = _metrics(np.random.default_rng(0), 40)
+    scores = score_matrix(metric_matrix(metrics), PROFILES)
+
+    assert scores.shape == (40, len(PROFILES))
+    for j, weights in enumerate(PROFILES.values()):
+        np.testing.assert_allclose(scores[:, j], _reference_scores(metrics, weights), atol=0.011)
+
+
+def test_metric_matrix_ranks_on_net_return_when_fees_are_simulated():
+    m = BacktestMetrics(
+        in_range_pct=50, touch_count=3, mean_time_to_exit_hours=1, lp_vs_hodl_pct=-2,
+        max_il_pct=1, max_drawdown_pct=2, capital_efficiency=4, net_vs_hodl_pct=1.5,
+    )
+    row = metric_matrix([m])[0]
+    assert row[SCORED_METRICS.index("lp_vs_hodl_pct")] == 1.5
+    assert metric_matrix([]).shape == (0, len(SCORED_METRICS))
+
+
+def test_normalize_columns_per_group():
+    values = np.array([[1.0, 5.0], [3.0, 5.0], [10.0, 0.0], [20.0, 4.0]])
+    normed = normalize_columns(values, groups=np.array([0, 0, 1, 1]))
+    np.testing.assert_array_equal(normed, [[0, 50], [100, 50], [0, 0], [100, 100]])
+
+
+def test_score_candidates_sorts_and_annotates():
+    metrics = _metrics(np.random.default_rng(1), 10)
+    cands = [{"strategy": f"c{i}", "width_pct": 5.0, "metrics": m} for i, m in enumerate(metrics)]
+    scored = score_candidates(cands, "balanced")
+
+    scores = [c["score"] for c in scored]
+    assert scores == sorted(scores, reverse=True)
+    assert all(c["insight"] and c["insight_data"]["width_class"] == "moderate" for c in scored)
+
+
+def test_every_scored_metric_has_a_direction():
+    assert set(INVERTED) == set(SCORED_METRICS)
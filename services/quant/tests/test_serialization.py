@@ -0,0 +1,61 @@
+"""Tests for the array-backed response encoder."""
+
+import math
+
+import numpy as np
+
+from app.routers import recommend as recommend_router
+from app.schemas import ChartSeries, RecommendRequest, SessionResponse, StreamSeries
+from app.serialization import chart_series, dumps
+
+_ARRAY_FIELDS = ("timestamps", "lp_values", "hodl_values", "il_pct", "prices")
+
+
+def _as_lists(chart: ChartSeries) -> ChartSeries:
+    return ChartSeries(**{name: getattr(chart, name).tolist() for name in _ARRAY_FIELDS})
+
+
+def test_dumps_matches_pydantic_for_edge_values():
+    values = np.array([0.0, -0.0, 1e-7, 1.5e-5, 0.1, 123.0, 1e15, 1e16, -2.5e20, 5e-324,
+                       math.nan, math.inf, -math.inf])
+    arrays = {
+        "timestamps": np.arange(len(values), dtype=np.int64) * 10**12,
+        "lp_values": values,
+        "hodl_values": values[::-1].copy(),
+        "il_pct": values,  # shared array
+        "prices": np.round(values, 4),
+    }
+    chart = chart_series(arrays)
+    reference = _as_lists(chart)
+
+    assert dumps(chart) == reference.model_dump_json().encode()
+    record = StreamSeries(key="top1", series=chart)
+    assert dumps(record) == StreamSeries(key="top1", series=reference).model_dump_json().encode()
+
+
+def test_recommend_response_is_byte_identical_to_model_encoding(client, make_payload):
+    payload = make_payload(
+        n=3_000, seed=2401, strategies=["quantile", "optimizer"], rank_profiles=True
+    )
+    req = RecommendRequest.model_validate(payload)
+    timestamps, closes = recommend_router._kline_columns(req.klines)
+    response = recommend_router._recommend(req, timestamps, closes)
+
+    assert isinstance(response.series["top1"].prices, np.ndarray)
+    reference = response.model_copy(
+        update={"series": {key: _as_lists(s) for key, s in response.series.items()}}
+    )
+    expected = reference.model_dump_json().encode()
+    assert dumps(response) == expected
+
+    res = client.post("/api/v1/recommend", json=payload)  # served from the response cache
+    assert res.headers["content-type"] == "application/json"
+    assert res.content == expected
+
+
+def test_session_response_encodes_series(client, make_payload):
+    res = client.post("/api/v1/sessions", json=make_payload(n=500, seed=2402))
+    assert res.status_code == 200
+    body = SessionResponse.model_validate_json(res.content)
+    assert len(body.result.series["top1"].timestamps) == 500
+    assert res.content == body.model_dump_json().encode()
@@ -0,0 +1,69 @@
+"""Tests for incremental recommendation sessions."""
+
+import numpy as np
+
+from app.engine.backtest import run_backtest
+
+
+def _metrics_by_strategy(result: dict) -> dict[str, dict]:
+    cands = result["top3"] + [result["extreme_2pct"], result["extreme_5pct"]]
+    return {c["strategy"]: c for c in cands}
+
+
+def test_session_refresh_matches_full_backtest(client, make_payload):
+    payload = make_payload(n=1_500, seed=4)
+    klines = payload.pop("klines")
+    created = client.post("/api/v1/sessions", json={**payload, "klines": klines[:1_400]})
+    assert created.status_code == 200
+    session_id = created.json()["session_id"]
+    assert set(created.json()["result"]["series"]) == {
+        "top1", "top2", "top3", "extreme_2pct", "extreme_5pct",
+    }
+
+    # Overlapping bars (already seen) are ignored.
+    client.post(f"/api/v1/sessions/{session_id}/klines", json={"klines": klines[1_390:1_450]})
+    res = client.post(f"/api/v1/sessions/{session_id}/klines", json={"klines": klines[1_450:]})
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["bars"] == 1_500
+    assert body["result"]["series"] == {}
+
+    closes = np.array([k[4] for k in klines])
+    timestamps = np.array([k[0] for k in klines])
+    for cand in _metrics_by_strategy(body["result"]).values():
+        expected = run_backtest(
+            closes, timestamps, cand["pa"], cand["pb"], float(closes[0]),
+            payload["capital_usd"], payload["fee_rate"],
+        )["metrics"]
+        assert cand["metrics"] == expected.model_dump()
+
+
+def test_windowed_session_reports_window_bars(client, make_payload):
+    payload = make_payload(n=600, seed=5)
+    klines = payload.pop("klines")
+    created = client.post(
+        "/api/v1/sessions", json={**payload, "klines": klines[:500], "window_bars": 300}
+    )
+    session_id = created.json()["session_id"]
+    assert created.json()["bars"] == 300
+
+    res = client.post(
+        f"/api/v1/sessions/{session_id}/klines",
+        json={"klines": klines[500:], "include_series": True},
+    )
+    body = res.json()
+    assert body["bars"] == 300
+    assert len(body["result"]["series"]["top1"]["timestamps"]) == 300
+    assert body["result"]["series"]["top1"]["timestamps"][-1] == klines[-1][0]
+
+
+def test_unknown_session_is_404(client):
+    res = client.post("/api/v1/sessions/nope/klines", json={"klines": []})
+    assert res.status_code == 404
+
+
+def test_session_rejects_fee_simulation(client, make_payload):
+    payload = make_payload(n=200, simulate_fees=True, pool_tvl_usd=1e6)
+    res = client.post("/api/v1/sessions", json=payload)
+    assert res.status_code == 400
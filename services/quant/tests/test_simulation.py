@@ -0,0 +1,127 @@
+"""Tests for the Monte Carlo forward simulation of candidate ranges."""
+
+import numpy as np
+import pytest
+
+from app.engine import simulation
+from app.engine.backtest import run_backtest
+from app.engine.simulation import horizon_bars, simulate_paths, simulate_ranges
+
+
+def _random_walk(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.004, n)))
+
+
+RANGES = np.array([[1.40, 1.60], [1.45, 1.55], [1.49, 1.51], [1.0, 3.0]])
+
+
+@pytest.mark.parametrize("method", simulation.METHODS)
+def test_results_depend_only_on_the_seed(method, monkeypatch):
+    closes = _random_walk(2_000, seed=1)
+    kwargs = dict(p0=1.5, capital=10_000, horizon=96, n_paths=500, method=method, seed=7)
+
+    base = simulate_ranges(closes, RANGES, **kwargs)
+    assert simulate_ranges(closes, RANGES, workers=4, **kwargs) == base
+
+    # Blocks evaluated one range at a time must merge to the same result.
+    monkeypatch.setattr(simulation, "_MAX_BLOCK_CELLS", 1)
+    assert simulate_ranges(closes, RANGES, workers=3, **kwargs) == base
+    assert simulate_ranges(closes, RANGES, **dict(kwargs, seed=8)) != base
+
+
+@pytest.mark.parametrize("block_bars", [simulation._BLOCK_BARS, 7])
+def test_exit_bars_match_a_per_path_reference(block_bars, monkeypatch):
+    # Short blocks carry the running min / max and exit counts across blocks.
+    monkeypatch.setattr(simulation, "_BLOCK_BARS", block_bars)
+    closes = _random_walk(1_000, seed=2)
+    horizon, n_paths = 48, 300
+    paths = simulate_paths(closes, 1.5, n_paths, horizon, seed=3)
+
+    [fc] = simulate_ranges(closes, RANGES[1:2], 1.5, 10_000, horizon, n_paths, seed=3)
+
+    pa, pb = RANGES[1]
+    exits = []
+    for path in paths:
+        outside = np.flatnonzero((path < pa) | (path > pb))
+        exits.append(outside[0] if len(outside) else horizon)
+    exits = np.array(exits)
+    assert fc.survival_pct == round(float(np.mean(exits == horizon)) * 100.0, 2)
+    assert fc.mean_time_to_exit_hours == round(float(np.mean(exits)), 2)
+
+    # Worst IL per path agrees with a full back-test of that path.
+    timestamps = np.arange(horizon + 1, dtype=np.float64)
+    worst = [
+        run_backtest(np.concatenate([[1.5], p]), timestamps, pa, pb, 1.5, 10_000, 0.0)[
+            "metrics"
+        ].max_il_pct
+        for p in paths
+    ]
+    assert fc.max_il_p95_pct == pytest.approx(np.percentile(worst, 95), abs=0.01)
+
+
+
+def test_bootstrap_paths_do_not_depend_on_the_block_length(monkeypatch):
+    closes = _random_walk(1_000, seed=4)
+    paths = simulate_paths(closes, 1.5, 100, 50, seed=5)
+    monkeypatch.setattr(simulation, "_BLOCK_BARS", 16)
+    np.testing.assert_array_equal(simulate_paths(closes, 1.5, 100, 50, seed=5), paths)
+
+def test_survival_is_monotone_in_range_width():
+    closes = _random_walk(3_000, seed=4)
+    wide, mid, narrow, _ = simulate_ranges(closes, RANGES, 1.5, 10_000, horizon=200, n_paths=400)
+    assert wide.survival_pct >= mid.survival_pct >= narrow.survival_pct
+    assert wide.mean_time_to_exit_hours >= narrow.mean_time_to_exit_hours
+
+
+def test_out_of_range_entry_never_survives():
+    closes = _random_walk(500, seed=5)
+    [fc] = simulate_ranges(closes, [[2.0, 2.5]], 1.5, 10_000, horizon=24, n_paths=100)
+    assert (fc.survival_pct, fc.mean_time_to_exit_hours) == (0.0, 0.0)
+
+
+def test_flat_history_always_survives_without_il():
+    closes = np.full(200, 1.5)
+    for method in simulation.METHODS:
+        [fc] = simulate_ranges(closes, [[1.49, 1.51]], 1.5, 10_000, 24, 100, method=method)
+        assert fc.survival_pct == 100.0
+        assert fc.il_median_pct == fc.il_p95_pct == fc.max_il_p95_pct == 0.0
+
+
+def test_horizon_bars_uses_the_kline_interval():
+    timestamps = 1_700_000_000_000 + 900_000 * np.arange(100)  # 15 minutes
+    assert horizon_bars(timestamps, 24) == (96, 0.25)
+    assert horizon_bars(timestamps, 0.1) == (1, 0.25)
+
+
+def test_invalid_arguments_raise():
+    closes = _random_walk(100, seed=6)
+    with pytest.raises(ValueError):
+        simulate_ranges(closes, RANGES, 1.5, 10_000, horizon=10, method="heston")
+    with pytest.raises(ValueError):
+        simulate_ranges(closes[:1], RANGES, 1.5, 10_000, horizon=10)
+
+
+def test_recommend_attaches_forecasts(client, make_payload):
+    payload = make_payload(n=1_000, simulation={"horizon_hours": 6, "n_paths": 200})
+
+    res = client.post("/api/v1/recommend", json=payload)
+
+    assert res.status_code == 200
+    data = res.json()
+    charted = data["top3"] + [data["extreme_2pct"], data["extreme_5pct"]]
+    for cand in charted:
+        fc = cand["forecast"]
+        assert fc["n_paths"] == 200
+        assert fc["horizon_hours"] == 6.0
+        assert 0.0 <= fc["survival_pct"] <= 100.0
+    assert client.post("/api/v1/recommend", json=payload).json() == data
+
+    plain = client.post("/api/v1/recommend", json=make_payload(n=1_000)).json()
+    assert plain["top3"][0]["forecast"] is None
+
+
+def test_sessions_reject_simulation(client, make_payload):
+    payload = make_payload(n=100, simulation={"horizon_hours": 6})
+    res = client.post("/api/v1/sessions", json=payload)
+    assert res.status_code == 400
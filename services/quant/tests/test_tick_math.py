@@ -0,0 +1,84 @@
+"""Tests for the array tick math against the scalar functions."""
+
+import numpy as np
+import pytest
+
+from app.engine.tick_math import (
+    MAX_TICK,
+    MIN_TICK,
+    align_range,
+    align_ranges,
+    align_tick_down,
+    align_tick_up,
+    align_ticks_down,
+    align_ticks_up,
+    price_to_tick,
+    price_to_tick_array,
+    tick_table,
+    tick_to_price,
+    tick_to_price_array,
+)
+
+
+def test_price_to_tick_array_matches_scalar_including_boundaries():
+    rng = np.random.default_rng(0)
+    ticks = rng.integers(MIN_TICK, MAX_TICK, 20_000)
+    exact = np.array([tick_to_price(int(t)) for t in ticks])
+    prices = np.concatenate(
+        [
+            np.exp(rng.uniform(-40, 40, 50_000)),
+            exact,  # prices of exact ticks, where log rounding matters
+            np.nextafter(exact, 0.0),
+            np.nextafter(exact, np.inf),
+        ]
+    )
+
+    expected = np.array([price_to_tick(float(p)) for p in prices])
+    np.testing.assert_array_equal(price_to_tick_array(prices), expected)
+
+    with pytest.raises(ValueError):
+        price_to_tick_array([1.0, 0.0])
+
+
+@pytest.mark.parametrize("spacing", [1, 10, 60, 200])
+def test_tick_to_price_array_matches_scalar(spacing):
+    rng = np.random.default_rng(spacing)
+    ticks = np.concatenate(
+        [rng.integers(MIN_TICK, MAX_TICK, 5_000), [MIN_TICK - 1, MAX_TICK + 5, 0]]
+    )
+    ticks = np.concatenate([ticks, align_ticks_down(ticks, spacing)])
+
+    expected = np.array([tick_to_price(int(t)) for t in ticks])
+    np.testing.assert_array_equal(tick_to_price_array(ticks, spacing), expected)
+
+
+def test_tick_table_is_memoized_and_read_only():
+    table = tick_table(60)
+    assert tick_table(60) is table
+    assert table.first_tick % 60 == 0 and table.first_tick >= MIN_TICK
+    assert table.prices[10] == tick_to_price(table.first_tick + 600)
+    with pytest.raises(ValueError):
+        table.prices[0] = 1.0
+
+
+def test_align_arrays_match_scalar():
+    ticks = np.arange(-1_000, 1_000)
+    for spacing in (1, 7, 60):
+        assert align_ticks_down(ticks, spacing).tolist() == [
+            align_tick_down(int(t), spacing) for t in ticks
+        ]
+        assert align_ticks_up(ticks, spacing).tolist() == [
+            align_tick_up(int(t), spacing) for t in ticks
+        ]
+
+
+@pytest.mark.parametrize("spacing", [1, 10, 60, 200])
+def test_align_ranges_matches_align_range(spacing):
+    rng = np.random.default_rng(spacing)
+    pa = np.exp(rng.uniform(-5, 5, 20_000))
+    pb = pa * np.exp(rng.uniform(0, 0.002, 20_000))  # includes collapsing ranges
+
+    lower, upper = align_ranges(pa, pb, spacing)
+
+    expected = [align_range(float(a), float(b), spacing) for a, b in zip(pa, pb)]
+    assert list(zip(lower.tolist(), upper.tolist())) == expected
@@ -0,0 +1,128 @@
+"""Tests for walk-forward evaluation with incrementally maintained windows."""
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.engine.backtest import run_backtest_batch
+from app.engine.candidates import (
+    generate_quantile_ranges,
+    generate_swing_ranges,
+    generate_volband_ranges,
+)
+from app.engine.scoring import PROFILES
+from app.engine.tick_math import align_range, tick_to_price
+from app.engine.walkforward import (
+    iter_window_ranges,
+    walk_forward,
+    window_ends,
+)
+
+
+def _random_walk(n: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # Rounded so that windows hold many duplicate prices.
+    return np.round(1.5 * np.exp(np.cumsum(rng.normal(0.0, 0.004, n))), 3)
+
+
+@pytest.mark.parametrize("train, step", [(500, 24), (500, 700), (37, 5), (12, 1)])
+def test_window_ranges_match_the_generators_on_each_slice(train, step):
+    closes = _random_walk(3_000, seed=1)
+    strategies = ["swing", "quantile", "volband"]
+    ends = window_ends(len(closes), train, 24, step)
+
+    for end, (sorted_window, ranges) in zip(
+        ends, iter_window_ranges(closes, train, ends, strategies)
+    ):
+        window = closes[end - train : end]
+        np.testing.assert_array_equal(sorted_window.values, np.sort(window))
+        assert ranges == (
+            generate_swing_ranges(window)
+            + generate_quantile_ranges(window)
+            + generate_volband_ranges(window)
+        )
+
+
+def test_walk_forward_matches_a_per_window_reference():
+    closes = _random_walk(2_000, seed=2)
+    timestamps = 1_700_000_000_000 + 3_600_000 * np.arange(len(closes), dtype=np.float64)
+    train, test, step = 300, 48, 100
+
+    result = walk_forward(
+        closes,
+        timestamps,
+        strategies=["quantile", "optimizer"],
+        tick_spacing=60,
+        capital=10_000,
+        fee_rate=0.0025,
+        weights=PROFILES["balanced"],
+        train_bars=train,
+        test_bars=test,
+        step_bars=step,
+    )
+
+    ends = window_ends(len(closes), train, test, step)
+    assert (result.windows, result.step_bars) == (len(ends), step)
+    in_range = []
+    for end in ends:
+        pa, pb, _ = generate_quantile_ranges(closes[end - train : end])[1]
+        lo, hi = align_range(pa, pb, 60)
+        [metrics] = run_backtest_batch(
+            closes[end - 1 : end + test],
+            timestamps[end - 1 : end + test],
+            [[tick_to_price(lo), tick_to_price(hi)]],
+            float(closes[end - 1]),
+            10_000,
+            0.0025,
+        )
+        in_range.append(metrics.in_range_pct)
+
+    by_label = {s.strategy: s for s in result.strategies}
+    stats = by_label["quantile_P10_P90"]
+    assert stats.windows == len(ends)
+    assert stats.mean_in_range_pct == round(float(np.mean(in_range)), 2)
+    assert {"extreme_2.0pct", "extreme_5.0pct", "optimizer_max"} <= set(by_label)
+    assert by_label["extreme_2.0pct"].top1_pct == 0.0
+    assert sum(s.top1_pct for s in result.strategies) == pytest.approx(100.0, abs=0.1)
+
+
+def test_recommend_walk_forward(client, make_payload):
+    payload = make_payload(
+        n=1_500, walk_forward={"train_bars": 400, "test_bars": 120, "step_bars": 60}
+    )
+
+    res = client.post("/api/v1/recommend", json=payload)
+
+    assert res.status_code == 200
+    wf = res.json()["walk_forward"]
+    assert wf["windows"] == len(window_ends(1_500, 400, 120, 60))
+    assert wf["strategies"]
+
+    plain = client.post("/api/v1/recommend", json=make_payload(n=1_500)).json()
+    assert plain["walk_forward"] is None
+
+
+def test_walk_forward_picks_by_a_custom_weight_set(client, make_payload):
+    walk = {"train_bars": 400, "test_bars": 120, "step_bars": 60}
+
+    def top1(**overrides) -> dict[str, float]:
+        payload = make_payload(n=1_500, seed=3, walk_forward=walk, **overrides)
+        res = client.post("/api/v1/recommend", json=payload)
+        assert res.status_code == 200
+        return {s["strategy"]: s["top1_pct"] for s in res.json()["walk_forward"]["strategies"]}
+
+    balanced = top1()
+    tight = top1(profile="tight", weight_sets={"tight": {"capital_efficiency": 1.0}})
+    assert tight != balanced
+
+
+def test_recommend_walk_forward_rejects_bad_windows(client, make_payload, monkeypatch):
+    too_long = make_payload(n=300, walk_forward={"train_bars": 250, "test_bars": 100})
+    assert client.post("/api/v1/recommend", json=too_long).status_code == 400
+
+    monkeypatch.setattr(settings, "walk_forward_max_windows", 10)
+    too_many = make_payload(n=300, walk_forward={"train_bars": 50, "test_bars": 10})
+    assert client.post("/api/v1/recommend", json=too_many).status_code == 400
+
+    session = make_payload(n=300, walk_forward={"train_bars": 50, "test_bars": 10})
+    assert client.post("/api/v1/sessions", json=session).status_code == 400